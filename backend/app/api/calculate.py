@@ -1,15 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ConfigDict, Field
+from starlette.concurrency import run_in_threadpool
+import json
+import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Union
 
+from app.api.validate import certificate_parameters, warnings_from_findings
+from app.core import cabida_advice
+from app.core.calculation_cache import calculation_cache
+from app.core.cabida_optimizer import OPTIMIZATION_GOALS, optimize_cabida
+from app.core.cabida_sweep import SWEEP_PARAMETERS, sweep_cabida, sweep_values
+from app.core.certificate_store import CertificateHandleError, certificate_store
+from app.core.config import settings
 from app.core.oguc_calculator import OGUCCalculator, OGUCParameters, CabidaCalculation
-from app.models.certificate import CertificateData, CalculationResult
+from app.core.regulation_rules import RuleSetError, get_rule_set, rule_registry
+from app.core.whatif_session import WhatIfSession
+from app.core.zoning_index import get_zoning_index, zone_for_coordinates
+from app.models.certificate import CalculationResult, CertificateReference
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-class CalculationRequest(BaseModel):
-    certificate_data: CertificateData
+class CalculationRequest(CertificateReference):
     floors: int
     zone_type: str
     min_dwelling_area: float = 40.0
@@ -18,57 +33,253 @@ class CalculationRequest(BaseModel):
 async def calculate_cabida(request: CalculationRequest):
     """
     Calcula la cabida según normativa OGUC basado en datos del certificado
+    (enviados en línea o referenciados por ``certificate_handle``)
     """
-    start_time = time.time()
-    
     try:
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
+        )
+        
         # Validar datos mínimos requeridos
-        if not request.certificate_data.superficie_terreno:
+        if not certificate_data.superficie_terreno:
             raise HTTPException(
                 status_code=400, 
                 detail="No se pudo extraer la superficie del terreno del certificado"
             )
         
         # Crear parámetros para el cálculo
-        params = OGUCParameters(
-            surface_area=request.certificate_data.superficie_terreno,
-            floors=request.floors,
-            max_height=request.certificate_data.altura_maxima or 23.0,
-            constructibility_coef=request.certificate_data.coeficiente_constructibilidad or 1.0,
-            occupation_percentage=request.certificate_data.porcentaje_ocupacion or 60.0,
-            zone_type=request.zone_type,
-            min_dwelling_area=request.min_dwelling_area
-        )
+        params = certificate_parameters(certificate_data, request.floors, request.zone_type, request.min_dwelling_area)
         
-        # Realizar cálculo
-        calculator = OGUCCalculator()
-        result = calculator.calculate_cabida(params)
+        # Realizar cálculo (reutilizado si ya se calculó, p. ej. por /validate)
+        result = calculation_cache.calculate(params)
         
-        # Generar recomendaciones
-        recommendations = []
-        if result.compliance_status == "RECHAZADO":
-            recommendations.extend(_generate_rejection_recommendations(result, params))
-        else:
-            recommendations.extend(_generate_optimization_recommendations(result, params))
+        # Única conversión del resultado interno a modelo pydantic
+        return calculation_result(result, params)
+    except HTTPException:
+        raise
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en cálculo de cabida: {str(e)}")
+
+class OptimizationRequest(CertificateReference):
+    goal: str = "dwelling_units"  # dwelling_units, built_surface o floors
+    zone_type: str = "residencial"
+    allowed_zones: Optional[List[str]] = None  # zonas admisibles además de zone_type
+    min_dwelling_area: float = Field(default=40.0, gt=0)
+    max_floors: Optional[int] = Field(default=None, ge=1)
+
+@router.post("/optimize", response_model=Dict[str, Any])
+async def optimize_cabida_configuration(request: OptimizationRequest):
+    """
+    Retorna la configuración que cumple la normativa y maximiza el objetivo
+    (unidades de vivienda, superficie edificable o pisos), junto con las
+    restricciones que la limitan. Los valores del certificado se tratan
+    como máximos.
+    """
+    start_time = time.time()
+    
+    if request.goal not in OPTIMIZATION_GOALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Objetivo no soportado: {request.goal}. Opciones: {', '.join(OPTIMIZATION_GOALS)}"
+        )
+    
+    try:
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
+        )
         
-        processing_time = time.time() - start_time
+        if not certificate_data.superficie_terreno:
+            raise HTTPException(
+                status_code=400, 
+                detail="No se pudo extraer la superficie del terreno del certificado"
+            )
         
-        return CalculationResult(
-            total_surface=result.total_surface,
-            max_building_surface=result.max_building_surface,
-            max_occupation_surface=result.max_occupation_surface,
-            allowed_floors=result.allowed_floors,
-            max_height=result.max_height,
-            constructibility_utilization=result.constructibility_utilization,
-            dwelling_units_max=result.dwelling_units_max,
-            compliance_status=result.compliance_status,
-            rejection_reasons=result.rejection_reasons,
-            recommendations=recommendations
+        zone_types = [request.zone_type] + [
+            zone for zone in (request.allowed_zones or []) if zone != request.zone_type
+        ]
+        calculator = OGUCCalculator()
+        optimization = optimize_cabida(
+            calculator,
+            surface_area=certificate_data.superficie_terreno,
+            max_height=certificate_data.altura_maxima or 23.0,
+            constructibility_coef=certificate_data.coeficiente_constructibilidad or 1.0,
+            occupation_percentage=certificate_data.porcentaje_ocupacion or 60.0,
+            zone_types=zone_types,
+            goal=request.goal,
+            min_dwelling_area=request.min_dwelling_area,
+            max_floors=request.max_floors,
+            comuna=certificate_data.comuna,
+            zona=certificate_data.zona,
         )
     except HTTPException:
         raise
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error en cálculo de cabida: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error en optimización de cabida: {str(e)}")
+    
+    return {
+        "goal": optimization.goal,
+        "feasible": optimization.feasible,
+        "objective": optimization.objective,
+        "parameters": optimization.parameters._asdict() if optimization.parameters else None,
+        "result": optimization.result._asdict() if optimization.result else None,
+        "binding_constraints": [constraint.to_dict() for constraint in optimization.binding],
+        "adjustments": optimization.adjustments,
+        "infeasible_reasons": optimization.infeasible_reasons,
+        "rules_version": calculator.rules.version,
+        "processing_time": time.time() - start_time
+    }
+
+class BatchCalculationRequest(BaseModel):
+    """Lote de terrenos en columnas: una lista por parámetro o un valor común a todos"""
+    surface_area: Union[List[float], float]
+    floors: Union[List[int], int]
+    max_height: Union[List[float], float] = 23.0
+    constructibility_coef: Union[List[float], float] = 1.0
+    occupation_percentage: Union[List[float], float] = 60.0
+    zone_type: Union[List[str], str] = "residencial"
+    min_dwelling_area: Union[List[float], float] = 40.0
+    comuna: Union[List[Optional[str]], Optional[str]] = None  # activan los límites del Plan Regulador
+    zona: Union[List[Optional[str]], Optional[str]] = None
+
+    def row_count(self) -> int:
+        """Largo común de las columnas entregadas como lista"""
+        columns = (getattr(self, name) for name in self.model_fields)
+        lengths = {len(value) for value in columns if isinstance(value, list)}
+        if len(lengths) > 1:
+            raise ValueError("Todas las columnas del lote deben tener el mismo largo")
+        return lengths.pop() if lengths else 1
+
+@router.post("/batch", response_model=Dict[str, Any])
+async def calculate_cabida_batch(request: BatchCalculationRequest):
+    """
+    Calcula la cabida de un lote de terrenos en una sola solicitud.
+    
+    Las reglas son las de ``/cabida`` evaluadas en forma vectorizada; la
+    respuesta entrega una columna por campo del resultado, en el orden de
+    los terrenos recibidos.
+    """
+    start_time = time.time()
+    
+    try:
+        count = request.row_count()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if count > settings.calculation_batch_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote excede el máximo de {settings.calculation_batch_max_rows} terrenos"
+        )
+    
+    try:
+        calculator = OGUCCalculator()
+        batch = await run_in_threadpool(
+            calculator.calculate_cabida_batch,
+            request.surface_area,
+            request.floors,
+            request.max_height,
+            request.constructibility_coef,
+            request.occupation_percentage,
+            request.zone_type,
+            request.min_dwelling_area,
+            comuna=request.comuna,
+            zona=request.zona,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en cálculo por lote: {str(e)}")
+    
+    approved = int(batch.approved.sum())
+    return {
+        "count": len(batch),
+        "approved": approved,
+        "rejected": len(batch) - approved,
+        "results": batch.to_columns(),
+        "rules_version": batch.rules_version,
+        "processing_time": time.time() - start_time
+    }
+
+class SweepRange(BaseModel):
+    """Rango de un parámetro: ``steps`` valores equiespaciados entre ``start`` y ``stop``"""
+    start: float
+    stop: float
+    steps: int = Field(..., ge=1, le=1000)
+
+class SweepRequest(BaseModel):
+    """Barrido de parámetros: cada uno es un valor fijo, una lista de valores o un rango"""
+    surface_area: float
+    zone_type: str = "residencial"
+    min_dwelling_area: float = Field(default=40.0, gt=0)
+    floors: Union[SweepRange, List[int], int]
+    constructibility_coef: Union[SweepRange, List[float], float] = 1.0
+    occupation_percentage: Union[SweepRange, List[float], float] = 60.0
+    max_height: Union[SweepRange, List[float], float] = 23.0
+    comuna: Optional[str] = None  # activan los límites del Plan Regulador
+    zona: Optional[str] = None
+
+@router.post("/sweep", response_model=Dict[str, Any])
+async def calculate_sweep(request: SweepRequest):
+    """
+    Análisis de sensibilidad: evalúa la grilla completa de combinaciones de
+    pisos, coeficiente de constructibilidad, porcentaje de ocupación y
+    altura máxima en un único cálculo vectorizado.
+    
+    Las grillas de la respuesta tienen una dimensión por parámetro barrido
+    (en el orden de ``axes``). ``boundary`` lista las combinaciones aprobadas
+    contiguas a una rechazada: dónde el proyecto pasa de APROBADO a RECHAZADO.
+    """
+    start_time = time.time()
+    
+    values = {}
+    for name in SWEEP_PARAMETERS:
+        spec = getattr(request, name)
+        if isinstance(spec, SweepRange):
+            spec = (spec.start, spec.stop, spec.steps)
+        values[name] = sweep_values(spec, integer=name == "floors")
+        if len(values[name]) == 0:
+            raise HTTPException(status_code=400, detail=f"El parámetro {name} no tiene valores")
+    
+    points = 1
+    for column in values.values():
+        points *= len(column)
+    if points > settings.calculation_batch_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"La grilla ({points} combinaciones) excede el máximo de {settings.calculation_batch_max_rows}"
+        )
+    
+    try:
+        sweep = await run_in_threadpool(
+            sweep_cabida,
+            OGUCCalculator(),
+            request.surface_area,
+            request.zone_type,
+            request.min_dwelling_area,
+            values,
+            request.comuna,
+            request.zona,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en barrido de parámetros: {str(e)}")
+    
+    approved = int(sweep.approved.sum())
+    return {
+        "axes": {name: axis.tolist() for name, axis in sweep.axes.items()},
+        "fixed": sweep.fixed,
+        "points": points,
+        "approved": approved,
+        "rejected": points - approved,
+        "compliance": sweep.approved.tolist(),
+        "surfaces": {name: surface.tolist() for name, surface in sweep.surfaces.items()},
+        "boundary": sweep.boundary(),
+        "regulation_zone": sweep.regulation_zone,
+        "rules_version": sweep.rules_version,
+        "processing_time": time.time() - start_time
+    }
 
 @router.post("/quick-calculate", response_model=Dict[str, Any])
 async def quick_calculate(
@@ -77,7 +288,9 @@ async def quick_calculate(
     zone_type: str = "residencial",
     constructibility_coef: float = 1.0,
     occupation_percentage: float = 60.0,
-    max_height: float = 23.0
+    max_height: float = 23.0,
+    comuna: Optional[str] = None,
+    zona: Optional[str] = None
 ):
     """
     Cálculo rápido sin certificado (para pruebas y demostración)
@@ -89,21 +302,154 @@ async def quick_calculate(
             max_height=max_height,
             constructibility_coef=constructibility_coef,
             occupation_percentage=occupation_percentage,
-            zone_type=zone_type
+            zone_type=zone_type,
+            comuna=comuna,
+            zona=zona
         )
         
-        calculator = OGUCCalculator()
-        result = calculator.calculate_cabida(params)
+        result = calculation_cache.calculate(params)
         
         return {
             "success": True,
-            "result": result.model_dump(),
-            "parameters": params.model_dump()
+            "result": result._asdict(),
+            "parameters": params._asdict()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en cálculo rápido: {str(e)}")
 
+@router.get("/rules")
+async def get_rules():
+    """
+    Versión y zonas de las reglas OGUC vigentes
+    """
+    rules = get_rule_set()
+    return {
+        "version": rules.version,
+        "description": rules.description,
+        "source": rules.source,
+        "loaded_at": rules.loaded_at,
+        "zones": {zone: rules.zone_restrictions(zone) for zone in rules.zones}
+    }
+
+@router.post("/rules/reload")
+async def reload_rules():
+    """
+    Recarga las reglas OGUC desde su archivo sin reiniciar el servidor
+    """
+    previous = get_rule_set().version
+    try:
+        rules = rule_registry.reload()
+    except RuleSetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"previous_version": previous, "version": rules.version, "loaded_at": rules.loaded_at}
+
+class ZoneLookupRequest(BaseModel):
+    coordinates: List[str]  # coordenadas DMS como en el certificado ("33°26'15S 70°39'02W")
+
+@router.post("/zone-lookup", response_model=Dict[str, Any])
+async def lookup_zones(request: ZoneLookupRequest):
+    """
+    Zona de zonificación y sus límites para cada coordenada (None si no
+    cae en ningún polígono o no se reconoce).
+    """
+    if len(request.coordinates) > settings.calculation_batch_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote excede el máximo de {settings.calculation_batch_max_rows} coordenadas"
+        )
+    index = get_zoning_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="No hay zonificación cargada")
+    
+    start_time = time.time()
+    zones = await run_in_threadpool(
+        lambda: [zone_for_coordinates(coordinates, index) for coordinates in request.coordinates]
+    )
+    return {
+        "zones": zones,
+        "matched": sum(zone is not None for zone in zones),
+        "processing_time": time.time() - start_time
+    }
+
+class SessionStart(CertificateReference):
+    floors: int
+    zone_type: str = "residencial"
+    min_dwelling_area: float = Field(default=40.0, gt=0)
+
+class SessionDelta(BaseModel):
+    """Parámetros modificados en una sesión what-if (los omitidos no cambian)"""
+    model_config = ConfigDict(extra="forbid")
+    surface_area: Optional[float] = None
+    floors: Optional[int] = None
+    max_height: Optional[float] = None
+    constructibility_coef: Optional[float] = None
+    occupation_percentage: Optional[float] = None
+    zone_type: Optional[str] = None
+    min_dwelling_area: Optional[float] = Field(default=None, gt=0)
+
+def _start_session(message: Dict[str, Any]) -> WhatIfSession:
+    request = SessionStart.model_validate(message)
+    certificate_data = certificate_store.resolve(request.certificate_data, request.certificate_handle)
+    if not certificate_data.superficie_terreno:
+        raise ValueError("No se pudo extraer la superficie del terreno del certificado")
+    params = certificate_parameters(certificate_data, request.floors, request.zone_type, request.min_dwelling_area)
+    return WhatIfSession(params, _session_advice)
+
+def _session_advice(result: CabidaCalculation, params: OGUCParameters) -> Dict[str, List[Any]]:
+    """Recomendaciones y advertencias de la sesión, de las mismas observaciones del cálculo"""
+    findings = cabida_advice.assess_cabida(result, params)
+    return {
+        "recommendations": cabida_advice.recommendations(findings),
+        "warnings": warnings_from_findings(findings),
+    }
+
+@router.websocket("/session")
+async def what_if_session(websocket: WebSocket):
+    """
+    Sesión what-if: el certificado y el último resultado quedan en el servidor.
+    
+    Mensajes del cliente (JSON): ``{"type": "start", "certificate_handle"
+    o "certificate_data", "floors", "zone_type", "min_dwelling_area"}`` y
+    luego ``{"type": "update", "seq": n, "delta": {"floors": 5}}``. El
+    servidor responde ``result`` (estado completo) al iniciar y ``diff``
+    (solo los campos del resultado, recomendaciones y advertencias que cambiaron) a cada
+    actualización, con ``seq`` y ``server_ms``; o ``error``.
+    """
+    await websocket.accept()
+    session: Optional[WhatIfSession] = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            started = time.perf_counter()
+            message = None
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Se esperaba un objeto JSON")
+                if message.get("type") == "start":
+                    session = await run_in_threadpool(_start_session, message)
+                    payload = {"type": "result", **session.snapshot()}
+                elif message.get("type") == "update":
+                    if session is None:
+                        raise ValueError("La sesión no se ha iniciado")
+                    delta = SessionDelta.model_validate(message.get("delta") or {})
+                    payload = {"type": "diff", **session.apply(delta.model_dump(exclude_none=True))}
+                else:
+                    raise ValueError(f"Tipo de mensaje desconocido: {message.get('type')}")
+            except (CertificateHandleError, ValueError) as e:
+                payload = {"type": "error", "detail": str(e)}
+            except Exception as e:
+                # Un error inesperado no cierra la sesión: se informa y se sigue escuchando
+                logger.exception("Error en sesión what-if")
+                payload = {"type": "error", "detail": f"Error en sesión what-if: {str(e)}"}
+            payload["seq"] = message.get("seq") if isinstance(message, dict) else None
+            payload["server_ms"] = (time.perf_counter() - started) * 1000
+            await websocket.send_json(jsonable_encoder(payload))
+    except WebSocketDisconnect:
+        pass
+
 @router.get("/zone-restrictions/{zone_type}")
 async def get_zone_restrictions(zone_type: str):
     """
@@ -115,62 +461,22 @@ async def get_zone_restrictions(zone_type: str):
         
         return {
             "zone_type": zone_type,
-            "restrictions": restrictions
+            "restrictions": restrictions,
+            "rules_version": calculator.rules.version
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo restricciones: {str(e)}")
 
-def _generate_rejection_recommendations(result: CabidaCalculation, params: OGUCParameters) -> list:
-    """Genera recomendaciones para casos de rechazo"""
-    recommendations = []
-    
-    if "Superficie del terreno" in str(result.rejection_reasons):
-        recommendations.append(
-            "Verifique que la superficie del terreno sea correcta. "
-            "El mínimo legal para vivienda en Chile es de 40m²."
-        )
+def calculation_result(
+    result: CabidaCalculation,
+    params: OGUCParameters,
+    findings: Optional[Tuple[cabida_advice.Finding, ...]] = None
+) -> CalculationResult:
+    """Resultado de ``/cabida``: el cálculo con sus recomendaciones.
     
-    if "Coeficiente de constructibilidad" in str(result.rejection_reasons):
-        recommendations.append(
-            "Revise el coeficiente de constructibilidad. "
-            "Valores típicos van desde 0.5 hasta 3.0 según la zona."
-        )
-    
-    if "Altura máxima" in str(result.rejection_reasons):
-        recommendations.append(
-            "Verifique la altura máxima permitida. "
-            "Considere reducir el número de pisos o consultar el plano regulador local."
-        )
-    
-    if "Porcentaje de ocupación" in str(result.rejection_reasons):
-        recommendations.append(
-            "Ajuste el porcentaje de ocupación de suelo según el tipo de zona. "
-            "Valores típicos: Residencial 60%, Comercial 80%."
-        )
-    
-    return recommendations
-
-def _generate_optimization_recommendations(result: CabidaCalculation, params: OGUCParameters) -> list:
-    """Genera recomendaciones de optimización para casos aprobados"""
-    recommendations = []
-    
-    if result.constructibility_utilization < 70:
-        recommendations.append(
-            f"Está utilizando solo el {result.constructibility_utilization:.1f}% del coeficiente de constructibilidad. "
-            "Podría considerar aumentar la superficie de edificación."
-        )
-    
-    if result.allowed_floors < params.floors:
-        recommendations.append(
-            f"Según la altura máxima, solo puede construir {result.allowed_floors} pisos "
-            f"en lugar de los {params.floors} solicitados."
-        )
-    
-    if result.dwelling_units_max > 1 and params.min_dwelling_area > 40:
-        recommendations.append(
-            f"Podría construir hasta {result.dwelling_units_max} unidades de vivienda. "
-            "Considere subdividir para mayor rentabilidad."
-        )
-    
-    return recommendations
+    ``findings`` son las observaciones ya obtenidas del mismo cálculo (``/evaluate``).
+    """
+    if findings is None:
+        findings = cabida_advice.assess_cabida(result, params)
+    return CalculationResult(**result._asdict(), recommendations=cabida_advice.recommendations(findings))
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any
+import time
+
+from app.api.calculate import calculation_result
+from app.api.reports import report_preview
+from app.api.validate import ValidationResult, certificate_parameters, validation_result
+from app.core import cabida_advice
+from app.core.calculation_cache import calculation_cache
+from app.core.certificate_store import CertificateHandleError, certificate_store
+from app.models.certificate import CalculationResult, CertificateReference
+
+router = APIRouter()
+
+class EvaluationRequest(CertificateReference):
+    floors: int
+    zone_type: str
+    min_dwelling_area: float = 40.0
+
+class EvaluationResult(BaseModel):
+    calculation: CalculationResult
+    validation: ValidationResult
+    preview: Dict[str, Any]
+    processing_time: float
+
+@router.post("", response_model=EvaluationResult)
+async def evaluate(request: EvaluationRequest):
+    """
+    Evaluación completa para la pantalla de resultados en una sola solicitud.
+    
+    El cálculo de cabida y sus observaciones se obtienen una vez y de ellos
+    se derivan el resultado de ``/calculate/cabida``, la validación de
+    ``/validate/compliance`` y la vista previa de ``/reports/preview-report``.
+    """
+    start_time = time.time()
+    
+    try:
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
+        )
+        
+        if not certificate_data.superficie_terreno:
+            raise HTTPException(
+                status_code=400, 
+                detail="No se pudo extraer la superficie del terreno del certificado"
+            )
+        
+        params = certificate_parameters(certificate_data, request.floors, request.zone_type, request.min_dwelling_area)
+        result = calculation_cache.calculate(params)
+        
+        # Observaciones comunes a las recomendaciones del cálculo y a la validación
+        findings = cabida_advice.assess_cabida(result, params)
+        calculation = calculation_result(result, params, findings)
+        parameters = request.model_dump(include={"floors", "zone_type", "min_dwelling_area"})
+        
+        return EvaluationResult(
+            calculation=calculation,
+            validation=validation_result(certificate_data, params, result, findings),
+            preview=report_preview(certificate_data, calculation, parameters),
+            processing_time=time.time() - start_time
+        )
+    except HTTPException:
+        raise
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error en evaluación: {str(e)}")
@@ -0,0 +1,108 @@
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+from starlette.concurrency import run_in_threadpool
+import os
+
+from app.api.upload import certificate_summary
+from app.core.certificate_store import certificate_store
+from app.core.config import settings
+from app.core.extraction_cache import cache_key_for_digest, extraction_cache
+from app.core.job_queue import SUCCEEDED, Job, get_job_queue, job_files_dir
+from app.core.uploads import UploadTooLargeError, spool_upload
+from app.core.zoning_index import assign_zone
+from app.models.certificate import CertificateData
+
+router = APIRouter()
+
+@router.post("/certificate", status_code=202)
+async def submit_certificate_job(
+    file: UploadFile = File(...),
+    include_raw_text: bool = Form(default=False)
+):
+    """
+    Encola el procesamiento de un Certificado de Informaciones Previas.
+
+    Responde de inmediato con el id del trabajo; el estado y el resultado
+    se consultan en ``GET /api/v1/jobs/{job_id}``.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No se proporcionó ningún archivo")
+
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    if file_extension not in settings.allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de archivo no permitido. Extensiones permitidas: {settings.allowed_extensions}"
+        )
+
+    # El archivo debe sobrevivir a la solicitud: se guarda en la carpeta de trabajos
+    try:
+        spooled = await spool_upload(file, settings.max_file_size, directory=job_files_dir())
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    queue = get_job_queue()
+    cached = extraction_cache.get(cache_key_for_digest(spooled.sha256, file.filename, include_raw_text))
+    try:
+        if cached is not None:
+            # Ya extraído: el trabajo nace terminado
+            spooled.cleanup()
+            job = await run_in_threadpool(
+                queue.submit_result, file.filename, spooled.sha256, cached.model_dump_json(), include_raw_text
+            )
+        else:
+            job = await run_in_threadpool(queue.submit, spooled.path, file.filename, spooled.sha256, include_raw_text)
+    except Exception as e:
+        spooled.cleanup()
+        raise HTTPException(status_code=500, detail=f"Error encolando el archivo: {str(e)}")
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/v1/jobs/{job.id}"
+    }
+
+@router.get("/{job_id}")
+async def get_certificate_job(job_id: str):
+    """
+    Estado de un trabajo de procesamiento y, al terminar, los datos del certificado
+    """
+    queue = get_job_queue()
+    job = await run_in_threadpool(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    response = {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "processing_time": job.finished_at - job.created_at if job.finished else None
+    }
+
+    if job.status == SUCCEEDED:
+        certificate_data = assign_zone(CertificateData.model_validate_json(job.result))
+        response["certificate_data"] = certificate_summary(certificate_data, job.include_raw_text)
+        response["certificate_handle"] = await _certificate_handle(job, certificate_data)
+
+    return response
+
+@router.get("")
+async def get_job_queue_stats():
+    """
+    Trabajos en la cola por estado
+    """
+    return await run_in_threadpool(get_job_queue().stats)
+
+async def _certificate_handle(job: Job, certificate_data: CertificateData) -> str:
+    """Handle del certificado del trabajo; se recrea si expiró o el servidor se reinició"""
+    if job.certificate_handle and await run_in_threadpool(certificate_store.get, job.certificate_handle) is not None:
+        return job.certificate_handle
+
+    handle = await run_in_threadpool(certificate_store.put, certificate_data)
+    await run_in_threadpool(get_job_queue().set_certificate_handle, job.id, handle)
+    return handle
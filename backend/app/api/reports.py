@@ -1,16 +1,17 @@
 from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 import io
 from typing import Dict, Any, List
 
-from app.core.report_generator import ReportGenerator
-from app.models.certificate import CertificateData, CalculationResult
+from app.core.certificate_store import CertificateHandleError, certificate_store
+from app.core.report_generator import render_cabida_report_job, render_summary_report_job, report_pool
+from app.models.certificate import CalculationResult, CertificateData, CertificateReference
 
 router = APIRouter()
 
-class ReportRequest(BaseModel):
-    certificate_data: CertificateData
+class ReportRequest(CertificateReference):
     calculation_result: CalculationResult
     parameters: Dict[str, Any]
 
@@ -24,13 +25,15 @@ async def generate_cabida_report(request: ReportRequest):
     Genera reporte PDF completo del cálculo de cabidas
     """
     try:
-        report_generator = ReportGenerator()
-        
-        # Generar PDF
-        pdf_content = report_generator.generate_cabida_report(
-            certificate_data=request.certificate_data.model_dump(),
-            calculation_result=request.calculation_result.model_dump(),
-            parameters=request.parameters
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
+        )
+        # Generar PDF en el pool de informes (ReportLab no bloquea el event loop)
+        pdf_content = await report_pool.run(
+            render_cabida_report_job,
+            certificate_data.model_dump(),
+            request.calculation_result.model_dump(),
+            request.parameters
         )
         
         # Retornar PDF como streaming response
@@ -42,6 +45,8 @@ async def generate_cabida_report(request: ReportRequest):
             }
         )
         
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando reporte PDF: {str(e)}")
 
@@ -51,8 +56,6 @@ async def generate_summary_report(request: SummaryReportRequest):
     Genera reporte resumen de múltiples cálculos
     """
     try:
-        report_generator = ReportGenerator()
-        
         # Preparar datos para el resumen
         calculations_with_names = []
         for i, calc in enumerate(request.calculations):
@@ -64,7 +67,7 @@ async def generate_summary_report(request: SummaryReportRequest):
             calculations_with_names.append(calc_data)
         
         # Generar PDF resumen
-        pdf_content = report_generator.generate_summary_report(calculations_with_names)
+        pdf_content = await report_pool.run(render_summary_report_job, calculations_with_names)
         
         return StreamingResponse(
             io.BytesIO(pdf_content),
@@ -117,25 +120,11 @@ async def preview_report_data(request: ReportRequest):
     Retorna vista previa de los datos que irán en el reporte (sin generar PDF)
     """
     try:
-        # Preparar datos de vista previa
-        preview_data = {
-            "certificate_info": {
-                "rol": request.certificate_data.rol,
-                "direccion": request.certificate_data.direccion,
-                "comuna": request.certificate_data.comuna,
-                "superficie_terreno": request.certificate_data.superficie_terreno
-            },
-            "calculation_summary": {
-                "compliance_status": request.calculation_result.compliance_status,
-                "max_building_surface": request.calculation_result.max_building_surface,
-                "dwelling_units_max": request.calculation_result.dwelling_units_max,
-                "allowed_floors": request.calculation_result.allowed_floors
-            },
-            "parameters": request.parameters,
-            "rejection_reasons": request.calculation_result.rejection_reasons,
-            "recommendations": request.calculation_result.recommendations,
-            "estimated_pages": 2 if request.calculation_result.rejection_reasons else 1
-        }
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
+        )
+        
+        preview_data = report_preview(certificate_data, request.calculation_result, request.parameters)
         
         return {
             "success": True,
@@ -143,5 +132,32 @@ async def preview_report_data(request: ReportRequest):
             "report_ready": True
         }
         
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando vista previa: {str(e)}")
+
+def report_preview(
+    certificate_data: CertificateData,
+    calculation_result: CalculationResult,
+    parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Datos de vista previa del informe de cabida"""
+    return {
+        "certificate_info": {
+            "rol": certificate_data.rol,
+            "direccion": certificate_data.direccion,
+            "comuna": certificate_data.comuna,
+            "superficie_terreno": certificate_data.superficie_terreno
+        },
+        "calculation_summary": {
+            "compliance_status": calculation_result.compliance_status,
+            "max_building_surface": calculation_result.max_building_surface,
+            "dwelling_units_max": calculation_result.dwelling_units_max,
+            "allowed_floors": calculation_result.allowed_floors
+        },
+        "parameters": parameters,
+        "rejection_reasons": calculation_result.rejection_reasons,
+        "recommendations": calculation_result.recommendations,
+        "estimated_pages": 2 if calculation_result.rejection_reasons else 1
+    }
@@ -1,23 +1,77 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import queue
 import time
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 import os
 
-from app.core.pdf_processor import PDFProcessor, CertificateData
+from app.core.batch_upload import process_batch, spool_batch
+from app.core.certificate_store import certificate_store
+from app.core.pdf_processor import CertificateData, process_file_job, stream_file_job, validate_file_job
 from app.core.config import settings
+from app.core.extraction_cache import cache_key_for_digest, extraction_cache
+from app.core.uploads import SpooledUpload, UploadTooLargeError, spool_upload
+from app.core.worker_pool import extraction_pool
+from app.core.zoning_index import assign_zone
+from app.models import certificate as certificate_models
 
 router = APIRouter()
 
+
+async def extract_certificate(spooled: SpooledUpload, include_raw_text: bool = False) -> CertificateData:
+    """Extrae un certificado ya volcado a disco, reutilizando extracciones previas del mismo archivo.
+    
+    La zona según las coordenadas se asigna después del cache, con la
+    zonificación vigente.
+    """
+    cache_key = cache_key_for_digest(spooled.sha256, spooled.filename, include_raw_text)
+    certificate_data = extraction_cache.get(cache_key)
+    
+    if certificate_data is None:
+        # Procesar archivo en el pool de extracción (no bloquea el event loop);
+        # el worker abre el archivo por ruta, sin copiar los bytes entre procesos
+        certificate_data = await extraction_pool.run(
+            process_file_job, spooled.path, spooled.filename, include_raw_text
+        )
+        extraction_cache.put(cache_key, certificate_data)
+    
+    return assign_zone(certificate_data)
+
+
+async def store_certificate(certificate_data: CertificateData) -> str:
+    """Guarda el certificado en el servidor: los pasos siguientes lo referencian por handle"""
+    return await run_in_threadpool(
+        certificate_store.put,
+        certificate_models.CertificateData.model_construct(**certificate_data.model_dump()),
+    )
+
+def certificate_summary(certificate_data: CertificateData, include_raw_text: bool = False) -> dict:
+    """Campos extraídos para mostrar al usuario junto al handle.
+    
+    El certificado completo queda en el servidor: se omiten los campos no
+    encontrados, ``additional_data`` y, salvo que se pida, ``raw_text``.
+    """
+    exclude = {"additional_data"} if include_raw_text else {"additional_data", "raw_text"}
+    return certificate_data.model_dump(exclude_none=True, exclude=exclude)
+
 @router.post("/certificate", response_model=dict)
 async def upload_certificate(
     file: UploadFile = File(...),
     floors: int = Form(...),
     zone_type: str = Form(...),
-    min_dwelling_area: float = Form(default=40.0)
+    min_dwelling_area: float = Form(default=40.0),
+    include_raw_text: bool = Form(default=False)
 ):
     """
-    Sube y procesa un Certificado de Informaciones Previas
+    Sube y procesa un Certificado de Informaciones Previas.
+    
+    El texto completo del documento (``raw_text``) solo se extrae y retorna
+    si se pide con ``include_raw_text``. El ``certificate_handle`` retornado
+    reemplaza a ``certificate_data`` en cálculo, validación y reportes; la
+    respuesta solo incluye los campos encontrados (``certificate_summary``).
     """
     start_time = time.time()
     
@@ -33,24 +87,26 @@ async def upload_certificate(
                 detail=f"Formato de archivo no permitido. Extensiones permitidas: {settings.allowed_extensions}"
             )
         
-        # Validar tamaño
-        file_content = await file.read()
-        if len(file_content) > settings.max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Archivo demasiado grande. Tamaño máximo: {settings.max_file_size / (1024*1024):.1f}MB"
-            )
+        # Volcar a disco por bloques validando el tamaño de forma incremental
+        try:
+            spooled = await spool_upload(file, settings.max_file_size)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        try:
+            certificate_data = await extract_certificate(spooled, include_raw_text)
+        finally:
+            spooled.cleanup()
         
-        # Procesar archivo
-        processor = PDFProcessor()
-        certificate_data = processor.process_file(file_content, file.filename)
+        certificate_handle = await store_certificate(certificate_data)
         
         processing_time = time.time() - start_time
         
         return {
             "success": True,
             "message": "Certificado procesado exitosamente",
-            "certificate_data": certificate_data.model_dump(),
+            "certificate_handle": certificate_handle,
+            "certificate_data": certificate_summary(certificate_data, include_raw_text),
             "processing_time": processing_time,
             "parameters": {
                 "floors": floors,
@@ -65,6 +121,127 @@ async def upload_certificate(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error procesando el archivo: {str(e)}")
 
+@router.post("/certificate/stream")
+async def upload_certificate_stream(file: UploadFile = File(...)):
+    """
+    Sube y procesa un Certificado de Informaciones Previas informando el avance por SSE.
+    
+    Eventos (``text/event-stream``): ``received`` (archivo recibido),
+    ``page`` (cada página leída u obtenida por OCR), ``fields`` (campos
+    encontrados en esa página), ``certificate`` (datos finales y
+    ``certificate_handle``) o ``error``.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No se proporcionó ningún archivo")
+    
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    if file_extension not in settings.allowed_extensions:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Formato de archivo no permitido. Extensiones permitidas: {settings.allowed_extensions}"
+        )
+    
+    try:
+        spooled = await spool_upload(file, settings.max_file_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        _progress_events(spooled),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Segundos de espera por evento antes de revisar si la tarea terminó
+_PROGRESS_POLL_INTERVAL = 0.5
+
+def _next_progress(progress, timeout: float):
+    try:
+        return progress.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+def _cleanup_when_done(job: asyncio.Future, spooled: SpooledUpload) -> None:
+    """Borra el archivo cuando el worker termina de usarlo (el cliente ya no espera el resultado)"""
+    def cleanup(finished: asyncio.Future) -> None:
+        spooled.cleanup()
+        if not finished.cancelled():
+            finished.exception()  # el error ya no se informa a nadie
+    job.add_done_callback(cleanup)
+
+async def _progress_events(spooled: SpooledUpload) -> AsyncIterator[str]:
+    """Eventos SSE de la extracción de un certificado ya volcado a disco.
+    
+    La extracción corre en el pool de extracción, como ``/certificate``;
+    el worker envía el avance de cada página por una cola de progreso y
+    aquí se reenvía a medida que llega.
+    """
+    start_time = time.time()
+    yield _sse("received", {"filename": spooled.filename, "size": spooled.size})
+    
+    cache_key = cache_key_for_digest(spooled.sha256, spooled.filename)
+    job = None
+    try:
+        certificate_data = extraction_cache.get(cache_key)
+        if certificate_data is None:
+            progress = extraction_pool.progress_queue()
+            job = asyncio.ensure_future(
+                extraction_pool.run(stream_file_job, spooled.path, spooled.filename, progress)
+            )
+            while True:
+                item = await run_in_threadpool(_next_progress, progress, _PROGRESS_POLL_INTERVAL)
+                if item is None:
+                    # Sin eventos: seguir esperando salvo que el worker haya terminado (o muerto)
+                    if job.done():
+                        break
+                    continue
+                event, payload = item
+                if event == "done":
+                    break
+                yield _sse(event, payload)
+            certificate_data = await job
+            extraction_cache.put(cache_key, certificate_data)
+        else:
+            yield _sse("fields", certificate_data.model_dump(exclude_none=True, exclude={"raw_text"}))
+        
+        certificate_data = assign_zone(certificate_data)
+        yield _sse("certificate", {
+            "certificate_data": certificate_summary(certificate_data),
+            "certificate_handle": await store_certificate(certificate_data),
+            "processing_time": time.time() - start_time
+        })
+    except ValueError as e:
+        yield _sse("error", {"detail": str(e)})
+    except Exception as e:
+        yield _sse("error", {"detail": f"Error procesando el archivo: {str(e)}"})
+    finally:
+        if job is not None and not job.done():
+            _cleanup_when_done(job, spooled)
+        else:
+            spooled.cleanup()
+
+@router.post("/batch")
+async def upload_certificate_batch(files: List[UploadFile] = File(...)):
+    """
+    Procesa un lote de Certificados de Informaciones Previas (varios archivos o un ZIP).
+    
+    Responde en NDJSON: una línea por certificado a medida que termina, con
+    sus datos, el error si lo hubo y el tiempo de proceso, y una línea final
+    de resumen. Un archivo inválido no detiene el lote.
+    """
+    try:
+        items = await spool_batch(files)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        process_batch(items, extract_certificate, settings.batch_concurrency),
+        media_type="application/x-ndjson"
+    )
+
 @router.post("/validate-format", response_model=dict)
 async def validate_certificate_format(file: UploadFile = File(...)):
     """
@@ -74,34 +251,30 @@ async def validate_certificate_format(file: UploadFile = File(...)):
         if not file.filename:
             raise HTTPException(status_code=400, detail="No se proporcionó ningún archivo")
         
-        file_content = await file.read()
-        
-        processor = PDFProcessor()
-        
-        # Determinar tipo de archivo y extraer texto
-        if file.filename.lower().endswith('.pdf'):
-            text = processor.extract_text_from_pdf(file_content)
-        elif file.filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-            text = processor.extract_text_from_image(file_content)
-        else:
+        if not file.filename.lower().endswith(('.pdf', '.jpg', '.jpeg', '.png')):
             return {
                 "valid": False,
                 "message": "Formato de archivo no soportado",
                 "supported_formats": settings.allowed_extensions
             }
         
-        # Validar formato
-        is_valid = processor.validate_certificate_format(text)
+        spooled = await spool_upload(file, settings.max_file_size)
         
-        # Extraer datos básicos para preview
-        preview_data = {}
-        if is_valid:
-            preview_data = processor.extract_certificate_data(text).model_dump()
+        try:
+            # Un certificado ya extraído es válido por construcción
+            preview = extraction_cache.get(cache_key_for_digest(spooled.sha256, file.filename))
+            is_valid = preview is not None
+            
+            if not is_valid:
+                # Extraer texto, validar formato y generar preview fuera del event loop
+                is_valid, preview = await extraction_pool.run(validate_file_job, spooled.path, file.filename)
+        finally:
+            spooled.cleanup()
         
         return {
             "valid": is_valid,
             "message": "Formato válido" if is_valid else "No parece ser un Certificado de Informaciones Previas",
-            "preview_data": preview_data if is_valid else None
+            "preview_data": preview.model_dump() if is_valid else None
         }
         
     except Exception as e:
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from starlette.concurrency import run_in_threadpool
+import json
 import time
+from typing import AsyncIterator, IO, List, Dict, Any, Optional, Tuple
 
-from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
-from app.models.certificate import CertificateData, ValidationError
+from app.core import cabida_advice
+from app.core.calculation_cache import calculation_cache
+from app.core.certificate_store import CertificateHandleError, certificate_store
+from app.core.config import settings
+from app.core.oguc_calculator import CabidaCalculation, OGUCParameters
+from app.core.portfolio_stats import PortfolioStats
+from app.core.uploads import SpooledUpload, UploadTooLargeError, spool_upload
+from app.models.certificate import CertificateData, CertificateReference, ValidationError
 
 router = APIRouter()
 
-class ValidationRequest(BaseModel):
-    certificate_data: CertificateData
+class ValidationRequest(CertificateReference):
     floors: int
     zone_type: str
     min_dwelling_area: float = 40.0
 
+class PortfolioLot(ValidationRequest):
+    lot_id: Optional[str] = None  # referencia del cliente, se devuelve en su línea
+
 class ValidationResult(BaseModel):
     is_valid: bool
     validation_score: float  # 0-100
@@ -26,85 +37,100 @@ class ValidationResult(BaseModel):
 async def validate_compliance(request: ValidationRequest):
     """
     Valida el cumplimiento normativo completo según OGUC
+    (certificado en línea o referenciado por ``certificate_handle``)
     """
-    start_time = time.time()
-    
     try:
-        errors = []
-        warnings = []
-        recommendations = []
-        
-        # Validaciones básicas de datos del certificado
-        errors.extend(_validate_certificate_data(request.certificate_data))
-        
-        # Si hay errores críticos, retornar temprano
-        critical_errors = [e for e in errors if e.severity == "error"]
-        if critical_errors:
-            return ValidationResult(
-                is_valid=False,
-                validation_score=0,
-                errors=errors,
-                warnings=warnings,
-                recommendations=["Corrija los errores críticos antes de continuar"],
-                compliance_summary={"status": "RECHAZADO", "critical_errors": len(critical_errors)}
-            )
-        
-        # Crear parámetros para validación
-        params = OGUCParameters(
-            surface_area=request.certificate_data.superficie_terreno or 0,
-            floors=request.floors,
-            max_height=request.certificate_data.altura_maxima or 23.0,
-            constructibility_coef=request.certificate_data.coeficiente_constructibilidad or 1.0,
-            occupation_percentage=request.certificate_data.porcentaje_ocupacion or 60.0,
-            zone_type=request.zone_type,
-            min_dwelling_area=request.min_dwelling_area
+        certificate_data = await run_in_threadpool(
+            certificate_store.resolve, request.certificate_data, request.certificate_handle
         )
+        params = certificate_parameters(certificate_data, request.floors, request.zone_type, request.min_dwelling_area)
         
-        # Validaciones OGUC
-        calculator = OGUCCalculator()
-        result = calculator.calculate_cabida(params)
-        
-        # Procesar resultados del cálculo
-        if result.compliance_status == "RECHAZADO":
-            for reason in result.rejection_reasons:
-                errors.append(ValidationError(
-                    field="compliance",
-                    message=reason,
-                    severity="error"
-                ))
-        
-        # Generar advertencias y recomendaciones
-        warnings.extend(_generate_warnings(result, params))
-        recommendations.extend(_generate_validation_recommendations(result, params))
-        
-        # Calcular score de validación
-        validation_score = _calculate_validation_score(errors, warnings, result)
-        
-        # Resumen de cumplimiento
-        compliance_summary = {
-            "status": result.compliance_status,
-            "validation_score": validation_score,
-            "total_errors": len(errors),
-            "total_warnings": len(warnings),
-            "max_building_surface": result.max_building_surface,
-            "dwelling_units_max": result.dwelling_units_max,
-            "constructibility_utilization": result.constructibility_utilization
-        }
-        
-        processing_time = time.time() - start_time
-        
-        return ValidationResult(
-            is_valid=len([e for e in errors if e.severity == "error"]) == 0,
-            validation_score=validation_score,
-            errors=errors,
-            warnings=warnings,
-            recommendations=recommendations,
-            compliance_summary=compliance_summary
-        )
+        return validation_result(certificate_data, params)
         
+    except CertificateHandleError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en validación: {str(e)}")
 
+@router.post("/portfolio")
+async def validate_portfolio(file: UploadFile = File(...)):
+    """
+    Valida una cartera de terrenos en una sola solicitud.
+    
+    El archivo es NDJSON: una línea por lote con el cuerpo de
+    ``/compliance`` (certificado o ``certificate_handle`` y parámetros) y un
+    ``lot_id`` opcional. La respuesta también es NDJSON: una línea
+    ``result`` por lote a medida que se valida, una línea ``stats`` con las
+    estadísticas acumuladas cada ``portfolio_stats_interval`` lotes y una
+    línea ``summary`` final. Una línea inválida no detiene la cartera.
+    """
+    try:
+        spooled = await spool_upload(file, settings.portfolio_max_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(_portfolio_lines(spooled), media_type="application/x-ndjson")
+
+async def _portfolio_lines(spooled: SpooledUpload) -> AsyncIterator[str]:
+    """Valida la cartera por tramos leídos del archivo: la memoria no depende de su tamaño"""
+    start_time = time.time()
+    stats = PortfolioStats(settings.portfolio_top_reasons, settings.portfolio_reason_capacity)
+    interval = settings.portfolio_stats_interval
+    index = 0
+    try:
+        with open(spooled.path, encoding="utf-8", errors="replace") as lots:
+            while True:
+                results = await run_in_threadpool(_validate_lots, lots, index, settings.portfolio_chunk_size)
+                if not results:
+                    break
+                index += len(results)
+                for result in results:
+                    validation = result["validation"]
+                    if validation is None:
+                        stats.add_failure()
+                    else:
+                        stats.add(
+                            validation["is_valid"],
+                            validation["validation_score"],
+                            [error["message"] for error in validation["errors"] if error["severity"] == "error"]
+                        )
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+                    if interval > 0 and stats.total % interval == 0:
+                        yield json.dumps({"type": "stats", **stats.snapshot()}, ensure_ascii=False) + "\n"
+        
+        yield json.dumps({
+            "type": "summary",
+            **stats.snapshot(),
+            "processing_time": time.time() - start_time
+        }, ensure_ascii=False) + "\n"
+    finally:
+        spooled.cleanup()
+
+def _validate_lots(lots: IO[str], start_index: int, count: int) -> List[Dict[str, Any]]:
+    """Lee y valida hasta ``count`` lotes (las líneas vacías se omiten)"""
+    results = []
+    for line in lots:
+        if not line.strip():
+            continue
+        results.append(_validate_lot(start_index + len(results), line))
+        if len(results) >= count:
+            break
+    return results
+
+def _validate_lot(index: int, line: str) -> Dict[str, Any]:
+    result = {"type": "result", "index": index, "lot_id": None}
+    try:
+        lot = PortfolioLot.model_validate_json(line)
+        result["lot_id"] = lot.lot_id
+        certificate_data = certificate_store.resolve(lot.certificate_data, lot.certificate_handle)
+        params = certificate_parameters(certificate_data, lot.floors, lot.zone_type, lot.min_dwelling_area)
+        validation = validation_result(certificate_data, params)
+    except (ValueError, CertificateHandleError) as e:
+        return {**result, "success": False, "validation": None, "error": str(e)}
+    except Exception as e:
+        return {**result, "success": False, "validation": None, "error": f"Error validando el lote: {str(e)}"}
+    return {**result, "success": True, "validation": validation.model_dump(), "error": None}
+
 @router.post("/quick-validate", response_model=Dict[str, Any])
 async def quick_validate(
     surface_area: float,
@@ -112,7 +138,9 @@ async def quick_validate(
     zone_type: str = "residencial",
     constructibility_coef: float = 1.0,
     occupation_percentage: float = 60.0,
-    max_height: float = 23.0
+    max_height: float = 23.0,
+    comuna: Optional[str] = None,
+    zona: Optional[str] = None
 ):
     """
     Validación rápida sin certificado
@@ -124,16 +152,18 @@ async def quick_validate(
             max_height=max_height,
             constructibility_coef=constructibility_coef,
             occupation_percentage=occupation_percentage,
-            zone_type=zone_type
+            zone_type=zone_type,
+            comuna=comuna,
+            zona=zona
         )
         
-        calculator = OGUCCalculator()
-        result = calculator.calculate_cabida(params)
+        result = calculation_cache.calculate(params)
         
         return {
             "is_valid": result.compliance_status == "APROBADO",
             "status": result.compliance_status,
-            "rejection_reasons": result.rejection_reasons,
+            "rejection_reasons": list(result.rejection_reasons),
+            "regulation_zone": result.regulation_zone,
             "validation_score": 100 if result.compliance_status == "APROBADO" else 0,
             "summary": {
                 "max_building_surface": result.max_building_surface,
@@ -145,6 +175,101 @@ async def quick_validate(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en validación rápida: {str(e)}")
 
+def certificate_parameters(
+    certificate_data: CertificateData,
+    floors: int,
+    zone_type: str,
+    min_dwelling_area: float = 40.0
+) -> OGUCParameters:
+    """Parámetros OGUC de un certificado, con valores por defecto para los datos no extraídos"""
+    return OGUCParameters(
+        surface_area=certificate_data.superficie_terreno or 0,
+        floors=floors,
+        max_height=certificate_data.altura_maxima or 23.0,
+        constructibility_coef=certificate_data.coeficiente_constructibilidad or 1.0,
+        occupation_percentage=certificate_data.porcentaje_ocupacion or 60.0,
+        zone_type=zone_type,
+        min_dwelling_area=min_dwelling_area,
+        comuna=certificate_data.comuna,
+        zona=certificate_data.zona
+    )
+
+def validation_result(
+    certificate_data: CertificateData,
+    params: OGUCParameters,
+    result: Optional[CabidaCalculation] = None,
+    findings: Optional[Tuple[cabida_advice.Finding, ...]] = None
+) -> ValidationResult:
+    """Validación normativa completa del certificado con ``params``.
+    
+    ``result`` es el cálculo ya realizado con ``params`` (p. ej. por
+    ``/evaluate``) y ``findings`` sus observaciones; si no se entregan se
+    obtienen del cache de cálculos, y solo cuando el certificado no tiene
+    errores críticos.
+    """
+    errors = []
+    warnings = []
+    recommendations = []
+    
+    # Validaciones básicas de datos del certificado
+    errors.extend(_validate_certificate_data(certificate_data))
+    
+    # Si hay errores críticos, retornar temprano
+    critical_errors = [e for e in errors if e.severity == "error"]
+    if critical_errors:
+        return ValidationResult(
+            is_valid=False,
+            validation_score=0,
+            errors=errors,
+            warnings=warnings,
+            recommendations=["Corrija los errores críticos antes de continuar"],
+            compliance_summary={"status": "RECHAZADO", "critical_errors": len(critical_errors)}
+        )
+    
+    # Validaciones OGUC (reutiliza el cálculo de /calculate con los mismos parámetros)
+    if result is None:
+        result = calculation_cache.calculate(params)
+    
+    # Procesar resultados del cálculo
+    if result.compliance_status == "RECHAZADO":
+        for reason in result.rejection_reasons:
+            errors.append(ValidationError(
+                field="compliance",
+                message=reason,
+                severity="error"
+            ))
+    
+    # Generar advertencias y recomendaciones
+    if findings is None:
+        findings = cabida_advice.assess_cabida(result, params)
+    warnings.extend(warnings_from_findings(findings))
+    recommendations.extend(_generate_validation_recommendations(result, findings))
+    
+    # Calcular score de validación
+    validation_score = _calculate_validation_score(errors, warnings, result)
+    
+    # Resumen de cumplimiento
+    compliance_summary = {
+        "status": result.compliance_status,
+        "validation_score": validation_score,
+        "total_errors": len(errors),
+        "total_warnings": len(warnings),
+        "max_building_surface": result.max_building_surface,
+        "dwelling_units_max": result.dwelling_units_max,
+        "constructibility_utilization": result.constructibility_utilization,
+        "rules_version": result.rules_version,
+        "regulation_zone": result.regulation_zone
+    }
+    
+    return ValidationResult(
+        is_valid=len([e for e in errors if e.severity == "error"]) == 0,
+        validation_score=validation_score,
+        errors=errors,
+        warnings=warnings,
+        recommendations=recommendations,
+        compliance_summary=compliance_summary
+    )
+
 def _validate_certificate_data(certificate_data: CertificateData) -> List[ValidationError]:
     """Valida datos básicos del certificado"""
     errors = []
@@ -178,50 +303,31 @@ def _validate_certificate_data(certificate_data: CertificateData) -> List[Valida
     
     return errors
 
-def _generate_warnings(result, params: OGUCParameters) -> List[ValidationError]:
+def generate_warnings(result: CabidaCalculation, params: OGUCParameters) -> List[ValidationError]:
     """Genera advertencias basadas en el resultado"""
-    warnings = []
-    
-    if result.constructibility_utilization < 50:
-        warnings.append(ValidationError(
-            field="optimization",
-            message=f"Baja utilización del coeficiente de constructibilidad ({result.constructibility_utilization:.1f}%)",
-            severity="warning"
-        ))
-    
-    if result.allowed_floors < params.floors:
-        warnings.append(ValidationError(
-            field="height",
-            message=f"Altura máxima permite solo {result.allowed_floors} pisos ({params.floors} solicitados)",
-            severity="warning"
-        ))
-    
-    if not params.constructibility_coef or params.constructibility_coef == 1.0:
-        warnings.append(ValidationError(
-            field="constructibility",
-            message="Usando coeficiente de constructibilidad por defecto (1.0)",
-            severity="info"
-        ))
-    
-    return warnings
+    return warnings_from_findings(cabida_advice.assess_cabida(result, params))
 
-def _generate_validation_recommendations(result, params: OGUCParameters) -> List[str]:
-    """Genera recomendaciones basadas en la validación"""
-    recommendations = []
-    
+def warnings_from_findings(findings: Tuple[cabida_advice.Finding, ...]) -> List[ValidationError]:
+    return [
+        ValidationError(field=finding.field, message=finding.message, severity=finding.severity)
+        for finding in cabida_advice.warnings(findings)
+    ]
+
+def _generate_validation_recommendations(result: CabidaCalculation, findings: Tuple[cabida_advice.Finding, ...]) -> List[str]:
+    """Genera recomendaciones basadas en la validación: resumen del estado y las del cálculo"""
     if result.compliance_status == "APROBADO":
-        recommendations.append("✅ El proyecto cumple con las normativas OGUC básicas")
-        recommendations.append(f"📊 Cabida máxima permitida: {result.max_building_surface:.1f}m²")
-        recommendations.append(f"🏠 Unidades de vivienda máximas: {result.dwelling_units_max}")
-        
-        if result.constructibility_utilization < 70:
-            recommendations.append("💡 Considere optimizar el uso del coeficiente de constructibilidad")
+        summary = [
+            "✅ El proyecto cumple con las normativas OGUC básicas",
+            f"📊 Cabida máxima permitida: {result.max_building_surface:.1f}m²",
+            f"🏠 Unidades de vivienda máximas: {result.dwelling_units_max}",
+        ]
     else:
-        recommendations.append("❌ El proyecto no cumple con las normativas OGUC")
-        recommendations.append("📋 Revise los motivos de rechazo indicados")
-        recommendations.append("🔄 Realice los ajustes necesarios y vuelva a validar")
-    
-    return recommendations
+        summary = [
+            "❌ El proyecto no cumple con las normativas OGUC",
+            "📋 Revise los motivos de rechazo indicados",
+            "🔄 Realice los ajustes necesarios y vuelva a validar",
+        ]
+    return summary + cabida_advice.recommendations(findings)
 
 def _calculate_validation_score(errors: List[ValidationError], warnings: List[ValidationError], result) -> float:
     """Calcula un score de validación de 0-100"""
@@ -235,9 +341,9 @@ def _calculate_validation_score(errors: List[ValidationError], warnings: List[Va
     base_score -= warning_penalty
     
     # Restar puntos por baja utilización
-    if result.constructibility_utilization < 50:
+    if result.constructibility_utilization < cabida_advice.VERY_LOW_UTILIZATION:
         base_score -= 20
-    elif result.constructibility_utilization < 70:
+    elif result.constructibility_utilization < cabida_advice.LOW_UTILIZATION:
         base_score -= 10
     
     return max(0, base_score)
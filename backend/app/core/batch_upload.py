@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.pdf_processor import CertificateData
+from app.core.uploads import SpooledUpload, UploadTooLargeError, spool_upload, too_large_message
+
+ZIP_EXTENSION = ".zip"
+
+# Extrae un certificado de un archivo ya volcado a disco
+Extractor = Callable[[SpooledUpload], Awaitable[CertificateData]]
+
+
+@dataclass
+class BatchItem:
+    """Un archivo del lote: volcado a disco o con un error previo al procesamiento"""
+    filename: str
+    upload: Optional[SpooledUpload] = None
+    error: Optional[str] = None
+
+
+def is_zip(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() == ZIP_EXTENSION
+
+
+def _extension_error(filename: str) -> Optional[str]:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in settings.allowed_extensions:
+        return f"Formato de archivo no permitido. Extensiones permitidas: {settings.allowed_extensions}"
+    return None
+
+
+async def spool_batch(files: List[UploadFile]) -> List[BatchItem]:
+    """Vuelca a disco los archivos del lote; un ZIP único se expande a sus certificados.
+
+    Los archivos inválidos (extensión o tamaño) quedan como ítems con error
+    para que no detengan el resto del lote.
+    """
+    if len(files) == 1 and is_zip(files[0].filename or ""):
+        archive = await spool_upload(files[0], settings.batch_max_size)
+        try:
+            return await run_in_threadpool(expand_zip, archive.path)
+        finally:
+            archive.cleanup()
+
+    if len(files) > settings.batch_max_files:
+        raise ValueError(f"Demasiados archivos en el lote. Máximo: {settings.batch_max_files}")
+
+    items: List[BatchItem] = []
+    try:
+        for upload in files:
+            filename = upload.filename or ""
+            error = _extension_error(filename)
+            if error:
+                items.append(BatchItem(filename=filename, error=error))
+                continue
+            try:
+                items.append(BatchItem(filename=filename, upload=await spool_upload(upload, settings.max_file_size)))
+            except UploadTooLargeError as e:
+                items.append(BatchItem(filename=filename, error=str(e)))
+    except BaseException:
+        cleanup_batch(items)
+        raise
+    return items
+
+
+def cleanup_batch(items: List[BatchItem]) -> None:
+    """Elimina los archivos temporales del lote"""
+    for item in items:
+        if item.upload is not None:
+            item.upload.cleanup()
+
+
+def expand_zip(path: str) -> List[BatchItem]:
+    """Extrae los certificados de un ZIP a archivos temporales.
+
+    El tamaño de cada entrada se controla mientras se descomprime (no se
+    confía en el tamaño declarado en el índice del ZIP).
+    """
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise ValueError("El archivo ZIP está dañado o no es válido")
+
+    items: List[BatchItem] = []
+    with archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        ]
+        if len(entries) > settings.batch_max_files:
+            raise ValueError(f"El ZIP contiene demasiados archivos. Máximo: {settings.batch_max_files}")
+
+        for info in entries:
+            filename = os.path.basename(info.filename)
+            error = _extension_error(filename)
+            if error:
+                items.append(BatchItem(filename=info.filename, error=error))
+                continue
+            try:
+                items.append(BatchItem(filename=info.filename, upload=_extract_entry(archive, info, filename)))
+            except UploadTooLargeError as e:
+                items.append(BatchItem(filename=info.filename, error=str(e)))
+            except (zipfile.BadZipFile, RuntimeError, OSError) as e:
+                items.append(BatchItem(filename=info.filename, error=f"Error leyendo la entrada del ZIP: {str(e)}"))
+            except BaseException:
+                cleanup_batch(items)
+                raise
+    return items
+
+
+def _extract_entry(archive: zipfile.ZipFile, info: zipfile.ZipInfo, filename: str) -> SpooledUpload:
+    suffix = os.path.splitext(filename)[1].lower()
+    tmp = tempfile.NamedTemporaryFile(
+        prefix="upload-", suffix=suffix, dir=settings.upload_tmp_dir, delete=False
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with tmp, archive.open(info) as source:
+            while True:
+                chunk = source.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    raise UploadTooLargeError(too_large_message(settings.max_file_size))
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+
+    return SpooledUpload(path=tmp.name, filename=filename, size=size, sha256=digest.hexdigest())
+
+
+async def process_batch(items: List[BatchItem], extract: Extractor, concurrency: int) -> AsyncIterator[str]:
+    """Procesa el lote con concurrencia acotada y genera una línea NDJSON por certificado.
+
+    Las líneas se emiten a medida que cada certificado termina (no en el
+    orden de entrada; ``index`` identifica el archivo). Al final se emite
+    una línea de resumen. Los archivos temporales se eliminan al terminar,
+    incluso si el cliente se desconecta a mitad del lote.
+    """
+    start_time = time.time()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, item: BatchItem) -> dict:
+        result = {"type": "result", "index": index, "filename": item.filename}
+        if item.error:
+            return {**result, "success": False, "certificate_data": None, "error": item.error, "processing_time": 0.0}
+
+        async with semaphore:
+            item_start = time.time()
+            try:
+                certificate_data = await extract(item.upload)
+                result.update(success=True, certificate_data=certificate_data.model_dump(), error=None)
+            except ValueError as e:
+                result.update(success=False, certificate_data=None, error=str(e))
+            except Exception as e:
+                result.update(success=False, certificate_data=None, error=f"Error procesando el archivo: {str(e)}")
+            finally:
+                item.upload.cleanup()
+            result["processing_time"] = time.time() - item_start
+        return result
+
+    tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += result["success"]
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+        yield json.dumps({
+            "type": "summary",
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "processing_time": time.time() - start_time,
+        }) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        cleanup_batch(items)
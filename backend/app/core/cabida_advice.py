@@ -0,0 +1,108 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.core.oguc_calculator import CabidaCalculation, OGUCParameters
+
+# Bajo este porcentaje de uso del coeficiente se recomienda optimizar; bajo el segundo, se advierte
+LOW_UTILIZATION = 70.0
+VERY_LOW_UTILIZATION = 50.0
+
+# Palabra clave del motivo de rechazo -> recomendación
+_REJECTION_RECOMMENDATIONS = (
+    ("Superficie del terreno", (
+        "Verifique que la superficie del terreno sea correcta. "
+        "El mínimo legal para vivienda en Chile es de 40m²."
+    )),
+    ("Coeficiente de constructibilidad", (
+        "Revise el coeficiente de constructibilidad. "
+        "Valores típicos van desde 0.5 hasta 3.0 según la zona."
+    )),
+    ("Altura máxima", (
+        "Verifique la altura máxima permitida. "
+        "Considere reducir el número de pisos o consultar el plano regulador local."
+    )),
+    ("Porcentaje de ocupación", (
+        "Ajuste el porcentaje de ocupación de suelo según el tipo de zona. "
+        "Valores típicos: Residencial 60%, Comercial 80%."
+    )),
+)
+
+
+class Finding(NamedTuple):
+    """Observación sobre un cálculo de cabida.
+
+    ``severity`` ("warning" o "info") la convierte en advertencia de la
+    validación; ``recommendation`` es el consejo mostrado al usuario.
+    """
+    field: str
+    message: str
+    severity: Optional[str] = None
+    recommendation: Optional[str] = None
+
+
+def assess_cabida(result: CabidaCalculation, params: OGUCParameters) -> Tuple[Finding, ...]:
+    """Observaciones de un cálculo: única fuente de advertencias y recomendaciones.
+
+    ``/calculate``, ``/validate``, ``/evaluate`` y la sesión what-if derivan
+    de aquí sus listas, con los mismos umbrales y textos. Las advertencias
+    no dependen del estado; las recomendaciones de optimización (altura,
+    coeficiente, unidades) solo se dan si el proyecto está APROBADO, y las
+    de rechazo solo si está RECHAZADO.
+    """
+    approved = result.compliance_status == "APROBADO"
+    findings: List[Finding] = []
+    joined_reasons = str(result.rejection_reasons)
+    for keyword, recommendation in _REJECTION_RECOMMENDATIONS:
+        if keyword in joined_reasons:
+            findings.append(Finding("compliance", keyword, recommendation=recommendation))
+
+    utilization = result.constructibility_utilization
+    if utilization < VERY_LOW_UTILIZATION or (approved and utilization < LOW_UTILIZATION):
+        findings.append(Finding(
+            "optimization",
+            f"Baja utilización del coeficiente de constructibilidad ({utilization:.1f}%)",
+            severity="warning" if utilization < VERY_LOW_UTILIZATION else None,
+            recommendation=(
+                f"Está utilizando solo el {utilization:.1f}% del coeficiente de constructibilidad. "
+                "Podría considerar aumentar la superficie de edificación."
+            ) if approved else None,
+        ))
+
+    if result.allowed_floors < params.floors:
+        findings.append(Finding(
+            "height",
+            f"Altura máxima permite solo {result.allowed_floors} pisos ({params.floors} solicitados)",
+            severity="warning",
+            recommendation=(
+                f"Según la altura máxima, solo puede construir {result.allowed_floors} pisos "
+                f"en lugar de los {params.floors} solicitados."
+            ) if approved else None,
+        ))
+
+    if not params.constructibility_coef or params.constructibility_coef == 1.0:
+        findings.append(Finding(
+            "constructibility",
+            "Usando coeficiente de constructibilidad por defecto (1.0)",
+            severity="info",
+        ))
+
+    if approved and result.dwelling_units_max > 1 and params.min_dwelling_area > 40:
+        findings.append(Finding(
+            "dwelling_units",
+            f"Hasta {result.dwelling_units_max} unidades de vivienda",
+            recommendation=(
+                f"Podría construir hasta {result.dwelling_units_max} unidades de vivienda. "
+                "Considere subdividir para mayor rentabilidad."
+            ),
+        ))
+
+    return tuple(findings)
+
+
+def recommendations(findings: Tuple[Finding, ...]) -> List[str]:
+    """Recomendaciones de las observaciones, en orden"""
+    return [finding.recommendation for finding in findings if finding.recommendation]
+
+
+def warnings(findings: Tuple[Finding, ...]) -> List[Finding]:
+    """Observaciones que son advertencias de la validación"""
+    return [finding for finding in findings if finding.severity]
@@ -0,0 +1,168 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from app.core.oguc_calculator import CabidaCalculation, OGUCCalculator, OGUCParameters
+
+# Objetivo -> campo de CabidaCalculation que se maximiza
+OPTIMIZATION_GOALS = {
+    "dwelling_units": "dwelling_units_max",
+    "built_surface": "max_building_surface",
+    "floors": "allowed_floors",
+}
+
+# Valores del certificado que el proyecto puede usar por debajo de su máximo
+_CAPPED_PARAMETERS = {
+    "constructibility_coef": "Coeficiente de constructibilidad",
+    "max_height": "Altura máxima",
+    "occupation_percentage": "Porcentaje de ocupación",
+}
+
+
+@dataclass
+class BindingConstraint:
+    """Restricción que limita el objetivo en la configuración óptima"""
+    name: str
+    value: float
+    detail: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"constraint": self.name, "value": self.value, "detail": self.detail}
+
+
+@dataclass
+class CabidaOptimization:
+    """Configuración óptima (o motivos por los que no existe una que cumpla)"""
+    goal: str
+    feasible: bool
+    parameters: Optional[OGUCParameters] = None
+    result: Optional[CabidaCalculation] = None
+    binding: List[BindingConstraint] = field(default_factory=list)
+    adjustments: List[str] = field(default_factory=list)
+    infeasible_reasons: List[str] = field(default_factory=list)
+
+    @property
+    def objective(self) -> Optional[float]:
+        if self.result is None:
+            return None
+        return getattr(self.result, OPTIMIZATION_GOALS[self.goal])
+
+
+def optimize_cabida(
+    calculator: OGUCCalculator,
+    surface_area: float,
+    max_height: float,
+    constructibility_coef: float,
+    occupation_percentage: float,
+    zone_types: Sequence[str],
+    goal: str = "dwelling_units",
+    min_dwelling_area: float = 40.0,
+    max_floors: Optional[int] = None,
+    comuna: Optional[str] = None,
+    zona: Optional[str] = None,
+) -> CabidaOptimization:
+    """Mejor configuración que cumple las reglas de ``calculate_cabida``.
+
+    Los valores del certificado son máximos: el proyecto puede usar menos
+    coeficiente, altura u ocupación, pero no más. Cada resultado (unidades,
+    superficie edificable, pisos) crece con esos valores y con el número de
+    pisos, y cada regla es un umbral sobre un solo parámetro. Por eso el
+    óptimo se obtiene en forma cerrada llevando cada parámetro a su cota
+    más estricta, sin recorrer combinaciones; el mismo punto es óptimo para
+    todos los objetivos, que difieren en las restricciones activas.
+
+    ``zone_types`` son las zonas admisibles, en orden de preferencia.
+    ``comuna`` y ``zona`` aplican los límites del Plan Regulador, como en
+    ``calculate_cabida``.
+    """
+    if goal not in OPTIMIZATION_GOALS:
+        raise ValueError(f"Objetivo no soportado: {goal}. Opciones: {', '.join(OPTIMIZATION_GOALS)}")
+    if not zone_types:
+        raise ValueError("Se requiere al menos un tipo de zona")
+    if min_dwelling_area <= 0:
+        raise ValueError("La superficie mínima por vivienda debe ser mayor que 0")
+
+    rules = calculator.rules
+    zone_rules = {zone: calculator.zone_rules(zone, comuna, zona) for zone in zone_types}
+
+    # La zona solo interviene en los límites: la primera que admite más ocupación
+    def zone_occupation(zone: str) -> float:
+        upper = rules.bounds("occupation_percentage", zone, zone_rules[zone][0])[1]
+        return occupation_percentage if upper is None else min(occupation_percentage, upper)
+
+    zone_type = max(zone_types, key=zone_occupation)
+    selected_rules, local_zone = zone_rules[zone_type]
+    zone_label = f"zona {local_zone.label} del Plan Regulador" if local_zone else f"zona {zone_type}"
+
+    # Cada parámetro a su cota más estricta: el valor del certificado o el máximo normativo
+    certificate = {
+        "constructibility_coef": constructibility_coef,
+        "max_height": max_height,
+        "occupation_percentage": occupation_percentage,
+    }
+    values = dict(certificate)
+    adjustments = []
+    for name, label in _CAPPED_PARAMETERS.items():
+        upper = rules.bounds(name, zone_type, selected_rules)[1]
+        if upper is not None and upper < values[name]:
+            values[name] = upper
+            adjustments.append(f"{label} limitado a {upper} (máximo para {zone_label}, reglas {rules.version})")
+
+    floors_by_height = int(values["max_height"] / rules.floor_height)
+    floors = floors_by_height if max_floors is None else min(max_floors, floors_by_height)
+
+    parameters = OGUCParameters(
+        surface_area=surface_area,
+        floors=floors,
+        zone_type=zone_type,
+        min_dwelling_area=min_dwelling_area,
+        comuna=comuna,
+        zona=zona,
+        **values,
+    )
+    result = calculator.calculate_cabida(parameters)
+    if result.compliance_status != "APROBADO":
+        # Lo que queda incumplido (superficie, mínimos) no se corrige usando menos
+        return CabidaOptimization(goal=goal, feasible=False, infeasible_reasons=list(result.rejection_reasons))
+
+    return CabidaOptimization(
+        goal=goal,
+        feasible=True,
+        parameters=parameters,
+        result=result,
+        binding=_binding_constraints(
+            goal, parameters, certificate, rules.floor_height, max_floors,
+            "máximo del Plan Regulador" if local_zone else "máximo OGUC",
+        ),
+        adjustments=adjustments,
+    )
+
+
+def _binding_constraints(
+    goal: str,
+    parameters: OGUCParameters,
+    certificate: Dict[str, float],
+    floor_height: float,
+    max_floors: Optional[int],
+    limit_source: str = "máximo OGUC",
+) -> List[BindingConstraint]:
+    def source(name: str) -> str:
+        return limit_source if getattr(parameters, name) < certificate[name] else "valor del certificado"
+
+    coefficient = BindingConstraint("constructibility_coef", parameters.constructibility_coef, source("constructibility_coef"))
+    surface = BindingConstraint("surface_area", parameters.surface_area, "superficie del terreno")
+
+    if goal == "built_surface":
+        return [surface, coefficient]
+
+    if goal == "dwelling_units":
+        return [surface, coefficient, BindingConstraint(
+            "min_dwelling_area", parameters.min_dwelling_area, "superficie mínima por vivienda"
+        )]
+
+    # floors: la altura (o el máximo pedido) fija el número de pisos
+    floors_by_height = int(parameters.max_height / floor_height)
+    if max_floors is not None and max_floors < floors_by_height:
+        return [BindingConstraint("max_floors", max_floors, "máximo de pisos solicitado")]
+    return [BindingConstraint(
+        "max_height", parameters.max_height, f"{source('max_height')} / {floor_height}m por piso"
+    )]
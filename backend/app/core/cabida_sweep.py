@@ -0,0 +1,107 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.oguc_calculator import OGUCCalculator
+
+# Parámetros que se pueden barrer, en el orden de los ejes de la grilla
+SWEEP_PARAMETERS = ("floors", "constructibility_coef", "occupation_percentage", "max_height")
+
+# Campos del resultado entregados como superficie sobre la grilla
+SURFACE_FIELDS = ("max_building_surface", "max_occupation_surface", "allowed_floors", "dwelling_units_max")
+
+
+@dataclass
+class CabidaSweep:
+    """Cálculo de cabida sobre la grilla de parámetros barridos.
+
+    ``axes`` contiene solo los parámetros con más de un valor; las grillas
+    tienen una dimensión por eje, en ese orden. Los parámetros con un único
+    valor quedan en ``fixed``.
+    """
+    axes: Dict[str, np.ndarray]
+    fixed: Dict[str, float]
+    approved: np.ndarray
+    surfaces: Dict[str, np.ndarray] = field(default_factory=dict)
+    rules_version: Optional[str] = None
+    regulation_zone: Optional[str] = None  # zona del Plan Regulador aplicada, si hubo coincidencia
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.approved.shape
+
+    def boundary_mask(self) -> np.ndarray:
+        """Celdas aprobadas con una vecina rechazada en algún eje (frontera de cumplimiento)"""
+        approved = self.approved
+        boundary = np.zeros_like(approved)
+        for axis in range(approved.ndim):
+            lower = [slice(None)] * approved.ndim
+            upper = [slice(None)] * approved.ndim
+            lower[axis] = slice(None, -1)
+            upper[axis] = slice(1, None)
+            flips = approved[tuple(lower)] != approved[tuple(upper)]
+            boundary[tuple(lower)] |= flips & approved[tuple(lower)]
+            boundary[tuple(upper)] |= flips & approved[tuple(upper)]
+        return boundary
+
+    def boundary(self) -> List[Dict[str, float]]:
+        """Puntos de la frontera, como valores de los parámetros barridos"""
+        names = list(self.axes)
+        return [
+            {name: self.axes[name][index].item() for name, index in zip(names, cell)}
+            for cell in np.argwhere(self.boundary_mask()).tolist()
+        ]
+
+
+def sweep_values(spec: Union[float, Sequence[float], Tuple[float, float, int]], integer: bool = False) -> np.ndarray:
+    """Valores de un eje: un escalar, una lista o un rango ``(inicio, fin, pasos)``"""
+    if isinstance(spec, tuple):
+        start, stop, steps = spec
+        values = np.linspace(start, stop, max(1, int(steps)))
+    else:
+        values = np.atleast_1d(np.asarray(spec, dtype=np.float64))
+    if integer:
+        # Pisos: valores enteros distintos, en orden
+        values = np.unique(np.round(values)).astype(np.int64)
+    return values
+
+
+def sweep_cabida(
+    calculator: OGUCCalculator,
+    surface_area: float,
+    zone_type: str,
+    min_dwelling_area: float,
+    values: Dict[str, np.ndarray],
+    comuna: Optional[str] = None,
+    zona: Optional[str] = None,
+) -> CabidaSweep:
+    """Evalúa todas las combinaciones de ``values`` en un único cálculo por lote.
+
+    ``values`` entrega los valores de cada parámetro de ``SWEEP_PARAMETERS``;
+    ``comuna`` y ``zona`` aplican los límites del Plan Regulador.
+    """
+    grid = np.meshgrid(*(values[name] for name in SWEEP_PARAMETERS), indexing="ij")
+    columns = {name: column.ravel() for name, column in zip(SWEEP_PARAMETERS, grid)}
+    batch = calculator.calculate_cabida_batch(
+        surface_area=surface_area,
+        zone_type=zone_type,
+        min_dwelling_area=min_dwelling_area,
+        with_reasons=False,
+        comuna=comuna,
+        zona=zona,
+        **columns,
+    )
+
+    full_shape = grid[0].shape
+    swept = tuple(len(values[name]) > 1 for name in SWEEP_PARAMETERS)
+    shape = tuple(size for size, is_swept in zip(full_shape, swept) if is_swept)
+
+    return CabidaSweep(
+        axes={name: values[name] for name, is_swept in zip(SWEEP_PARAMETERS, swept) if is_swept},
+        fixed={name: values[name][0].item() for name, is_swept in zip(SWEEP_PARAMETERS, swept) if not is_swept},
+        approved=batch.approved.reshape(shape),
+        surfaces={name: getattr(batch, name).reshape(shape) for name in SURFACE_FIELDS},
+        rules_version=batch.rules_version,
+        regulation_zone=batch.regulation_zones[0] if batch.regulation_zones else None,
+    )
@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.oguc_calculator import CabidaCalculation, OGUCCalculator, OGUCParameters
+
+
+def calculation_key(params: OGUCParameters, calculator: OGUCCalculator) -> Tuple:
+    """Clave de un cálculo: parámetros normalizados + versión de las reglas.
+
+    Los números se normalizan a float/int (``500`` y ``500.0`` son el mismo
+    cálculo). ``zone_type`` se conserva tal cual porque aparece en los
+    motivos de rechazo. La fecha de carga distingue un archivo de reglas
+    editado sin cambiar su versión; la del Plan Regulador, el dataset usado.
+    """
+    rules = calculator.rules
+    return (
+        rules.version,
+        rules.loaded_at,
+        calculator.regulations.version if calculator.regulations is not None else None,
+        float(params.surface_area),
+        int(params.floors),
+        float(params.max_height),
+        float(params.constructibility_coef),
+        float(params.occupation_percentage),
+        params.zone_type,
+        float(params.min_dwelling_area),
+        params.comuna,
+        params.zona,
+    )
+
+
+class CalculationCache:
+    """Cache LRU de resultados de ``calculate_cabida`` compartido por los endpoints.
+
+    Los resultados se comparten entre solicitudes; son tuplas inmutables.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CabidaCalculation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def calculate(self, params: OGUCParameters, calculator: Optional[OGUCCalculator] = None) -> CabidaCalculation:
+        """Resultado de ``calculate_cabida``, reutilizado si ya se calculó con las mismas reglas"""
+        calculator = calculator or OGUCCalculator()
+        key = calculation_key(params, calculator)
+
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return result
+            self._misses += 1
+
+        result = calculator.calculate_cabida(params)
+        if self.max_entries <= 0:
+            return result
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos y ocupación del cache"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+calculation_cache = CalculationCache(max_entries=settings.calculation_cache_max_entries)
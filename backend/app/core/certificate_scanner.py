@@ -0,0 +1,231 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple
+
+# Campos numéricos de CertificateData: se normaliza la coma decimal
+NUMERIC_FIELDS = frozenset({
+    'superficie_terreno',
+    'altura_maxima',
+    'coeficiente_constructibilidad',
+    'porcentaje_ocupacion',
+})
+
+# Palabras clave que identifican un Certificado de Informaciones Previas
+MAIN_KEYWORD = 'certificado de informaciones previas'
+REQUIRED_KEYWORDS = (
+    MAIN_KEYWORD,
+    'municipalidad',
+    'rol',
+    'superficie',
+)
+
+MONTHS = (
+    'enero|febrero|marzo|abril|mayo|junio|julio|agosto|'
+    'septiembre|octubre|noviembre|diciembre'
+)
+
+# Datos adicionales: (patrón, flags). Coordenadas y número de certificado distinguen mayúsculas
+ADDITIONAL_PATTERNS = {
+    'coordinates': (r'(\d+°\d+\'\d+[NS])\s*(\d+°\d+\'\d+[WE])', 0),
+    'certificate_date': (rf'(\d{{1,2}})\s*de\s*({MONTHS})\s*de\s*(\d{{4}})', re.IGNORECASE),
+    'certificate_number': (r'N[°o]\s*(\d+/\d{4})', 0),
+}
+
+# Anclas (sobre el texto en minúsculas) donde pueden comenzar los datos adicionales
+_DIGIT_ANCHOR = r'\d(?=\d*°|\d?\s*de)'
+_NUMBER_ANCHOR = r'n(?=[°o]\s*\d)'
+
+# Tamaño de ventana del recorrido; el solapamiento cubre anclas que cruzan el borde
+_CHUNK_SIZE = 4096
+_CHUNK_OVERLAP = 64
+
+_LITERAL_PREFIX = re.compile(r'(?:[^\\\[\](){}.*+?^$|]|\\[^\w\s])+')
+
+
+@dataclass
+class ScanResult:
+    """Resultado (acumulable) de un recorrido del scanner sobre el texto"""
+    fields: Dict[str, Any] = field(default_factory=dict)
+    resolved: Set[str] = field(default_factory=set)
+    keywords: Set[str] = field(default_factory=set)
+    additional: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_certificate(self) -> bool:
+        # Exigir la frase principal y al menos 3 de 4 indicadores base para
+        # reducir falsos positivos de documentos no CIP.
+        return MAIN_KEYWORD in self.keywords and len(self.keywords) >= 3
+
+
+@dataclass
+class _Anchor:
+    fields: List[Tuple[str, Pattern]] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+    additional: List[Tuple[str, Pattern]] = field(default_factory=list)
+
+
+class CertificateScanner:
+    """Localiza todas las etiquetas del certificado en un único recorrido.
+
+    Cada patrón de campo comienza con una etiqueta literal ("Rol:",
+    "Superficie", "Zona:", ...). El scanner combina esas etiquetas, las
+    palabras clave de validación y las anclas de fechas/coordenadas en una
+    sola expresión sin alternativas costosas, que recorre una vez el texto
+    en minúsculas. Solo en las posiciones ancladas se aplica el patrón
+    completo del campo, por lo que el resultado es idéntico al de un
+    ``re.search`` por campo. El recorrido termina en cuanto no queda nada
+    por encontrar.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.field_names = tuple(patterns)
+
+        literal_targets: Dict[str, _Anchor] = {}
+        for name, pattern in patterns.items():
+            literal = _literal_prefix(name, pattern)
+            compiled = re.compile(pattern, re.IGNORECASE)
+            literal_targets.setdefault(literal, _Anchor()).fields.append((name, compiled))
+        for keyword in REQUIRED_KEYWORDS:
+            literal_targets.setdefault(keyword, _Anchor()).keywords.append(keyword)
+
+        # Un ancla implica todas las anclas que son prefijo suyo ("rol:" implica "rol")
+        self._anchors: Dict[str, _Anchor] = {}
+        for literal in literal_targets:
+            merged = _Anchor()
+            for other, targets in literal_targets.items():
+                if literal.startswith(other):
+                    merged.fields.extend(targets.fields)
+                    merged.keywords.extend(targets.keywords)
+            self._anchors[literal] = merged
+
+        additional = {
+            name: re.compile(pattern, flags) for name, (pattern, flags) in ADDITIONAL_PATTERNS.items()
+        }
+        digit_anchor = _Anchor(additional=[
+            ('coordinates', additional['coordinates']),
+            ('certificate_date', additional['certificate_date']),
+        ])
+        for digit in '0123456789':
+            self._anchors[digit] = digit_anchor
+        self._anchors['n'] = _Anchor(additional=[('certificate_number', additional['certificate_number'])])
+
+        # Sin grupos con nombre: así el motor de re conserva la búsqueda rápida
+        # por prefijos literales. El ancla se identifica por el texto encontrado.
+        literals = sorted(literal_targets, key=len, reverse=True)
+        branches = [re.escape(literal) for literal in literals] + [_DIGIT_ANCHOR, _NUMBER_ANCHOR]
+        self.regex = re.compile('|'.join(branches))
+        self._regex_ignorecase = re.compile(self.regex.pattern, re.IGNORECASE)
+        self._targets = len(self.field_names) + len(ADDITIONAL_PATTERNS) + len(REQUIRED_KEYWORDS)
+
+    def is_complete(self, result: ScanResult) -> bool:
+        """Indica si ya se encontraron todos los campos, datos y palabras clave"""
+        return len(result.resolved) + len(result.additional) + len(result.keywords) >= self._targets
+
+    def scan(self, text: str, result: Optional[ScanResult] = None) -> ScanResult:
+        """Recorre ``text`` una vez acumulando hallazgos en ``result``.
+
+        Conserva la semántica de ``re.search``: para cada campo vale la
+        primera aparición, incluso si su valor numérico no es convertible.
+        """
+        if result is None:
+            result = ScanResult()
+
+        anchors = self._anchors
+        fields, resolved, keywords, additional = result.fields, result.resolved, result.keywords, result.additional
+        remaining = self._targets - len(resolved) - len(additional) - len(keywords)
+        length = len(text)
+        chunk_start = 0
+        while remaining > 0 and chunk_start < length:
+            # Pasar a minúsculas por ventanas: con salida temprana no se paga
+            # el costo de convertir páginas que nunca se recorren.
+            chunk_end = min(length, chunk_start + _CHUNK_SIZE)
+            window = text[chunk_start:chunk_end + _CHUNK_OVERLAP]
+            lowered = window.lower()
+            search = self.regex.search
+            if len(lowered) != len(window):
+                # Algunos caracteres cambian de largo al pasar a minúsculas: las
+                # posiciones dejarían de coincidir, se busca sobre el texto original.
+                lowered = window
+                search = self._regex_ignorecase.search
+
+            limit = chunk_end - chunk_start
+            pos = 0
+            while remaining > 0:
+                anchor_match = search(lowered, pos)
+                if anchor_match is None or anchor_match.start() >= limit:
+                    break
+
+                start = chunk_start + anchor_match.start()
+                anchor = anchors[anchor_match.group().lower()]
+
+                for keyword in anchor.keywords:
+                    if keyword not in keywords:
+                        keywords.add(keyword)
+                        remaining -= 1
+
+                for name, regex in anchor.fields:
+                    if name in resolved:
+                        continue
+                    match = regex.match(text, start)
+                    if match:
+                        resolved.add(name)
+                        remaining -= 1
+                        value = _convert_value(name, match.group(1))
+                        if value is not None:
+                            fields[name] = value
+
+                for name, regex in anchor.additional:
+                    if name in additional:
+                        continue
+                    match = regex.match(text, start)
+                    if match:
+                        additional[name] = _format_additional(name, match)
+                        remaining -= 1
+
+                # Avanzar un solo carácter: las anclas pueden solaparse (p. ej. un
+                # valor que contiene otra etiqueta en la misma línea).
+                pos = anchor_match.start() + 1
+
+            chunk_start = chunk_end
+
+        return result
+
+
+@lru_cache(maxsize=8)
+def _compile_scanner(patterns: Tuple[Tuple[str, str], ...]) -> CertificateScanner:
+    return CertificateScanner(dict(patterns))
+
+
+def get_scanner(patterns: Dict[str, str]) -> CertificateScanner:
+    """Retorna el scanner compilado (y compartido) para un juego de patrones"""
+    return _compile_scanner(tuple(patterns.items()))
+
+
+def _literal_prefix(name: str, pattern: str) -> str:
+    match = _LITERAL_PREFIX.match(pattern)
+    if not match:
+        raise ValueError(f"El patrón de '{name}' debe comenzar con una etiqueta literal")
+    literal = re.sub(r'\\(.)', r'\1', match.group(0))
+    # Un cuantificador a continuación hace opcional el último carácter
+    if pattern[match.end():match.end() + 1] in ('*', '?', '{'):
+        literal = literal[:-1]
+    if not literal:
+        raise ValueError(f"El patrón de '{name}' debe comenzar con una etiqueta literal")
+    return literal.lower()
+
+
+def _convert_value(name: str, raw_value: str) -> Any:
+    value = raw_value.strip()
+    if name not in NUMERIC_FIELDS:
+        return value
+    try:
+        return float(value.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def _format_additional(name: str, match: re.Match) -> str:
+    if name == 'certificate_number':
+        return match.group(1)
+    return ' '.join(match.groups())
@@ -0,0 +1,197 @@
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, func, select, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import create_db_engine
+from app.models.certificate import CertificateData
+
+metadata = MetaData()
+
+certificates_table = Table(
+    "certificate_handles",
+    metadata,
+    Column("handle", String(32), primary_key=True),
+    Column("data", Text, nullable=False),
+    Column("expires_at", Float, nullable=False, index=True),
+)
+
+# Fracción del TTL que debe transcurrir antes de renovar un handle en la base
+# (evita una escritura por cada lectura de un certificado usado seguido)
+_RENEW_AFTER = 0.1
+
+# Fracción de max_entries que se libera al superarlo, de modo que el conteo
+# en la base se repite una vez cada ~10% de inserciones y no en cada una
+_EVICT_SLACK = 0.1
+
+
+class CertificateHandleError(LookupError):
+    """El handle no existe o ya expiró"""
+
+
+class CertificateStore:
+    """Certificados extraídos guardados en el servidor, referenciados por un handle.
+
+    Evita que el cliente reenvíe el ``CertificateData`` completo en cada
+    paso del flujo (cálculo, validación, reportes). Los certificados se
+    guardan en ``database_url`` (la misma base de la cola de trabajos), de
+    modo que un handle emitido por un worker de uvicorn sirve en cualquier
+    otro. Las entradas expiran tras ``ttl_seconds`` sin uso (las lecturas
+    renuevan el plazo, a lo más una vez por décimo del TTL) y el total se
+    acota a ``max_entries`` eliminando las próximas a expirar, es decir,
+    las usadas hace más tiempo.
+
+    El número de entradas se lleva en un contador del proceso (``put`` y
+    ``stats`` no cuentan filas): se sincroniza con la base al abrirla y
+    cada vez que el contador supera ``max_entries``, antes de expulsar.
+    Con varios procesos, ``stats`` puede no incluir las inserciones
+    recientes de los demás hasta la siguiente sincronización. Los aciertos
+    y fallos de ``stats`` son del proceso actual.
+    """
+
+    def __init__(self, database_url: str, ttl_seconds: float, max_entries: int):
+        self.database_url = database_url
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._entries = 0
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    @property
+    def engine(self) -> Engine:
+        # La base se abre al primer uso: importar el módulo no crea archivos
+        with self._lock:
+            if self._engine is None:
+                self._engine = create_db_engine(self.database_url)
+                metadata.create_all(self._engine)
+                with self._engine.connect() as conn:
+                    self._entries = _count(conn)
+            return self._engine
+
+    def put(self, data: CertificateData) -> str:
+        """Guarda un certificado y retorna su handle"""
+        handle = secrets.token_urlsafe(16)
+        now = time.time()
+        with self.engine.begin() as conn:
+            expired = conn.execute(delete(certificates_table).where(certificates_table.c.expires_at <= now)).rowcount
+            conn.execute(certificates_table.insert().values(
+                handle=handle,
+                data=data.model_dump_json(),
+                expires_at=now + self.ttl_seconds,
+            ))
+            with self._lock:
+                self._entries = max(0, self._entries - expired) + 1
+                over_limit = self._entries > self.max_entries
+            evicted = self._evict(conn) if over_limit else 0
+        with self._lock:
+            self._expired += expired
+            self._evictions += evicted
+        return handle
+
+    def _evict(self, conn) -> int:
+        """Expulsa las entradas próximas a expirar hasta dejar ``_EVICT_SLACK`` libre"""
+        # El contador local no ve las inserciones de otros procesos: se cuenta en la base
+        entries = _count(conn)
+        excess = entries - (self.max_entries - int(self.max_entries * _EVICT_SLACK))
+        evicted = 0
+        if excess > 0 and entries > self.max_entries:
+            oldest = (
+                select(certificates_table.c.handle)
+                .order_by(certificates_table.c.expires_at)
+                .limit(excess)
+                .scalar_subquery()
+            )
+            evicted = conn.execute(delete(certificates_table).where(certificates_table.c.handle.in_(oldest))).rowcount
+        with self._lock:
+            self._entries = entries - evicted
+        return evicted
+
+    def get(self, handle: str) -> Optional[CertificateData]:
+        """Retorna el certificado del handle, o None si no existe o expiró"""
+        now = time.time()
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(certificates_table.c.data, certificates_table.c.expires_at)
+                .where(certificates_table.c.handle == handle)
+            ).first()
+
+        if row is None or row.expires_at <= now:
+            if row is not None:
+                with self.engine.begin() as conn:
+                    conn.execute(delete(certificates_table).where(certificates_table.c.handle == handle))
+            with self._lock:
+                self._misses += 1
+                self._expired += row is not None
+                self._entries = max(0, self._entries - (row is not None))
+            return None
+
+        if row.expires_at - now < self.ttl_seconds * (1 - _RENEW_AFTER):
+            with self.engine.begin() as conn:
+                conn.execute(
+                    update(certificates_table)
+                    .where(certificates_table.c.handle == handle)
+                    .values(expires_at=now + self.ttl_seconds)
+                )
+        with self._lock:
+            self._hits += 1
+        return CertificateData.model_validate_json(row.data)
+
+    def resolve(self, certificate_data: Optional[CertificateData], certificate_handle: Optional[str]) -> CertificateData:
+        """Certificado de una solicitud: el enviado en línea o el referenciado por handle"""
+        if certificate_data is not None:
+            return certificate_data
+        data = self.get(certificate_handle) if certificate_handle else None
+        if data is None:
+            raise CertificateHandleError(
+                "Certificado no encontrado o expirado. Vuelva a subir el certificado"
+            )
+        return data
+
+    def clear(self) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(certificates_table))
+        with self._lock:
+            self._entries = 0
+
+    def reset(self, database_url: Optional[str] = None) -> None:
+        """Cierra la base (y opcionalmente cambia de base); se reabre al siguiente uso"""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose()
+            self._engine = None
+            self._entries = 0
+            if database_url is not None:
+                self.database_url = database_url
+
+    def stats(self) -> Dict[str, Any]:
+        """Ocupación y aciertos del almacén de certificados"""
+        self.engine  # abre la base (y sincroniza el contador) si aún no se usó
+        with self._lock:
+            return {
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evictions": self._evictions,
+            }
+
+
+def _count(conn) -> int:
+    return conn.execute(select(func.count()).select_from(certificates_table)).scalar_one()
+
+
+certificate_store = CertificateStore(
+    database_url=settings.database_url,
+    ttl_seconds=settings.certificate_handle_ttl,
+    max_entries=settings.certificate_store_max_entries,
+)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
+import os
 
 class Settings(BaseSettings):
     app_name: str = "Arquitect Assistant"
@@ -12,14 +13,94 @@ class Settings(BaseSettings):
     # File upload
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_extensions: list = [".pdf", ".jpg", ".jpeg", ".png"]
+    upload_chunk_size: int = 1024 * 1024  # bytes leídos por bloque al recibir un archivo
+    upload_form_overhead: int = 64 * 1024  # margen para campos y delimitadores multipart
+    upload_tmp_dir: Optional[str] = None  # None usa el directorio temporal del sistema
+    batch_max_files: int = 500  # certificados por lote (archivos o entradas del ZIP)
+    batch_max_size: int = 500 * 1024 * 1024  # 500MB por solicitud de lote
+    batch_concurrency: int = 4  # certificados del lote en proceso simultáneo
     
     # OGUC Settings
     min_surface_area: float = 40.0  # m² mínimos para vivienda
     default_max_height: float = 23.0  # metros por defecto
     default_constructibility_coef: float = 1.0  # coeficiente por defecto
+    calculation_batch_max_rows: int = 100000  # terrenos por solicitud a /calculate/batch
+    
+    # Cache de cálculos OGUC
+    calculation_cache_max_entries: int = 4096  # resultados de calculate_cabida compartidos entre endpoints (0 = sin cache)
+    
+    # Reglas OGUC (archivo versionado y recargable)
+    oguc_rules_path: Optional[str] = None  # None usa app/data/oguc_rules.json
+    oguc_rules_check_interval: float = 5.0  # segundos entre revisiones del archivo de reglas (0 = solo recarga manual)
+    
+    # Plan Regulador Comunal
+    regulation_dataset_enabled: bool = True  # límites del Plan Regulador Comunal por comuna y zona
+    regulation_dataset_path: Optional[str] = None  # CSV; None usa app/data/plan_regulador.csv
+    regulation_db_path: Optional[str] = None  # SQLite compilado y compartido; None usa <tmp>/arquitect-prc.sqlite
+    regulation_mmap_size: int = 64 * 1024 * 1024  # bytes del SQLite mapeados en memoria
+    
+    # Zonificación por coordenadas
+    zoning_index_enabled: bool = True  # asignar zona según las coordenadas del certificado
+    zoning_geojson_path: Optional[str] = None  # polígonos de zonificación; None usa app/data/zonificacion.geojson
+    zoning_node_capacity: int = 16  # hijos por nodo del R-tree
+    
+    # Validación de carteras (/validate/portfolio)
+    portfolio_max_size: int = 200 * 1024 * 1024  # archivo NDJSON de /validate/portfolio
+    portfolio_chunk_size: int = 100  # lotes leídos y validados por tramo
+    portfolio_stats_interval: int = 500  # lotes entre líneas de estadísticas parciales (0 = solo al final)
+    portfolio_top_reasons: int = 10  # motivos de rechazo más frecuentes informados
+    portfolio_reason_capacity: int = 256  # motivos distintos contados (acota la memoria)
     
     # OCR Settings
     tesseract_cmd: Optional[str] = None
+    tessdata_dir: Optional[str] = None  # carpeta de traineddata para tesserocr
+    ocr_backend: str = "auto"  # auto, tesserocr o pytesseract
+    ocr_engine_pool_size: int = 4  # motores OCR persistentes por worker de extracción
+    ocr_engine_max_jobs: int = 200  # imágenes por motor antes de reciclarlo (0 = sin límite)
+    pdf_hybrid_ocr: bool = True  # OCR de páginas PDF sin capa de texto
+    pdf_early_exit: bool = True  # dejar de leer páginas al encontrar los campos requeridos
+    ocr_min_page_chars: int = 20  # bajo este largo una página se considera escaneada
+    ocr_render_dpi: int = 300
+    ocr_page_workers: int = 4  # páginas procesadas con OCR en paralelo
+    ocr_preprocess: bool = True  # preparar fotos antes del OCR (escala, grises, umbral, enderezado)
+    ocr_image_dpi: int = 300  # resolución objetivo de las fotos
+    ocr_page_long_side_in: float = 11.7  # lado mayor de la hoja fotografiada (A4, pulgadas)
+    ocr_binarize: bool = True
+    ocr_deskew: bool = True
+    ocr_deskew_max_angle: float = 5.0  # grados
+    ocr_layout_templates: bool = True  # OCR solo de las regiones del formato de CIP reconocido
+    ocr_layout_templates_path: Optional[str] = None  # JSON con formatos adicionales
+    
+    # Extraction workers
+    extraction_mode: str = "process"  # process, thread o inline
+    extraction_workers: int = max(1, (os.cpu_count() or 2) - 1)
+    worker_start_method: Optional[str] = "spawn"  # spawn evita heredar hilos del event loop
+    
+    # Generación de informes PDF (ReportLab) fuera del event loop
+    report_mode: str = "process"  # process, thread o inline
+    report_workers: int = 2  # informes generados en paralelo; el resto espera en cola
+    
+    # Certificados guardados en database_url (referenciados por handle desde cualquier worker)
+    certificate_handle_ttl: int = 3600  # segundos sin uso antes de expirar
+    certificate_store_max_entries: int = 10000
+    
+    # Cola de trabajos de extracción (persistida en database_url)
+    job_workers: int = 2  # procesos locales que consumen la cola (0 = no iniciar)
+    job_max_attempts: int = 3
+    job_retry_backoff: float = 5.0  # segundos antes del primer reintento (se duplica en cada uno)
+    job_lease_seconds: int = 60  # segundos sin renovar el lease (el worker lo renueva cada tercio) antes de reasignar el trabajo
+    job_poll_interval: float = 0.5  # segundos entre consultas de un worker sin trabajo
+    job_error_backoff: float = 1.0  # espera de un worker tras un error de la cola (se duplica en cada error seguido)
+    job_error_backoff_max: float = 60.0
+    job_supervise_interval: float = 5.0  # segundos entre revisiones de workers muertos (0 = no reiniciarlos)
+    job_retention_seconds: int = 24 * 3600  # trabajos terminados conservados antes de eliminarlos (0 = sin límite)
+    job_purge_interval: float = 600.0  # segundos entre limpiezas de trabajos terminados
+    job_files_dir: Optional[str] = None  # None usa <tmp>/arquitect-jobs
+    
+    # Extraction cache
+    extraction_cache_max_entries: int = 256
+    extraction_cache_max_bytes: int = 64 * 1024 * 1024  # 64MB
+    extraction_cache_dir: Optional[str] = None  # None deshabilita el nivel en disco
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """Engine de SQLAlchemy; en SQLite habilita WAL y espera ante bloqueos"""
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url, pool_pre_ping=True)
+
+    engine = create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        # WAL: lectores (consultas de estado) no bloquean a los workers que escriben
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
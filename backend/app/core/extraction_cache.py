@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.pdf_processor import EXTRACTOR_VERSION, CertificateData
+
+
+def compute_cache_key(file_content: bytes, filename: str, with_raw_text: bool = False) -> str:
+    """Clave direccionada por contenido: hash del archivo + tipo + versión del extractor"""
+    return cache_key_for_digest(hashlib.sha256(file_content).hexdigest(), filename, with_raw_text)
+
+
+def cache_key_for_digest(sha256_hex: str, filename: str, with_raw_text: bool = False) -> str:
+    """Clave del cache a partir de un SHA-256 ya calculado (p. ej. al recibir el archivo).
+
+    Las extracciones con texto completo (``raw_text``) se guardan aparte de
+    las incrementales, que no lo incluyen.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    variant = "-raw" if with_raw_text else ""
+    return f"v{EXTRACTOR_VERSION}-{extension.lstrip('.')}{variant}-{sha256_hex}"
+
+
+class ExtractionCache:
+    """Cache de CertificateData extraídos, en dos niveles.
+
+    - Memoria: LRU acotado por número de entradas y por bytes serializados.
+    - Disco (opcional): un JSON por clave, sobrevive a reinicios.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Tuple[CertificateData, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[CertificateData]:
+        """Busca una extracción previa; promueve a memoria los aciertos en disco"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits_memory += 1
+                return entry[0]
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._misses += 1
+                return None
+            self._hits_disk += 1
+        self._store_memory(key, data, data.model_dump_json())
+        return data
+
+    def put(self, key: str, data: CertificateData) -> None:
+        """Guarda una extracción en memoria y, si está configurado, en disco"""
+        payload = data.model_dump_json()
+        self._store_memory(key, data, payload)
+        self._write_disk(key, payload)
+
+    def clear(self) -> None:
+        """Vacía el nivel en memoria (el nivel en disco se conserva)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos y ocupación del cache"""
+        with self._lock:
+            lookups = self._hits_memory + self._hits_disk + self._misses
+            hits = self._hits_memory + self._hits_disk
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits_memory": self._hits_memory,
+                "hits_disk": self._hits_disk,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "disk_enabled": bool(self.disk_dir),
+            }
+
+    def _store_memory(self, key: str, data: CertificateData, payload: str) -> None:
+        size = len(payload)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (data, size)
+            self._bytes += size
+
+            # Expulsar las entradas menos usadas hasta respetar ambos límites
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[CertificateData]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return CertificateData.model_validate_json(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, payload: str) -> None:
+        if not self.disk_dir:
+            return
+        # Escritura atómica: un lector concurrente nunca ve un JSON parcial
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+extraction_cache = ExtractionCache(
+    max_entries=settings.extraction_cache_max_entries,
+    max_bytes=settings.extraction_cache_max_bytes,
+    disk_dir=settings.extraction_cache_dir,
+)
@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+# Lado de la imagen usado para estimar la inclinación (basta una versión reducida)
+_DESKEW_SAMPLE_SIDE = 1000
+
+
+@dataclass
+class PreprocessedImage:
+    """Imagen lista para OCR junto con los tiempos de cada paso (ms)"""
+    image: Image.Image
+    original_size: Tuple[int, int]
+    skew_angle: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class _StepTimer:
+    def __init__(self, timings: Dict[str, float]):
+        self.timings = timings
+        self._last = time.perf_counter()
+
+    def lap(self, step: str) -> None:
+        now = time.perf_counter()
+        self.timings[step] = (now - self._last) * 1000
+        self._last = now
+
+
+def target_long_side() -> int:
+    """Lado mayor (px) equivalente a ``ocr_image_dpi`` sobre una hoja del tamaño configurado.
+
+    Las fotos de teléfono no traen una resolución física confiable, por lo
+    que se asume que la foto encuadra una hoja del certificado.
+    """
+    return max(1, round(settings.ocr_image_dpi * settings.ocr_page_long_side_in))
+
+
+def preprocess_image(image: Image.Image) -> PreprocessedImage:
+    """Prepara una imagen recién abierta (aún sin decodificar) para OCR.
+
+    Pasos, cada uno configurable en Settings:
+    1. ``decode``: decodificación JPEG a escala reducida (modo draft de PIL)
+       cuando la foto excede la resolución necesaria.
+    2. ``grayscale``: orientación EXIF y conversión a escala de grises.
+    3. ``downscale``: reducción al DPI objetivo.
+    4. ``deskew``: corrección de la inclinación por perfil de proyección.
+    5. ``binarize``: umbral global de Otsu.
+    """
+    timings: Dict[str, float] = {}
+    timer = _StepTimer(timings)
+    original_size = image.size
+    long_side = target_long_side()
+
+    if image.format == "JPEG":
+        # El decodificador JPEG escala por 1/2, 1/4 o 1/8 sin bajar del tamaño pedido
+        scale = long_side / max(image.size)
+        if scale < 1:
+            image.draft("L", (round(image.size[0] * scale), round(image.size[1] * scale)))
+    image.load()
+    timer.lap("decode")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "L":
+        image = image.convert("L")
+    timer.lap("grayscale")
+
+    if max(image.size) > long_side:
+        scale = long_side / max(image.size)
+        size = (max(1, round(image.size[0] * scale)), max(1, round(image.size[1] * scale)))
+        image = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    timer.lap("downscale")
+
+    angle = 0.0
+    if settings.ocr_deskew:
+        angle = estimate_skew(image, settings.ocr_deskew_max_angle)
+        if abs(angle) >= 0.1:
+            image = image.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+        timer.lap("deskew")
+
+    if settings.ocr_binarize:
+        # Después de rotar: la interpolación reintroduciría grises
+        threshold = otsu_threshold(image)
+        image = image.point(lambda value: 255 if value > threshold else 0)
+        timer.lap("binarize")
+
+    return PreprocessedImage(image=image, original_size=original_size, skew_angle=angle, timings=timings)
+
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Umbral que maximiza la varianza entre clases del histograma de grises"""
+    histogram = np.asarray(image.histogram()[:256], dtype=np.float64)
+    levels = np.arange(256)
+    weight_background = np.cumsum(histogram)
+    weight_foreground = weight_background[-1] - weight_background
+    sum_background = np.cumsum(histogram * levels)
+    mean_background = sum_background / np.maximum(weight_background, 1)
+    mean_foreground = (sum_background[-1] - sum_background) / np.maximum(weight_foreground, 1)
+    variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    return int(np.argmax(variance))
+
+
+def estimate_skew(image: Image.Image, max_angle: float) -> float:
+    """Ángulo (grados) que alinea las líneas de texto con la horizontal.
+
+    Se rota una versión reducida de la imagen y se elige el ángulo cuyo
+    perfil de filas tiene mayor varianza (líneas de texto nítidas). La
+    búsqueda es gruesa (0,5°) y luego se refina (0,1°).
+    """
+    sample = image.copy()
+    sample.thumbnail((_DESKEW_SAMPLE_SIDE, _DESKEW_SAMPLE_SIDE), Image.BILINEAR)
+    # Tinta = 255 sobre fondo 0: las zonas que aparecen al rotar no suman
+    sample = ImageOps.invert(sample)
+
+    def score(angle: float) -> float:
+        rotated = np.asarray(sample.rotate(angle, resample=Image.NEAREST), dtype=np.float32)
+        return float(np.var(rotated.sum(axis=1)))
+
+    coarse = np.arange(-max_angle, max_angle + 0.25, 0.5)
+    best = max(coarse, key=score)
+    fine = np.arange(best - 0.4, best + 0.45, 0.1)
+    return round(float(max(fine, key=score)), 1) + 0.0  # normaliza -0.0
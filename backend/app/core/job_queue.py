@@ -0,0 +1,458 @@
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import Boolean, Column, Float, Integer, MetaData, String, Table, Text, delete, func, select, update
+
+from app.core.config import settings
+from app.core.database import create_db_engine
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+JOB_STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED)
+
+metadata = MetaData()
+
+jobs_table = Table(
+    "extraction_jobs",
+    metadata,
+    Column("id", String(32), primary_key=True),
+    Column("status", String(16), nullable=False, index=True),
+    Column("filename", String(255), nullable=False),
+    Column("file_path", Text, nullable=False),
+    Column("sha256", String(64), nullable=False),
+    Column("include_raw_text", Boolean, nullable=False, default=False),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False),
+    Column("worker_id", String(64)),
+    Column("lease_expires_at", Float),
+    Column("available_at", Float, nullable=False),
+    Column("created_at", Float, nullable=False),
+    Column("started_at", Float),
+    Column("finished_at", Float),
+    Column("result", Text),
+    Column("error", Text),
+    Column("certificate_handle", String(64)),
+)
+
+
+@dataclass
+class Job:
+    """Trabajo de extracción persistido en la base de datos"""
+    id: str
+    status: str
+    filename: str
+    file_path: str
+    sha256: str
+    include_raw_text: bool
+    attempts: int
+    max_attempts: int
+    available_at: float
+    created_at: float
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    certificate_handle: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def result_data(self) -> Optional[Dict[str, Any]]:
+        return json.loads(self.result) if self.result else None
+
+
+class JobQueue:
+    """Cola durable de trabajos de extracción sobre ``database_url``.
+
+    Los workers toman trabajos con un lease que renuevan mientras procesan
+    (``lease_heartbeat``): si un worker muere, el trabajo vuelve a quedar
+    disponible cuando el lease expira. Los errores
+    transitorios se reintentan con espera creciente hasta ``max_attempts``.
+    La toma de trabajos usa concurrencia optimista (UPDATE condicionado al
+    estado leído), por lo que funciona igual en SQLite y en otros motores.
+    """
+
+    def __init__(self, database_url: str):
+        self.engine = create_db_engine(database_url)
+        metadata.create_all(self.engine)
+
+    def submit(self, file_path: str, filename: str, sha256: str, include_raw_text: bool = False) -> Job:
+        """Encola un archivo ya guardado en disco y retorna el trabajo creado"""
+        now = time.time()
+        values = {
+            "id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "filename": filename,
+            "file_path": file_path,
+            "sha256": sha256,
+            "include_raw_text": include_raw_text,
+            "attempts": 0,
+            "max_attempts": max(1, settings.job_max_attempts),
+            "available_at": now,
+            "created_at": now,
+        }
+        with self.engine.begin() as conn:
+            conn.execute(jobs_table.insert().values(**values))
+        return Job(**values)
+
+    def submit_result(self, filename: str, sha256: str, result: str, include_raw_text: bool = False) -> Job:
+        """Registra un trabajo ya resuelto (p. ej. por el cache de extracciones)"""
+        now = time.time()
+        values = {
+            "id": uuid.uuid4().hex,
+            "status": SUCCEEDED,
+            "filename": filename,
+            "file_path": "",
+            "sha256": sha256,
+            "include_raw_text": include_raw_text,
+            "attempts": 0,
+            "max_attempts": max(1, settings.job_max_attempts),
+            "available_at": now,
+            "created_at": now,
+            "started_at": now,
+            "finished_at": now,
+            "result": result,
+        }
+        with self.engine.begin() as conn:
+            conn.execute(jobs_table.insert().values(**values))
+        return Job(**values)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(jobs_table).where(jobs_table.c.id == job_id)).mappings().first()
+        return Job(**row) if row else None
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Toma el trabajo disponible más antiguo (o uno con lease expirado)"""
+        while True:
+            now = time.time()
+            with self.engine.connect() as conn:
+                row = conn.execute(
+                    select(jobs_table)
+                    .where(
+                        ((jobs_table.c.status == QUEUED) & (jobs_table.c.available_at <= now))
+                        | ((jobs_table.c.status == RUNNING) & (jobs_table.c.lease_expires_at < now))
+                    )
+                    .order_by(jobs_table.c.available_at)
+                    .limit(1)
+                ).mappings().first()
+            if row is None:
+                return None
+
+            job = Job(**row)
+            if job.status == RUNNING and job.attempts >= job.max_attempts:
+                # El worker anterior murió (o dejó de renovar el lease) en el último intento permitido
+                self._finish(job, FAILED, error="El procesamiento se interrumpió en el último intento permitido")
+                continue
+
+            lease_expires_at = now + settings.job_lease_seconds
+            with self.engine.begin() as conn:
+                claimed = conn.execute(
+                    update(jobs_table)
+                    .where(
+                        (jobs_table.c.id == job.id)
+                        & (jobs_table.c.status == job.status)
+                        & (jobs_table.c.attempts == job.attempts)
+                    )
+                    .values(
+                        status=RUNNING,
+                        worker_id=worker_id,
+                        attempts=job.attempts + 1,
+                        lease_expires_at=lease_expires_at,
+                        started_at=now,
+                    )
+                ).rowcount
+            if claimed == 1:
+                job.status = RUNNING
+                job.worker_id = worker_id
+                job.attempts += 1
+                job.lease_expires_at = lease_expires_at
+                job.started_at = now
+                return job
+            # Otro worker lo tomó primero: buscar el siguiente
+
+    def renew_lease(self, job: Job) -> bool:
+        """Extiende el lease de un trabajo en curso. False si el worker ya no lo tiene"""
+        lease_expires_at = time.time() + settings.job_lease_seconds
+        with self.engine.begin() as conn:
+            renewed = conn.execute(
+                update(jobs_table)
+                .where(
+                    (jobs_table.c.id == job.id)
+                    & (jobs_table.c.status == RUNNING)
+                    & (jobs_table.c.worker_id == job.worker_id)
+                )
+                .values(lease_expires_at=lease_expires_at)
+            ).rowcount
+        if renewed:
+            job.lease_expires_at = lease_expires_at
+        return bool(renewed)
+
+    def purge_finished(self, older_than: float) -> int:
+        """Elimina los trabajos terminados antes de ``older_than`` (epoch). Retorna cuántos"""
+        with self.engine.begin() as conn:
+            return conn.execute(
+                delete(jobs_table).where(
+                    jobs_table.c.status.in_((SUCCEEDED, FAILED)) & (jobs_table.c.finished_at < older_than)
+                )
+            ).rowcount
+
+    def complete(self, job: Job, result: str) -> None:
+        self._finish(job, SUCCEEDED, result=result)
+
+    def fail(self, job: Job, error: str, retry: bool) -> str:
+        """Registra un error; reencola con espera si quedan intentos. Retorna el nuevo estado"""
+        if retry and job.attempts < job.max_attempts:
+            backoff = settings.job_retry_backoff * (2 ** (job.attempts - 1))
+            with self.engine.begin() as conn:
+                conn.execute(
+                    update(jobs_table)
+                    .where((jobs_table.c.id == job.id) & (jobs_table.c.worker_id == job.worker_id))
+                    .values(status=QUEUED, error=error, worker_id=None, lease_expires_at=None,
+                            available_at=time.time() + backoff)
+                )
+            return QUEUED
+
+        self._finish(job, FAILED, error=error)
+        return FAILED
+
+    def set_certificate_handle(self, job_id: str, handle: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(update(jobs_table).where(jobs_table.c.id == job_id).values(certificate_handle=handle))
+
+    def stats(self) -> Dict[str, Any]:
+        """Trabajos por estado"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(jobs_table.c.status, func.count()).group_by(jobs_table.c.status)
+            ).all()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _finish(self, job: Job, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        # Solo el worker que tiene el lease puede cerrar el trabajo
+        with self.engine.begin() as conn:
+            finished = conn.execute(
+                update(jobs_table)
+                .where(
+                    (jobs_table.c.id == job.id)
+                    & (jobs_table.c.status == RUNNING)
+                    & (jobs_table.c.worker_id == job.worker_id)
+                )
+                .values(status=status, result=result, error=error, finished_at=time.time(),
+                        lease_expires_at=None)
+            ).rowcount
+        if finished:
+            _remove_file(job.file_path)
+
+
+def job_files_dir() -> str:
+    """Carpeta donde esperan los archivos encolados (deben sobrevivir a la solicitud)"""
+    directory = settings.job_files_dir or os.path.join(tempfile.gettempdir(), "arquitect-jobs")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def lease_heartbeat(queue: JobQueue, job: Job, interval: Optional[float] = None) -> Iterator[None]:
+    """Renueva el lease de ``job`` en un hilo mientras dura el bloque.
+
+    Por defecto renueva tres veces por lease: un procesamiento largo no
+    se reasigna mientras el worker siga vivo.
+    """
+    interval = interval if interval is not None else max(0.1, settings.job_lease_seconds / 3)
+    stopped = threading.Event()
+
+    def beat() -> None:
+        while not stopped.wait(interval):
+            try:
+                if not queue.renew_lease(job):
+                    return  # el lease expiró y otro worker tomó el trabajo
+            except Exception:
+                logger.exception("No se pudo renovar el lease del trabajo %s", job.id)
+
+    thread = threading.Thread(target=beat, name=f"lease-{job.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(queue: JobQueue, job: Job) -> str:
+    """Procesa un trabajo tomado por un worker y registra el resultado. Retorna el estado final.
+
+    Las extracciones exitosas se guardan también en el cache de
+    extracciones, como en ``/upload/certificate``: con el nivel en disco
+    habilitado, un reenvío del mismo archivo se responde sin encolarlo.
+    """
+    from app.core.extraction_cache import cache_key_for_digest, extraction_cache
+    from app.core.pdf_processor import process_file_job
+
+    try:
+        with lease_heartbeat(queue, job):
+            data = process_file_job(job.file_path, job.filename, job.include_raw_text)
+    except ValueError as e:
+        # Archivo inválido o que no es un CIP: reintentar no cambia el resultado
+        return queue.fail(job, str(e), retry=False)
+    except Exception as e:
+        return queue.fail(job, f"Error procesando el archivo: {str(e)}", retry=True)
+
+    queue.complete(job, data.model_dump_json())
+    extraction_cache.put(cache_key_for_digest(job.sha256, job.filename, job.include_raw_text), data)
+    return SUCCEEDED
+
+
+def job_worker_main(worker_id: str, stop_event, ocr_metrics=None) -> None:
+    """Bucle de un proceso worker: toma trabajos de la cola hasta recibir la señal de detención.
+
+    Un error de la base de datos (bloqueo, conexión caída) no detiene al
+    worker: se registra y se reintenta tras una espera que se duplica en
+    cada error seguido. De paso, elimina cada ``job_purge_interval`` los
+    trabajos terminados hace más de ``job_retention_seconds``.
+    """
+    from app.core.worker_pool import _init_extraction_worker
+
+    _init_extraction_worker(ocr_metrics)
+    queue = JobQueue(settings.database_url)
+    errors = 0
+    next_purge = time.time()
+    while not stop_event.is_set():
+        try:
+            if settings.job_retention_seconds > 0 and time.time() >= next_purge:
+                queue.purge_finished(time.time() - settings.job_retention_seconds)
+                next_purge = time.time() + settings.job_purge_interval
+
+            job = queue.claim(worker_id)
+            if job is None:
+                stop_event.wait(settings.job_poll_interval)
+            else:
+                run_job(queue, job)
+            errors = 0
+        except Exception:
+            errors += 1
+            logger.exception("Error en el worker de trabajos %s", worker_id)
+            stop_event.wait(min(settings.job_error_backoff * 2 ** (errors - 1), settings.job_error_backoff_max))
+
+
+class JobWorkers:
+    """Procesos locales que consumen la cola de trabajos.
+
+    Un hilo supervisor revisa cada ``job_supervise_interval`` segundos que
+    los procesos sigan vivos y reemplaza a los que murieron (p. ej. por
+    falta de memoria); su trabajo en curso vuelve a la cola al expirar el
+    lease.
+    """
+
+    def __init__(self, workers: int, start_method: Optional[str] = None):
+        self.workers = workers
+        self._context = multiprocessing.get_context(start_method) if start_method else multiprocessing
+        self._stop_event = None
+        self._processes: List[multiprocessing.Process] = []
+        self._supervisor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._restarts = 0
+
+    def start(self) -> None:
+        if self._processes or self.workers <= 0:
+            return
+
+        self._stop_event = self._context.Event()
+        with self._lock:
+            self._processes = [self._spawn(index) for index in range(self.workers)]
+        if settings.job_supervise_interval > 0:
+            self._supervisor = threading.Thread(target=self._supervise, name="job-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        from app.core.pdf_processor import ocr_metrics
+
+        process = self._context.Process(
+            target=job_worker_main,
+            args=(f"{os.getpid()}-{index}", self._stop_event, ocr_metrics),
+            name=f"job-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        while not self._stop_event.wait(settings.job_supervise_interval):
+            self.restart_dead()
+
+    def restart_dead(self) -> int:
+        """Reemplaza los procesos worker que terminaron. Retorna cuántos se reiniciaron"""
+        restarted = 0
+        with self._lock:
+            if self._stop_event is None or self._stop_event.is_set():
+                return 0
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                logger.warning("Worker de trabajos %s terminó (código %s); se reinicia", process.name, process.exitcode)
+                self._processes[index] = self._spawn(index)
+                restarted += 1
+        self._restarts += restarted
+        return restarted
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Pide a los workers que terminen el trabajo en curso y los espera"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                # Su trabajo volverá a la cola cuando expire el lease
+                process.terminate()
+        self._processes = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "restarts": self._restarts,
+        }
+
+
+def _remove_file(path: str) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Cola de trabajos del proceso (la base de datos se abre al primer uso)"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(settings.database_url)
+    return _job_queue
+
+
+job_workers = JobWorkers(settings.job_workers, settings.worker_start_method)
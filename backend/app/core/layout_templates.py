@@ -0,0 +1,144 @@
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+# Caja normalizada (izquierda, arriba, derecha, abajo) como fracción del ancho/alto
+Box = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class Region:
+    """Zona de la hoja que contiene campos del certificado"""
+    name: str
+    box: Box
+    fields: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class LayoutTemplate:
+    """Formato conocido de CIP: dónde se identifica y dónde están los campos.
+
+    ``header`` se procesa con OCR primero; si su texto contiene todas las
+    frases de ``signature``, solo se procesan las ``regions``. Las cajas son
+    relativas al tamaño de la imagen, por lo que no dependen de la
+    resolución de la foto o del render.
+    """
+    name: str
+    signature: Tuple[str, ...]
+    header: Box
+    regions: Tuple[Region, ...]
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """Campos que el formato asegura encontrar en sus regiones"""
+        return tuple(field for region in self.regions for field in region.fields)
+
+    def matches(self, header_text: str) -> bool:
+        text = normalize_text(header_text)
+        return all(phrase in text for phrase in self.signature)
+
+    def coverage(self) -> float:
+        """Fracción de la hoja que se procesa con OCR al usar este formato"""
+        return sum(box_area(box) for box in (self.header,) + tuple(region.box for region in self.regions))
+
+
+# Formulario tipo de CIP: encabezado con la municipalidad y el título, luego
+# los antecedentes del predio y, más abajo, las normas urbanísticas. Las
+# cajas cubren solo los bloques de etiquetas y valores (con margen para
+# desalineaciones del escaneo): en total, cerca de un quinto de la hoja.
+DEFAULT_TEMPLATES: Tuple[LayoutTemplate, ...] = (
+    LayoutTemplate(
+        name="cip_formulario",
+        signature=("certificado de informaciones previas",),
+        header=(0.0, 0.0, 1.0, 0.09),
+        regions=(
+            Region(
+                name="predio",
+                box=(0.0, 0.15, 0.6, 0.26),
+                fields=("rol", "comuna", "superficie_terreno"),
+            ),
+            Region(
+                name="normas",
+                box=(0.0, 0.35, 0.6, 0.46),
+                fields=("zona", "altura_maxima", "coeficiente_constructibilidad", "porcentaje_ocupacion"),
+            ),
+        ),
+    ),
+)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas y espacios colapsados: tolera saltos de línea del OCR"""
+    return re.sub(r'\s+', ' ', text.lower())
+
+
+def box_area(box: Box) -> float:
+    left, top, right, bottom = box
+    return max(0.0, right - left) * max(0.0, bottom - top)
+
+
+def crop_box(image: Image.Image, box: Box) -> Image.Image:
+    """Recorta la caja normalizada de la imagen (acotada a sus bordes)"""
+    width, height = image.size
+    left, top, right, bottom = box
+    pixels = (
+        max(0, int(left * width)),
+        max(0, int(top * height)),
+        min(width, max(1, round(right * width))),
+        min(height, max(1, round(bottom * height))),
+    )
+    return image.crop(pixels)
+
+
+def _parse_box(value: Iterable[float], where: str) -> Box:
+    box = tuple(float(v) for v in value)
+    if len(box) != 4 or not (0 <= box[0] < box[2] <= 1 and 0 <= box[1] < box[3] <= 1):
+        raise ValueError(f"Caja inválida en {where}: {list(value)}")
+    return box
+
+
+def parse_templates(data: List[dict]) -> List[LayoutTemplate]:
+    """Construye formatos desde su definición JSON.
+
+    Formato de cada elemento::
+
+        {"name": "...", "signature": ["frase", ...], "header": [l, t, r, b],
+         "regions": [{"name": "...", "box": [l, t, r, b], "fields": ["rol", ...]}]}
+    """
+    templates = []
+    for item in data:
+        name = item["name"]
+        regions = tuple(
+            Region(
+                name=region["name"],
+                box=_parse_box(region["box"], f"{name}.{region['name']}"),
+                fields=tuple(region.get("fields", ())),
+            )
+            for region in item["regions"]
+        )
+        if not regions:
+            raise ValueError(f"El formato '{name}' no define regiones")
+        templates.append(LayoutTemplate(
+            name=name,
+            signature=tuple(normalize_text(phrase) for phrase in item["signature"]),
+            header=_parse_box(item["header"], f"{name}.header"),
+            regions=regions,
+        ))
+    return templates
+
+
+@lru_cache(maxsize=4)
+def load_templates(path: Optional[str] = None) -> Tuple[LayoutTemplate, ...]:
+    """Formatos disponibles: los del archivo JSON (si hay) antes que los incluidos"""
+    if not path:
+        return DEFAULT_TEMPLATES
+    try:
+        with open(path, encoding="utf-8") as f:
+            custom = parse_templates(json.load(f))
+    except (OSError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Error leyendo formatos de certificado {path}: {str(e)}")
+    return tuple(custom) + DEFAULT_TEMPLATES
@@ -1,8 +1,20 @@
-from typing import Dict, List, Optional, Tuple
-from pydantic import BaseModel
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
 import math
 
-class OGUCParameters(BaseModel):
+import numpy as np
+
+from app.core.regulation_dataset import RegulationDataset, RegulationZone, get_regulation_dataset
+from app.core.regulation_rules import RULE_PARAMETERS, CompiledRule, RuleSet, get_rule_set
+
+# Columna de un lote: un valor por terreno o un escalar común a todos
+Column = Union[float, int, str, Sequence]
+
+# Parámetros y resultados son tuplas con nombre: sin validación ni __dict__
+# por instancia, e inmutables (el cache de cálculos los comparte). La
+# conversión a modelos pydantic se hace una sola vez, en los routers.
+
+class OGUCParameters(NamedTuple):
     surface_area: float  # Superficie total del terreno (m²)
     floors: int  # Número de pisos
     max_height: float  # Altura máxima permitida (metros)
@@ -10,8 +22,10 @@ class OGUCParameters(BaseModel):
     occupation_percentage: float  # Porcentaje de ocupación de suelo
     zone_type: str  # Tipo de zona (residencial, comercial, etc.)
     min_dwelling_area: float = 40.0  # Mínimo para vivienda
+    comuna: Optional[str] = None  # Comuna y zona del certificado: activan los límites del Plan Regulador
+    zona: Optional[str] = None
 
-class CabidaCalculation(BaseModel):
+class CabidaCalculation(NamedTuple):
     total_surface: float  # Superficie total del terreno
     max_building_surface: float  # Cabida máxima de edificación
     max_occupation_surface: float  # Superficie máxima de emplazamiento
@@ -20,49 +34,146 @@ class CabidaCalculation(BaseModel):
     constructibility_utilization: float  # % de utilización del coeficiente
     dwelling_units_max: int  # Unidades de vivienda máximas
     compliance_status: str  # "APROBADO" o "RECHAZADO"
-    rejection_reasons: List[str] = []  # Motivos de rechazo
+    rejection_reasons: Tuple[str, ...] = ()  # Motivos de rechazo
+    rules_version: Optional[str] = None  # Versión de las reglas OGUC aplicadas
+    regulation_zone: Optional[str] = None  # Zona del Plan Regulador aplicada, si hubo coincidencia
 
-class OGUCCalculator:
-    def __init__(self):
-        # Reglas OGUC básicas
-        self.min_dwelling_area = 40.0  # m²
-        self.max_occupation_by_zone = {
-            "residencial": 0.6,
-            "comercial": 0.8,
-            "industrial": 0.7,
-            "mixto": 0.7
+# Campos de CabidaCalculation por parámetros de los que dependen (recálculo incremental).
+# "compliance" (compliance_status, rejection_reasons y regulation_zone) depende de
+# los parámetros que usan las reglas cargadas: ver ``OGUCCalculator.dependencies``
+OUTPUT_DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    "total_surface": frozenset({"surface_area"}),
+    "max_building_surface": frozenset({"surface_area", "constructibility_coef"}),
+    "max_occupation_surface": frozenset({"surface_area", "occupation_percentage"}),
+    "allowed_floors": frozenset({"floors", "max_height"}),
+    "max_height": frozenset({"max_height"}),
+    "constructibility_utilization": frozenset({"surface_area", "constructibility_coef"}),
+    "dwelling_units_max": frozenset({"surface_area", "constructibility_coef", "min_dwelling_area"}),
+}
+
+# Parámetros que eligen las reglas aplicables (zona OGUC y zona del Plan Regulador)
+ZONE_PARAMETERS = frozenset({"zone_type", "comuna", "zona"})
+
+@dataclass
+class CabidaBatch:
+    """Resultado de ``calculate_cabida_batch``: una columna por campo de CabidaCalculation"""
+    total_surface: np.ndarray
+    max_building_surface: np.ndarray
+    max_occupation_surface: np.ndarray
+    allowed_floors: np.ndarray
+    max_height: np.ndarray
+    constructibility_utilization: np.ndarray
+    dwelling_units_max: np.ndarray
+    approved: np.ndarray
+    rejection_reasons: List[List[str]]
+    rules_version: Optional[str] = None
+    regulation_zones: Optional[List[Optional[str]]] = None  # zona del Plan Regulador aplicada por terreno
+
+    def __len__(self) -> int:
+        return len(self.total_surface)
+
+    @property
+    def compliance_status(self) -> List[str]:
+        return ["APROBADO" if ok else "RECHAZADO" for ok in self.approved.tolist()]
+
+    def row(self, index: int) -> CabidaCalculation:
+        """Resultado de un terreno, igual al de ``calculate_cabida``"""
+        return CabidaCalculation(
+            total_surface=float(self.total_surface[index]),
+            max_building_surface=float(self.max_building_surface[index]),
+            max_occupation_surface=float(self.max_occupation_surface[index]),
+            allowed_floors=int(self.allowed_floors[index]),
+            max_height=float(self.max_height[index]),
+            constructibility_utilization=float(self.constructibility_utilization[index]),
+            dwelling_units_max=int(self.dwelling_units_max[index]),
+            compliance_status="APROBADO" if self.approved[index] else "RECHAZADO",
+            rejection_reasons=tuple(self.rejection_reasons[index]),
+            rules_version=self.rules_version,
+            regulation_zone=self.regulation_zones[index] if self.regulation_zones else None,
+        )
+
+    def to_columns(self) -> Dict[str, list]:
+        """Columnas como listas de Python (serializables a JSON)"""
+        return {
+            "total_surface": self.total_surface.tolist(),
+            "max_building_surface": self.max_building_surface.tolist(),
+            "max_occupation_surface": self.max_occupation_surface.tolist(),
+            "allowed_floors": self.allowed_floors.tolist(),
+            "max_height": self.max_height.tolist(),
+            "constructibility_utilization": self.constructibility_utilization.tolist(),
+            "dwelling_units_max": self.dwelling_units_max.tolist(),
+            "compliance_status": self.compliance_status,
+            "rejection_reasons": self.rejection_reasons,
+            "regulation_zone": self.regulation_zones or [None] * len(self),
         }
+
+class OGUCCalculator:
+    def __init__(self, rules: Optional[RuleSet] = None, regulations: Optional[RegulationDataset] = None):
+        # Reglas OGUC vigentes (tablas versionadas, recargables sin reiniciar)
+        self.rules = rules or get_rule_set()
+        # Límites del Plan Regulador Comunal por comuna y zona (None si no hay dataset)
+        self.regulations = regulations or get_regulation_dataset()
         
+    def local_zone(self, params: OGUCParameters) -> Optional[RegulationZone]:
+        """Zona del Plan Regulador que corresponde a la comuna y zona de los parámetros"""
+        return self._lookup_zone(params.comuna, params.zona)
+    
+    def _lookup_zone(self, comuna: Optional[str], zona: Optional[str]) -> Optional[RegulationZone]:
+        if self.regulations is None:
+            return None
+        return self.regulations.lookup(comuna, zona)
+    
+    def zone_rules(
+        self,
+        zone_type: str,
+        comuna: Optional[str] = None,
+        zona: Optional[str] = None,
+    ) -> Tuple[Tuple[CompiledRule, ...], Optional[RegulationZone]]:
+        """Reglas de la zona, con los límites del Plan Regulador si la comuna y zona coinciden"""
+        local_zone = self._lookup_zone(comuna, zona)
+        if local_zone is None:
+            return self.rules.rules_for(zone_type), None
+        limits = local_zone.limits()
+        return self.rules.local_rules(zone_type, (local_zone.comuna, local_zone.zona), limits), local_zone
+    
+    @property
+    def dependencies(self) -> Dict[str, FrozenSet[str]]:
+        """``OUTPUT_DEPENDENCIES`` más "compliance", según los parámetros de las reglas cargadas"""
+        return {**OUTPUT_DEPENDENCIES, "compliance": self.rules.parameters | ZONE_PARAMETERS}
+    
     def calculate_cabida(self, params: OGUCParameters) -> CabidaCalculation:
         """Calcula la cabida según normativa OGUC"""
+        return CabidaCalculation(
+            **self._surfaces(params),
+            **self._compliance(params),
+            rules_version=self.rules.version
+        )
+    
+    def recalculate(self, previous: CabidaCalculation, params: OGUCParameters, changed: Iterable[str]) -> CabidaCalculation:
+        """Resultado de ``calculate_cabida`` tras cambiar los parámetros ``changed``.
         
-        # Validaciones básicas
-        rejection_reasons = []
-        
-        # 1. Validar superficie mínima
-        if params.surface_area < self.min_dwelling_area:
-            rejection_reasons.append(f"Superficie del terreno ({params.surface_area}m²) inferior al mínimo legal ({self.min_dwelling_area}m²)")
-        
-        # 2. Validar coeficiente de constructibilidad
-        if params.constructibility_coef <= 0 or params.constructibility_coef > 3.0:
-            rejection_reasons.append(f"Coeficiente de constructibilidad ({params.constructibility_coef}) fuera de rango válido (0.1 - 3.0)")
-        
-        # 3. Validar altura máxima
-        if params.max_height > 50.0:  # Límite razonable para Chile
-            rejection_reasons.append(f"Altura máxima ({params.max_height}m) excede límites razonables (50m)")
-        
-        # 4. Validar porcentaje de ocupación
-        max_occupation = self.max_occupation_by_zone.get(params.zone_type.lower(), 0.6)
-        if params.occupation_percentage > (max_occupation * 100):
-            rejection_reasons.append(f"Porcentaje de ocupación ({params.occupation_percentage}%) excede máximo para zona {params.zone_type} ({max_occupation * 100}%)")
-        
-        # Cálculos
+        Solo se recalculan los campos que dependen de ellos (ver
+        ``dependencies``); en particular, las reglas y la búsqueda en
+        el Plan Regulador se omiten si no cambió ningún parámetro que usen.
+        ``previous`` debe haberse calculado con estas mismas reglas.
+        """
+        changed = set(changed)
+        affected = [name for name, dependencies in self.dependencies.items() if dependencies & changed]
+        updates = {}
+        if any(name != "compliance" for name in affected):
+            surfaces = self._surfaces(params)
+            updates.update((name, surfaces[name]) for name in affected if name in surfaces)
+        if "compliance" in affected:
+            updates.update(self._compliance(params))
+        return previous._replace(**updates) if updates else previous
+    
+    def _surfaces(self, params: OGUCParameters) -> Dict[str, float]:
+        """Campos numéricos del cálculo de cabida"""
         max_building_surface = params.surface_area * params.constructibility_coef
         max_occupation_surface = params.surface_area * (params.occupation_percentage / 100)
         
         # Calcular pisos permitidos según altura
-        floor_height = 2.6  # Altura estándar por piso en Chile
-        allowed_floors_by_height = min(params.floors, int(params.max_height / floor_height))
+        allowed_floors_by_height = min(params.floors, int(params.max_height / self.rules.floor_height))
         
         # Calcular unidades de vivienda máximas
         dwelling_units_max = int(max_building_surface / params.min_dwelling_area)
@@ -73,21 +184,153 @@ class OGUCCalculator:
         else:
             constructibility_utilization = 0
         
-        # Determinar estado de cumplimiento
-        compliance_status = "APROBADO" if not rejection_reasons else "RECHAZADO"
+        return {
+            "total_surface": params.surface_area,
+            "max_building_surface": max_building_surface,
+            "max_occupation_surface": max_occupation_surface,
+            "allowed_floors": allowed_floors_by_height,
+            "max_height": params.max_height,
+            "constructibility_utilization": constructibility_utilization,
+            "dwelling_units_max": dwelling_units_max,
+        }
+    
+    def _compliance(self, params: OGUCParameters) -> Dict[str, object]:
+        """Estado de cumplimiento, motivos de rechazo y zona del Plan Regulador aplicada"""
         
-        return CabidaCalculation(
-            total_surface=params.surface_area,
+        # Validaciones básicas (con los límites del Plan Regulador si la comuna y zona coinciden)
+        values = {name: getattr(params, name) for name in RULE_PARAMETERS}
+        rules, local_zone = self.zone_rules(params.zone_type, params.comuna, params.zona)
+        zone_label = local_zone.label if local_zone else params.zone_type
+        rejection_reasons = tuple(self.rules.rejection_reasons(values, zone_label, rules))
+        
+        return {
+            "compliance_status": "APROBADO" if not rejection_reasons else "RECHAZADO",
+            "rejection_reasons": rejection_reasons,
+            "regulation_zone": local_zone.label if local_zone else None,
+        }
+    
+    def rejection_reasons(self, values: Mapping[str, float], zone_type: str) -> List[str]:
+        """Motivos de rechazo de un terreno (parámetros por nombre) según las reglas OGUC"""
+        return self.rules.rejection_reasons(values, zone_type)
+    
+    def calculate_cabida_batch(
+        self,
+        surface_area: Column,
+        floors: Column,
+        max_height: Column,
+        constructibility_coef: Column,
+        occupation_percentage: Column,
+        zone_type: Column,
+        min_dwelling_area: Column = 40.0,
+        with_reasons: bool = True,
+        comuna: Optional[Column] = None,
+        zona: Optional[Column] = None,
+    ) -> CabidaBatch:
+        """Calcula la cabida de muchos terrenos a la vez, con las reglas de ``calculate_cabida``.
+        
+        Cada argumento es una columna (un valor por terreno) o un escalar
+        común a todos. Las reglas y los cálculos se evalúan sobre arreglos
+        NumPy en una sola pasada; los textos de rechazo se generan solo
+        para los terrenos rechazados (y se omiten con ``with_reasons=False``).
+        ``comuna`` y ``zona`` aplican los límites del Plan Regulador a los
+        terrenos cuya zona está en el dataset, como en ``calculate_cabida``.
+        """
+        columns = np.broadcast_arrays(
+            np.asarray(surface_area, dtype=np.float64),
+            np.asarray(floors, dtype=np.int64),
+            np.asarray(max_height, dtype=np.float64),
+            np.asarray(constructibility_coef, dtype=np.float64),
+            np.asarray(occupation_percentage, dtype=np.float64),
+            np.asarray(min_dwelling_area, dtype=np.float64),
+            np.asarray(zone_type, dtype=str),
+            np.asarray(comuna, dtype=object),
+            np.asarray(zona, dtype=object),
+        )
+        surface, requested_floors, height, coef, occupation, dwelling_area, zones, comunas, zonas = (
+            np.atleast_1d(column).ravel() for column in columns
+        )
+        if np.any(dwelling_area <= 0):
+            raise ValueError("La superficie mínima por vivienda debe ser mayor que 0")
+        
+        values = {
+            "surface_area": surface,
+            "floors": requested_floors,
+            "max_height": height,
+            "constructibility_coef": coef,
+            "occupation_percentage": occupation,
+        }
+        rule_groups, group_rules, regulation_zones = self._local_rule_groups(zones, comunas, zonas)
+        approved = ~self.rules.violations_mask(values, rule_groups, group_rules)
+        
+        max_building_surface = surface * coef
+        max_occupation_surface = surface * (occupation / 100)
+        allowed_floors = np.minimum(requested_floors, np.trunc(height / self.rules.floor_height).astype(np.int64))
+        dwelling_units_max = np.trunc(max_building_surface / dwelling_area).astype(np.int64)
+        
+        coefficient_surface = surface * coef
+        usable = coefficient_surface > 0
+        constructibility_utilization = np.zeros_like(surface)
+        constructibility_utilization[usable] = (
+            max_building_surface[usable] / coefficient_surface[usable]
+        ) * 100
+        
+        rejection_reasons: List[List[str]] = [[] for _ in range(len(surface))]
+        for index in (np.flatnonzero(~approved).tolist() if with_reasons else ()):
+            local_zone = regulation_zones[index] if regulation_zones else None
+            rejection_reasons[index] = self.rules.rejection_reasons(
+                {name: column[index].item() for name, column in values.items()},
+                local_zone or str(zones[index]),
+                group_rules.get(str(rule_groups[index])),
+            )
+        
+        return CabidaBatch(
+            total_surface=surface,
             max_building_surface=max_building_surface,
             max_occupation_surface=max_occupation_surface,
-            allowed_floors=allowed_floors_by_height,
-            max_height=params.max_height,
+            allowed_floors=allowed_floors,
+            max_height=height,
             constructibility_utilization=constructibility_utilization,
             dwelling_units_max=dwelling_units_max,
-            compliance_status=compliance_status,
-            rejection_reasons=rejection_reasons
+            approved=approved,
+            rejection_reasons=rejection_reasons,
+            rules_version=self.rules.version,
+            regulation_zones=regulation_zones,
         )
     
+    def _local_rule_groups(
+        self,
+        zones: np.ndarray,
+        comunas: np.ndarray,
+        zonas: np.ndarray,
+    ) -> Tuple[np.ndarray, Dict[str, Tuple[CompiledRule, ...]], Optional[List[Optional[str]]]]:
+        """Grupo de reglas de cada terreno, reglas locales por grupo y zona del Plan Regulador aplicada.
+        
+        Los terrenos sin coincidencia en el Plan Regulador quedan en el grupo
+        de su tipo de zona; la búsqueda se hace una vez por combinación
+        distinta de tipo de zona, comuna y zona.
+        """
+        if self.regulations is None or all(value is None for value in comunas.tolist()):
+            return zones, {}, None
+        
+        keys = zones
+        for column in (comunas, zonas):
+            keys = np.char.add(np.char.add(keys, "|"), column.astype(str))
+        unique_keys, first, key_index = np.unique(keys, return_index=True, return_inverse=True)
+        
+        group_rules: Dict[str, Tuple[CompiledRule, ...]] = {}
+        labels: List[Optional[str]] = []
+        for key, row in zip(unique_keys.tolist(), first.tolist()):
+            rules, local_zone = self.zone_rules(str(zones[row]), comunas[row], zonas[row])
+            if local_zone is not None:
+                group_rules[key] = rules
+            labels.append(local_zone.label if local_zone else None)
+        if not group_rules:
+            return zones, {}, None
+        
+        is_local = np.array([label is not None for label in labels])[key_index]
+        rule_groups = np.where(is_local, keys, zones)
+        return rule_groups, group_rules, np.array(labels, dtype=object)[key_index].tolist()
+    
     def validate_dwelling_requirements(self, dwelling_area: float, min_required: float = 40.0) -> bool:
         """Valida si una vivienda cumple con mínimos requeridos"""
         return dwelling_area >= min_required
@@ -100,26 +343,4 @@ class OGUCCalculator:
     
     def get_zone_restrictions(self, zone_type: str) -> Dict:
         """Obtiene restricciones específicas por tipo de zona"""
-        restrictions = {
-            "residencial": {
-                "max_height": 23.0,
-                "max_constructibility": 2.0,
-                "max_occupation": 0.6
-            },
-            "comercial": {
-                "max_height": 30.0,
-                "max_constructibility": 3.0,
-                "max_occupation": 0.8
-            },
-            "industrial": {
-                "max_height": 25.0,
-                "max_constructibility": 2.5,
-                "max_occupation": 0.7
-            },
-            "mixto": {
-                "max_height": 28.0,
-                "max_constructibility": 2.5,
-                "max_occupation": 0.7
-            }
-        }
-        return restrictions.get(zone_type.lower(), restrictions["residencial"])
+        return self.rules.zone_restrictions(zone_type)
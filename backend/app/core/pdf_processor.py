@@ -1,11 +1,52 @@
 import fitz  # PyMuPDF
 import pytesseract
 from PIL import Image
+from abc import ABC, abstractmethod
 import io
-import re
-from typing import Dict, Optional, List
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from typing import Callable, Deque, Dict, Iterator, NamedTuple, Optional, List, Tuple, Union
 from pydantic import BaseModel
 
+from app.core.certificate_scanner import REQUIRED_KEYWORDS, ScanResult, get_scanner
+from app.core.image_preprocessing import preprocess_image
+from app.core.layout_templates import Box, crop_box, load_templates
+from app.core.config import settings
+
+# Incrementar cuando cambie la lógica de extracción: invalida el cache de extracciones
+EXTRACTOR_VERSION = "7"
+
+logger = logging.getLogger(__name__)
+
+OCR_LANGUAGE = 'spa'
+
+# Contenido de un archivo: bytes en memoria o ruta a un archivo en disco
+FileSource = Union[bytes, str]
+
+# Campos que usan el cálculo y la validación: al encontrarlos se deja de leer el PDF
+REQUIRED_FIELDS = (
+    'rol',
+    'comuna',
+    'superficie_terreno',
+    'zona',
+    'altura_maxima',
+    'coeficiente_constructibilidad',
+    'porcentaje_ocupacion',
+)
+
+
+class PDFPage(NamedTuple):
+    index: int
+    text: str
+    ocr: bool
+
 class CertificateData(BaseModel):
     rol: Optional[str] = None
     comuna: Optional[str] = None
@@ -17,6 +58,8 @@ class CertificateData(BaseModel):
     altura_maxima: Optional[float] = None
     coeficiente_constructibilidad: Optional[float] = None
     porcentaje_ocupacion: Optional[float] = None
+    coordenadas: Optional[str] = None  # DMS tal como aparecen ("33°26'15S 70°39'02W")
+    zonificacion: Optional[dict] = None  # zona y límites según las coordenadas (ver zoning_index)
     raw_text: Optional[str] = None
 
 class PDFProcessor:
@@ -34,114 +77,573 @@ class PDFProcessor:
             'coeficiente_constructibilidad': r'Coeficiente\s*de\s*constructibilidad:\s*([\d.,]+)',
             'porcentaje_ocupacion': r'Porcentaje\s*de\s*ocupación:\s*([\d.,]+)%'
         }
+        # Todos los patrones compilados en un único scanner de una pasada
+        self.scanner = get_scanner(self.patterns)
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extrae todo el texto de un PDF"""
+    def iter_pdf_pages(self, pdf_content: FileSource) -> Iterator[PDFPage]:
+        """Genera el texto de cada página del PDF, en orden y de a una.
+        
+        Con una ruta, PyMuPDF lee el archivo directamente sin copiarlo a
+        memoria. En modo híbrido, las páginas sin capa de texto utilizable (PDF
+        escaneados) se renderizan y se procesan con OCR en paralelo, con una
+        ventana de lectura anticipada de ``ocr_page_workers`` páginas. Si el
+        consumidor deja de iterar, no se abren más páginas.
+        """
         try:
-            doc = fitz.open(stream=pdf_content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+            doc = open_pdf(pdf_content)
+        except Exception as e:
+            raise ValueError(f"Error procesando PDF: {str(e)}")
+        
+        window = max(1, settings.ocr_page_workers)
+        pending: Deque[Tuple[int, Union[str, Future]]] = deque()
+        try:
+            for index in range(doc.page_count):
+                page = doc[index]
+                page_text = page.get_text()
+                if settings.pdf_hybrid_ocr and needs_ocr(page_text):
+                    # PyMuPDF no es thread-safe sobre un mismo documento: se
+                    # renderiza en este hilo y el OCR (subproceso de Tesseract)
+                    # corre en el pool.
+                    pending.append((index, get_page_executor().submit(self.ocr_image, render_page(page))))
+                else:
+                    pending.append((index, page_text))
+                
+                # Entregar en orden las páginas listas, sin adelantarse más que la ventana
+                while pending and (isinstance(pending[0][1], str) or pending[0][1].done() or len(pending) > window):
+                    yield _resolve_page(pending.popleft())
+            
+            while pending:
+                yield _resolve_page(pending.popleft())
+        except ValueError:
+            raise
         except Exception as e:
             raise ValueError(f"Error procesando PDF: {str(e)}")
+        finally:
+            for _, page_result in pending:
+                if isinstance(page_result, Future):
+                    page_result.cancel()
+            doc.close()
+    
+    def extract_text_from_pdf(self, pdf_content: FileSource) -> str:
+        """Extrae todo el texto de un PDF (bytes o ruta en disco)"""
+        return "".join(page.text for page in self.iter_pdf_pages(pdf_content))
+    
+    def extract_pdf_certificate(self, pdf_content: FileSource, keep_raw_text: bool = False) -> Tuple[ScanResult, Optional[str]]:
+        """Analiza un PDF página a página con el scanner.
+        
+        Salvo que se pida el texto completo, deja de leer páginas en cuanto
+        se encontraron todos los campos requeridos y las palabras clave del
+        CIP: el costo depende de dónde están los datos, no del largo del
+        documento.
+        """
+        scan = ScanResult()
+        pages: Optional[List[str]] = [] if keep_raw_text else None
+        
+        for page in self.iter_pdf_scan(pdf_content, scan, early_exit=not keep_raw_text):
+            if pages is not None:
+                pages.append(page.text)
+        
+        return scan, "".join(pages) if pages is not None else None
+    
+    def iter_pdf_scan(self, pdf_content: FileSource, scan: ScanResult, early_exit: bool = True) -> Iterator[PDFPage]:
+        """Genera cada página ya analizada, acumulando los hallazgos en ``scan``.
+        
+        Con ``early_exit`` (y ``pdf_early_exit`` activo) termina tras la
+        página que completa los datos requeridos.
+        """
+        early_exit = early_exit and settings.pdf_early_exit
+        
+        with closing(self.iter_pdf_pages(pdf_content)) as page_iter:
+            for page in page_iter:
+                self.scanner.scan(page.text, scan)
+                yield page
+                if early_exit and self.has_required_data(scan):
+                    return
     
-    def extract_text_from_image(self, image_content: bytes) -> str:
-        """Extrae texto de una imagen usando OCR"""
+    def iter_certificate_progress(self, file_content: FileSource, filename: str) -> Iterator[Tuple[str, object]]:
+        """Procesa un certificado generando eventos de progreso.
+        
+        Eventos: ``("page", PDFPage)`` por cada página (una para imágenes),
+        ``("fields", dict)`` con los campos nuevos encontrados en esa página
+        y, al final, ``("certificate", CertificateData)``. Lanza ValueError
+        si el documento no es un CIP.
+        """
+        scan = ScanResult()
+        if filename.lower().endswith('.pdf'):
+            pages = self.iter_pdf_scan(file_content, scan)
+        elif filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+            def image_pages() -> Iterator[PDFPage]:
+                text = self.extract_text_from_image(file_content)
+                self.scanner.scan(text, scan)
+                yield PDFPage(index=0, text=text, ocr=True)
+            pages = image_pages()
+        else:
+            raise ValueError("Formato de archivo no soportado")
+        
+        reported: Dict[str, object] = {}
+        with closing(pages):
+            for page in pages:
+                yield "page", page
+                new_fields = {name: value for name, value in scan.fields.items() if name not in reported}
+                if new_fields:
+                    reported.update(new_fields)
+                    yield "fields", new_fields
+        
+        if not scan.is_certificate:
+            raise ValueError("El documento no parece ser un Certificado de Informaciones Previas válido")
+        
+        yield "certificate", self.extract_certificate_data(None, scan)
+    
+    def has_required_data(self, scan: ScanResult) -> bool:
+        """Indica si el recorrido ya encontró los campos requeridos y todas las palabras clave"""
+        return (
+            len(scan.keywords) == len(REQUIRED_KEYWORDS)
+            and all(field in scan.resolved for field in REQUIRED_FIELDS)
+        )
+    
+    def ocr_image(self, image: Image.Image) -> str:
+        """Ejecuta OCR sobre una imagen ya decodificada"""
+        return get_ocr_pool().run(image)
+    
+    def ocr_page_image(self, image: Image.Image) -> str:
+        """OCR de una hoja completa del certificado.
+        
+        Con ``ocr_layout_templates`` solo se procesan las regiones del
+        formato reconocido (ver ``layout_templates``); la hoja entera se
+        procesa únicamente si ningún formato coincide.
+        """
+        if settings.ocr_layout_templates:
+            text = self.ocr_layout_regions(image)
+            if text is not None:
+                ocr_metrics.add("layout_matches")
+                return text
+            ocr_metrics.add("layout_fallbacks")
+        return self.ocr_image(image)
+    
+    def ocr_layout_regions(self, image: Image.Image) -> Optional[str]:
+        """Texto de las regiones del formato cuyo encabezado coincide, o None.
+        
+        El resultado se acepta si es un CIP y contiene todos los campos que
+        el formato declara en sus regiones o, aunque falte alguno de ellos,
+        todos los ``REQUIRED_FIELDS``: en ese caso el OCR de la hoja completa
+        no aportaría nada a la extracción.
+        """
+        headers: Dict[Box, str] = {}
+        for template in load_templates(settings.ocr_layout_templates_path):
+            if template.header not in headers:
+                headers[template.header] = self.ocr_image(crop_box(image, template.header))
+            if not template.matches(headers[template.header]):
+                continue
+            
+            parts = [headers[template.header]]
+            parts.extend(self.ocr_image(crop_box(image, region.box)) for region in template.regions)
+            text = "\n".join(parts)
+            scan = self.scan_text(text)
+            if scan.is_certificate and any(
+                all(field in scan.resolved for field in fields) for fields in (template.fields, REQUIRED_FIELDS)
+            ):
+                return text
+            logger.debug("Formato %s reconocido pero sin todos sus campos: OCR de la hoja completa", template.name)
+            return None
+        return None
+    
+    def extract_text_from_image(self, image_content: FileSource) -> str:
+        """Extrae texto de una imagen (bytes o ruta en disco) usando OCR.
+        
+        Con ``ocr_preprocess`` la imagen se reduce, binariza y endereza antes
+        del OCR (ver ``image_preprocessing``); luego se procesa con
+        ``ocr_page_image``.
+        """
         try:
-            image = Image.open(io.BytesIO(image_content))
-            text = pytesseract.image_to_string(image, lang='spa')
+            image = Image.open(image_content if isinstance(image_content, str) else io.BytesIO(image_content))
+            if settings.ocr_preprocess:
+                prepared = preprocess_image(image)
+                logger.debug(
+                    "Preprocesamiento OCR %s -> %s (inclinación %.1f°): %s",
+                    prepared.original_size, prepared.image.size, prepared.skew_angle,
+                    ", ".join(f"{step}={ms:.1f}ms" for step, ms in prepared.timings.items()),
+                )
+                image = prepared.image
+            text = self.ocr_page_image(image)
             return text
         except Exception as e:
             raise ValueError(f"Error procesando imagen con OCR: {str(e)}")
     
-    def extract_certificate_data(self, text: str) -> CertificateData:
+    def scan_text(self, text: str) -> ScanResult:
+        """Recorre el texto una sola vez localizando campos, palabras clave y datos adicionales"""
+        return self.scanner.scan(text)
+    
+    def extract_certificate_data(self, text: Optional[str], scan: Optional[ScanResult] = None) -> CertificateData:
         """Extrae datos estructurados del texto del certificado"""
-        data = CertificateData(raw_text=text)
-        
-        for field, pattern in self.patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = match.group(1).strip()
-                
-                # Limpiar y convertir valores numéricos
-                if field in [
-                    'superficie_terreno',
-                    'altura_maxima',
-                    'coeficiente_constructibilidad',
-                    'porcentaje_ocupacion'
-                ]:
-                    value = value.replace(',', '.')
-                    try:
-                        numeric_value = float(value)
-                        setattr(data, field, numeric_value)
-                    except ValueError:
-                        continue
-                else:
-                    setattr(data, field, value)
-        
-        return data
+        if scan is None:
+            scan = self.scan_text(text)
+        return CertificateData(raw_text=text, coordenadas=scan.additional.get('coordinates'), **scan.fields)
     
     def validate_certificate_format(self, text: str) -> bool:
         """Valida si el texto corresponde a un Certificado de Informaciones Previas"""
-        required_keywords = [
-            'certificado de informaciones previas',
-            'municipalidad',
-            'rol',
-            'superficie'
-        ]
-        
-        text_lower = text.lower()
-        keyword_matches = sum(keyword in text_lower for keyword in required_keywords)
-
-        # Exigir la frase principal y al menos 3 de 4 indicadores base para
-        # reducir falsos positivos de documentos no CIP.
-        return (
-            'certificado de informaciones previas' in text_lower
-            and keyword_matches >= 3
-        )
+        return self.scan_text(text).is_certificate
     
-    def process_file(self, file_content: bytes, filename: str) -> CertificateData:
-        """Procesa un archivo (PDF o imagen) y extrae datos del certificado"""
+    def process_file(self, file_content: FileSource, filename: str, keep_raw_text: bool = False) -> CertificateData:
+        """Procesa un archivo (PDF o imagen, bytes o ruta) y extrae datos del certificado.
+        
+        ``raw_text`` solo se incluye si ``keep_raw_text`` es verdadero; en
+        ese caso se leen todas las páginas del PDF.
+        """
         
-        # Determinar tipo de archivo
+        # Determinar tipo de archivo; validar formato y extraer datos en un único recorrido
         if filename.lower().endswith('.pdf'):
-            text = self.extract_text_from_pdf(file_content)
+            scan, text = self.extract_pdf_certificate(file_content, keep_raw_text)
         elif filename.lower().endswith(('.jpg', '.jpeg', '.png')):
             text = self.extract_text_from_image(file_content)
+            scan = self.scan_text(text)
+            if not keep_raw_text:
+                text = None
         else:
             raise ValueError("Formato de archivo no soportado")
         
-        # Validar que sea un certificado válido
-        if not self.validate_certificate_format(text):
+        if not scan.is_certificate:
             raise ValueError("El documento no parece ser un Certificado de Informaciones Previas válido")
         
         # Extraer datos estructurados
-        certificate_data = self.extract_certificate_data(text)
+        certificate_data = self.extract_certificate_data(text, scan)
         
         return certificate_data
     
     def extract_additional_data(self, text: str) -> Dict:
-        """Extrae datos adicionales que puedan ser útiles"""
-        additional_data = {}
-        
-        # Buscar coordenadas o referencias geográficas
-        coord_pattern = r'(\d+°\d+\'\d+[NS])\s*(\d+°\d+\'\d+[WE])'
-        coord_match = re.search(coord_pattern, text)
-        if coord_match:
-            additional_data['coordinates'] = f"{coord_match.group(1)} {coord_match.group(2)}"
-        
-        # Buscar fecha del certificado
-        date_pattern = r'(\d{1,2})\s*de\s*(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)\s*de\s*(\d{4})'
-        date_match = re.search(date_pattern, text, re.IGNORECASE)
-        if date_match:
-            additional_data['certificate_date'] = f"{date_match.group(1)} {date_match.group(2)} {date_match.group(3)}"
-        
-        # Buscar número de certificado
-        cert_number_pattern = r'N[°o]\s*(\d+/\d{4})'
-        cert_match = re.search(cert_number_pattern, text)
-        if cert_match:
-            additional_data['certificate_number'] = cert_match.group(1)
-        
-        return additional_data
+        """Extrae datos adicionales que puedan ser útiles (coordenadas, fecha, número de certificado)"""
+        return dict(self.scan_text(text).additional)
+
+
+def open_pdf(source: FileSource) -> fitz.Document:
+    """Abre un PDF desde una ruta (sin copia en memoria) o desde bytes"""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _resolve_page(entry: Tuple[int, Union[str, Future]]) -> PDFPage:
+    index, pending = entry
+    if isinstance(pending, str):
+        return PDFPage(index=index, text=pending, ocr=False)
+    return PDFPage(index=index, text=pending.result(), ocr=True)
+
+
+def needs_ocr(page_text: str) -> bool:
+    """Indica si una página carece de capa de texto utilizable"""
+    return len(page_text.strip()) < settings.ocr_min_page_chars
+
+
+def render_page(page: fitz.Page) -> Image.Image:
+    """Renderiza una página PDF en escala de grises a la resolución de OCR"""
+    pixmap = page.get_pixmap(dpi=settings.ocr_render_dpi, colorspace=fitz.csGRAY, alpha=False)
+    return Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+
+
+class OCREngine(ABC):
+    """Motor de OCR reutilizable entre imágenes"""
+    name = "base"
+
+    def __init__(self):
+        self.jobs = 0
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        """Texto reconocido en ``image``"""
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OCREngine):
+    """Respaldo: un subproceso ``tesseract`` por imagen (recarga el modelo en cada llamada)"""
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=OCR_LANGUAGE)
+
+
+class TesserocrEngine(OCREngine):
+    """API de Tesseract en el mismo proceso: el modelo ``spa`` se carga una sola vez"""
+    name = "tesserocr"
+
+    def __init__(self):
+        super().__init__()
+        import tesserocr
+
+        kwargs = {"lang": OCR_LANGUAGE}
+        if settings.tessdata_dir:
+            kwargs["path"] = settings.tessdata_dir
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self._api.SetImage(image)
+        return self._api.GetUTF8Text()
+
+    def close(self) -> None:
+        self._api.End()
+
+
+OCR_BACKENDS = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+
+def resolve_ocr_backend() -> str:
+    """Backend de OCR efectivo: ``auto`` usa tesserocr si está instalado"""
+    backend = settings.ocr_backend
+    if backend == "auto":
+        try:
+            import tesserocr  # noqa: F401
+            return TesserocrEngine.name
+        except ImportError:
+            return PytesseractEngine.name
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Backend de OCR no soportado: {backend}")
+    return backend
+
+
+class OCRMetrics:
+    """Contadores del pool de motores OCR compartidos entre procesos.
+
+    Se crean en el proceso principal y se heredan por los workers del pool
+    de extracción, de modo que ``/metrics`` ve el agregado de todos ellos.
+    """
+    FIELDS = (
+        "jobs", "failures", "engines_created", "engines_recycled", "in_use", "waits", "wait_ms",
+        "pixels", "layout_matches", "layout_fallbacks",
+    )
+
+    def __init__(self, start_method: Optional[str] = None):
+        context = multiprocessing.get_context(start_method) if start_method else multiprocessing
+        self._values = context.Array("d", len(self.FIELDS))
+
+    def add(self, name: str, amount: float = 1) -> None:
+        index = self.FIELDS.index(name)
+        with self._values.get_lock():
+            self._values[index] += amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._values.get_lock():
+            values = dict(zip(self.FIELDS, self._values[:]))
+        jobs = values["jobs"]
+        snapshot = {name: int(value) for name, value in values.items() if name != "wait_ms"}
+        snapshot["avg_wait_ms"] = values["wait_ms"] / jobs if jobs else 0.0
+        return snapshot
+
+
+class OCREnginePool:
+    """Pool de motores OCR de larga vida, inicializados de antemano.
+
+    Cada motor atiende una imagen a la vez. Un motor se recicla (se cierra
+    y se crea otro) tras ``max_jobs`` imágenes, para acotar el crecimiento
+    de memoria de Tesseract, y se descarta si falla.
+    """
+
+    def __init__(self, factory: Callable[[], OCREngine], size: int, max_jobs: int, metrics: OCRMetrics):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.metrics = metrics
+        self._idle: "queue.LifoQueue[OCREngine]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def warm(self) -> None:
+        """Crea e inicializa todos los motores antes de la primera imagen"""
+        engines = [self._create() for _ in range(self.size - self._idle.qsize())]
+        for engine in engines:
+            self._idle.put(engine)
+
+    def run(self, image: Image.Image) -> str:
+        """Ejecuta OCR con un motor libre, esperando si todos están ocupados"""
+        with self._acquire() as engine:
+            self.metrics.add("pixels", image.width * image.height)
+            return engine.image_to_string(image)
+
+    @contextmanager
+    def _acquire(self) -> Iterator[OCREngine]:
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self.metrics.add("waits")
+            self._slots.acquire()
+        self.metrics.add("wait_ms", (time.perf_counter() - start) * 1000)
+
+        engine = None
+        try:
+            try:
+                engine = self._idle.get_nowait()
+            except queue.Empty:
+                engine = self._create()
+
+            self.metrics.add("in_use")
+            try:
+                yield engine
+            except Exception:
+                self.metrics.add("failures")
+                self._discard(engine)
+                engine = None
+                raise
+            finally:
+                self.metrics.add("in_use", -1)
+                self.metrics.add("jobs")
+
+            engine.jobs += 1
+            if self.max_jobs and engine.jobs >= self.max_jobs:
+                self.metrics.add("engines_recycled")
+                self._discard(engine)
+            else:
+                self._idle.put(engine)
+        finally:
+            self._slots.release()
+
+    def _create(self) -> OCREngine:
+        engine = self.factory()
+        self.metrics.add("engines_created")
+        return engine
+
+    def _discard(self, engine: OCREngine) -> None:
+        try:
+            engine.close()
+        except Exception:
+            logger.warning("Error cerrando motor OCR", exc_info=True)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+ocr_metrics = OCRMetrics(settings.worker_start_method)
+_ocr_pool: Optional[OCREnginePool] = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _engine_factory() -> Callable[[], OCREngine]:
+    backend = resolve_ocr_backend()
+    if backend == PytesseractEngine.name:
+        return PytesseractEngine
+    try:
+        # Verificar que el backend inicializa (idioma y tessdata disponibles)
+        TesserocrEngine().close()
+        return TesserocrEngine
+    except Exception as e:
+        logger.warning("Motor %s no disponible, se usa pytesseract: %s", backend, e)
+        return PytesseractEngine
+
+
+def get_ocr_pool() -> OCREnginePool:
+    """Pool de motores OCR del proceso actual (se crea al primer uso)"""
+    global _ocr_pool
+    if _ocr_pool is None:
+        with _ocr_pool_lock:
+            if _ocr_pool is None:
+                configure_tesseract()
+                _ocr_pool = OCREnginePool(
+                    factory=_engine_factory(),
+                    size=settings.ocr_engine_pool_size,
+                    max_jobs=settings.ocr_engine_max_jobs,
+                    metrics=ocr_metrics,
+                )
+    return _ocr_pool
+
+
+def ocr_stats() -> Dict[str, object]:
+    """Métricas del OCR: backend configurado y uso agregado de los motores"""
+    return {
+        "backend": resolve_ocr_backend(),
+        "pool_size": settings.ocr_engine_pool_size,
+        "max_jobs_per_engine": settings.ocr_engine_max_jobs,
+        **ocr_metrics.snapshot(),
+    }
+
+
+_worker_processor: Optional[PDFProcessor] = None
+_page_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_page_executor() -> ThreadPoolExecutor:
+    """Pool de hilos del proceso actual para OCR por página.
+    
+    Hilos (no procesos): el trabajo pesado ocurre en el subproceso de
+    Tesseract, y este código ya puede estar corriendo dentro de un worker
+    del pool de extracción.
+    """
+    global _page_executor
+    if _page_executor is None:
+        _page_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.ocr_page_workers),
+            thread_name_prefix="ocr-page",
+        )
+    return _page_executor
+
+
+def configure_tesseract() -> None:
+    """Aplica la ruta de Tesseract configurada en Settings, si existe"""
+    if settings.tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+    if settings.ocr_page_workers > 1:
+        # El paralelismo se logra por página: evitar que cada Tesseract
+        # compita además con sus propios hilos OpenMP.
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def init_ocr_worker(metrics: Optional[OCRMetrics] = None) -> None:
+    """Prepara el OCR de un worker: adopta las métricas compartidas y precalienta los motores"""
+    global ocr_metrics
+    if metrics is not None:
+        ocr_metrics = metrics
+    configure_tesseract()
+    get_ocr_pool().warm()
+
+
+def get_worker_processor() -> PDFProcessor:
+    """Retorna el PDFProcessor reutilizable del proceso actual"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = PDFProcessor()
+    return _worker_processor
+
+
+def process_file_job(file_content: FileSource, filename: str, keep_raw_text: bool = False) -> CertificateData:
+    """Tarea ejecutable en el pool de extracción: procesa un certificado completo"""
+    return get_worker_processor().process_file(file_content, filename, keep_raw_text)
+
+
+def stream_file_job(file_content: FileSource, filename: str, progress) -> CertificateData:
+    """Tarea ejecutable en el pool de extracción: procesa un certificado informando el avance.
+    
+    Envía a ``progress`` (una cola de ``WorkerPool.progress_queue``) los
+    eventos ``("page", dict)`` y ``("fields", dict)`` de
+    ``iter_certificate_progress`` y, al terminar con o sin error,
+    ``("done", None)``. El texto de las páginas no sale del worker.
+    """
+    certificate_data = None
+    try:
+        with closing(get_worker_processor().iter_certificate_progress(file_content, filename)) as events:
+            for event, payload in events:
+                if event == "page":
+                    progress.put(("page", {"index": payload.index, "ocr": payload.ocr, "chars": len(payload.text)}))
+                elif event == "fields":
+                    progress.put(("fields", payload))
+                else:
+                    certificate_data = payload
+    finally:
+        progress.put(("done", None))
+    return certificate_data
+
+
+def validate_file_job(file_content: FileSource, filename: str) -> Tuple[bool, Optional[CertificateData]]:
+    """Tarea ejecutable en el pool de extracción: valida formato y genera preview"""
+    processor = get_worker_processor()
+
+    if filename.lower().endswith('.pdf'):
+        scan, _ = processor.extract_pdf_certificate(file_content)
+    else:
+        scan = processor.scan_text(processor.extract_text_from_image(file_content))
+
+    if not scan.is_certificate:
+        return False, None
+
+    return True, processor.extract_certificate_data(None, scan)
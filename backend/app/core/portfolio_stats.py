@@ -0,0 +1,99 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# Tramos de 10 puntos del score de validación; 100 queda en el último
+SCORE_BINS = 10
+
+# Valores entre paréntesis de los mensajes ("Altura máxima (30m) excede ...")
+_MESSAGE_VALUES = re.compile(r"\s*\([^)]*\)")
+
+
+def normalize_reason(message: str) -> str:
+    """Motivo de rechazo sin los valores del terreno, para agrupar lotes con el mismo problema"""
+    return _MESSAGE_VALUES.sub("", message).strip()
+
+
+class PortfolioStats:
+    """Estadísticas de una cartera de terrenos, acumuladas lote a lote.
+
+    La memoria no depende del número de lotes: conteos, suma y extremos
+    del score, un histograma de ``SCORE_BINS`` tramos y a lo más
+    ``reason_capacity`` motivos de rechazo. Si aparecen más motivos
+    distintos, el nuevo reemplaza al menos frecuente y hereda su conteo
+    (algoritmo Space-Saving): los motivos frecuentes se conservan y su
+    conteo es exacto salvo que la capacidad se haya excedido.
+    """
+
+    def __init__(self, top_reasons: int = 10, reason_capacity: int = 256):
+        self.top_reasons = top_reasons
+        self.reason_capacity = max(1, reason_capacity)
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.failed = 0
+        self._score_sum = 0.0
+        self._score_min: Optional[float] = None
+        self._score_max: Optional[float] = None
+        self._histogram = [0] * SCORE_BINS
+        self._reasons: Dict[str, int] = {}
+        self._reasons_evicted = False
+
+    def add(self, is_valid: bool, score: float, reasons: Iterable[str] = ()) -> None:
+        """Registra un lote validado con sus mensajes de error"""
+        self.total += 1
+        if is_valid:
+            self.valid += 1
+        else:
+            self.invalid += 1
+
+        self._score_sum += score
+        self._score_min = score if self._score_min is None else min(self._score_min, score)
+        self._score_max = score if self._score_max is None else max(self._score_max, score)
+        self._histogram[min(SCORE_BINS - 1, max(0, int(score // (100 / SCORE_BINS))))] += 1
+
+        # Cada motivo cuenta una vez por lote
+        for reason in {normalize_reason(message) for message in reasons}:
+            self._count_reason(reason)
+
+    def add_failure(self) -> None:
+        """Registra un lote que no se pudo validar (línea inválida o certificado inexistente)"""
+        self.total += 1
+        self.failed += 1
+
+    def _count_reason(self, reason: str) -> None:
+        if reason in self._reasons:
+            self._reasons[reason] += 1
+        elif len(self._reasons) < self.reason_capacity:
+            self._reasons[reason] = 1
+        else:
+            least = min(self._reasons, key=self._reasons.get)
+            self._reasons[reason] = self._reasons.pop(least) + 1
+            self._reasons_evicted = True
+
+    def score_distribution(self) -> Dict[str, int]:
+        width = 100 // SCORE_BINS
+        labels = [f"{start}-{start + width}" for start in range(0, 100, width)]
+        return dict(zip(labels, self._histogram))
+
+    def most_common_reasons(self) -> List[Dict[str, Any]]:
+        ranked = sorted(self._reasons.items(), key=lambda item: (-item[1], item[0]))
+        return [{"reason": reason, "count": count} for reason, count in ranked[:self.top_reasons]]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estadísticas acumuladas hasta ahora"""
+        scored = self.valid + self.invalid
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "valid_rate": self.valid / scored if scored else 0.0,
+            "score": {
+                "mean": self._score_sum / scored if scored else None,
+                "min": self._score_min,
+                "max": self._score_max,
+                "distribution": self.score_distribution(),
+            },
+            "top_rejection_reasons": self.most_common_reasons(),
+            "rejection_reasons_approximate": self._reasons_evicted,
+        }
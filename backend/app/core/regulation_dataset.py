@@ -0,0 +1,223 @@
+import csv
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "plan_regulador.csv")
+
+# Límites de zona que el dataset puede definir (mismos nombres que las zonas de las reglas OGUC)
+LIMIT_COLUMNS = ("max_height", "max_constructibility", "max_occupation")
+
+_ZONE_PREFIX = re.compile(r'^zona\s+')
+
+
+class RegulationDatasetError(ValueError):
+    """El dataset del Plan Regulador no existe o no es válido"""
+
+
+class RegulationZone(NamedTuple):
+    """Límites de una zona del Plan Regulador Comunal"""
+    comuna: str
+    zona: str
+    max_height: Optional[float]
+    max_constructibility: Optional[float]
+    max_occupation: Optional[float]
+    descripcion: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.zona} ({self.comuna})"
+
+    def limits(self) -> Dict[str, float]:
+        """Límites definidos, por nombre (se omiten los vacíos)"""
+        return {name: getattr(self, name) for name in LIMIT_COLUMNS if getattr(self, name) is not None}
+
+
+def normalize_name(text: str) -> str:
+    """Clave de búsqueda: sin tildes, minúsculas y espacios colapsados ("Ñuñoa " -> "nunoa")"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def normalize_zone(text: str) -> str:
+    """Clave de zona: como ``normalize_name`` y sin el prefijo "Zona" del certificado"""
+    return _ZONE_PREFIX.sub('', normalize_name(text))
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    value = (value or "").strip()
+    return float(value) if value else None
+
+
+def build_regulation_db(csv_path: str, db_path: str) -> str:
+    """Compila el CSV del Plan Regulador a una base SQLite indexada por (comuna, zona).
+
+    La base se escribe en un archivo temporal y se reemplaza de forma
+    atómica, de modo que procesos que la estén leyendo no ven una versión a
+    medio escribir. Retorna la versión (hash del CSV).
+    """
+    version = _file_sha256(csv_path)
+    rows = []
+    try:
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                comuna, zona = (record.get("comuna") or "").strip(), (record.get("zona") or "").strip()
+                if not comuna or not zona:
+                    raise RegulationDatasetError(f"Línea {line}: se requieren comuna y zona")
+                rows.append((
+                    normalize_name(comuna), normalize_zone(zona), comuna, zona,
+                    *(_optional_float(record.get(name)) for name in LIMIT_COLUMNS),
+                    (record.get("descripcion") or "").strip() or None,
+                ))
+    except (OSError, ValueError, csv.Error) as e:
+        if isinstance(e, RegulationDatasetError):
+            raise
+        raise RegulationDatasetError(f"Error leyendo {csv_path}: {str(e)}")
+
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".sqlite", dir=directory)
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(tmp_path)
+        with connection:
+            connection.execute(
+                "CREATE TABLE prc_zones ("
+                " comuna_key TEXT NOT NULL, zona_key TEXT NOT NULL, comuna TEXT NOT NULL, zona TEXT NOT NULL,"
+                " max_height REAL, max_constructibility REAL, max_occupation REAL, descripcion TEXT,"
+                " PRIMARY KEY (comuna_key, zona_key)) WITHOUT ROWID"
+            )
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            try:
+                connection.executemany("INSERT INTO prc_zones VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            except sqlite3.IntegrityError:
+                raise RegulationDatasetError(f"{csv_path}: comuna y zona repetidas")
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("version", version), ("source", os.path.abspath(csv_path)), ("zones", str(len(rows)))],
+            )
+        connection.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info("Plan Regulador compilado: %d zonas desde %s", len(rows), csv_path)
+    return version
+
+
+def _db_version(db_path: str) -> Optional[str]:
+    if not os.path.exists(db_path):
+        return None
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+class RegulationDataset:
+    """Parámetros del Plan Regulador Comunal por comuna y zona, solo lectura.
+
+    Los datos viven en un archivo SQLite abierto en modo inmutable y
+    mapeado en memoria: los procesos que lo leen comparten las páginas del
+    sistema operativo en vez de cargar cada uno su copia. La búsqueda usa
+    la clave primaria (comuna, zona). Cada hilo usa su propia conexión.
+    """
+
+    def __init__(self, db_path: str, mmap_size: int = 64 * 1024 * 1024):
+        if not os.path.exists(db_path):
+            raise RegulationDatasetError(f"No existe el dataset {db_path}")
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._lookups = 0
+        self._matches = 0
+        meta = dict(self._connection().execute("SELECT key, value FROM meta").fetchall())
+        self.version = meta.get("version")
+        self.zone_count = int(meta.get("zones", 0))
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            self._local.connection = connection
+        return connection
+
+    def lookup(self, comuna: Optional[str], zona: Optional[str]) -> Optional[RegulationZone]:
+        """Zona del Plan Regulador para la comuna y zona del certificado, o None"""
+        if not comuna or not zona:
+            return None
+        row = self._connection().execute(
+            "SELECT comuna, zona, max_height, max_constructibility, max_occupation, descripcion"
+            " FROM prc_zones WHERE comuna_key = ? AND zona_key = ?",
+            (normalize_name(comuna), normalize_zone(zona)),
+        ).fetchone()
+        with self._stats_lock:
+            self._lookups += 1
+            self._matches += row is not None
+        return RegulationZone(*row) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "version": self.version,
+                "zones": self.zone_count,
+                "lookups": self._lookups,
+                "matches": self._matches,
+                "match_rate": self._matches / self._lookups if self._lookups else 0.0,
+            }
+
+
+def open_regulation_dataset(csv_path: str, db_path: str, mmap_size: int = 64 * 1024 * 1024) -> RegulationDataset:
+    """Abre la base compilada, recompilándola si falta o si el CSV cambió"""
+    if _db_version(db_path) != _file_sha256(csv_path):
+        build_regulation_db(csv_path, db_path)
+    return RegulationDataset(db_path, mmap_size=mmap_size)
+
+
+_dataset: Optional[RegulationDataset] = None
+_dataset_lock = threading.Lock()
+_dataset_failed = False
+
+
+def get_regulation_dataset() -> Optional[RegulationDataset]:
+    """Dataset del Plan Regulador de este proceso (None si está deshabilitado o no se pudo abrir)"""
+    global _dataset, _dataset_failed
+    if _dataset is not None or _dataset_failed or not settings.regulation_dataset_enabled:
+        return _dataset
+    with _dataset_lock:
+        if _dataset is None and not _dataset_failed:
+            csv_path = settings.regulation_dataset_path or DEFAULT_DATASET_PATH
+            db_path = settings.regulation_db_path or os.path.join(tempfile.gettempdir(), "arquitect-prc.sqlite")
+            try:
+                _dataset = open_regulation_dataset(csv_path, db_path, mmap_size=settings.regulation_mmap_size)
+            except (OSError, sqlite3.Error, RegulationDatasetError):
+                logger.exception("No se pudo abrir el Plan Regulador; se usan solo las zonas genéricas")
+                _dataset_failed = True
+    return _dataset
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "oguc_rules.json")
+
+# Parámetros de OGUCParameters sobre los que se pueden definir reglas
+RULE_PARAMETERS = ("surface_area", "floors", "max_height", "constructibility_coef", "occupation_percentage")
+
+# Prefijo de los límites que dependen de la zona ("zone.max_occupation_percentage")
+_ZONE_REFERENCE = "zone."
+
+Limit = Union[float, str]
+
+
+class RuleSetError(ValueError):
+    """El archivo de reglas no existe o no es válido"""
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Regla con sus límites ya resueltos para una zona.
+
+    Se incumple si ``value < min``, ``value <= greater_than`` o ``value > max``.
+    """
+    id: str
+    parameter: str
+    message: str
+    min: Optional[float] = None
+    greater_than: Optional[float] = None
+    max: Optional[float] = None
+
+    def violation(self, value: float, zone_type: str) -> Optional[str]:
+        """Mensaje de rechazo si ``value`` incumple la regla, o None"""
+        if self.min is not None and value < self.min:
+            limit = self.min
+        elif self.greater_than is not None and value <= self.greater_than:
+            limit = self.greater_than
+        elif self.max is not None and value > self.max:
+            limit = self.max
+        else:
+            return None
+        return self.message.format(value=value, limit=limit, zone_type=zone_type)
+
+
+@dataclass(frozen=True)
+class _RuleDefinition:
+    id: str
+    parameter: str
+    message: str
+    min: Optional[Limit] = None
+    greater_than: Optional[Limit] = None
+    max: Optional[Limit] = None
+    optional: bool = False  # sin efecto en zonas que no definen el límite referenciado
+
+    def compile(self, zone: Mapping[str, float]) -> CompiledRule:
+        return CompiledRule(
+            id=self.id,
+            parameter=self.parameter,
+            message=self.message,
+            min=_resolve(self.min, zone, self.optional),
+            greater_than=_resolve(self.greater_than, zone, self.optional),
+            max=_resolve(self.max, zone, self.optional),
+        )
+
+
+class RuleSet:
+    """Tablas normativas de una versión del archivo de reglas, compiladas una vez.
+
+    Para cada zona se precalculan sus restricciones y sus reglas con los
+    límites ya resueltos: evaluar un cálculo es recorrer una tupla de
+    comparaciones, sin construir diccionarios por solicitud. Las zonas
+    desconocidas usan las de ``default_zone``.
+    """
+
+    def __init__(self, data: Mapping, source: Optional[str] = None):
+        try:
+            self.version = str(data["version"])
+            self.description = data.get("description", "")
+            self.floor_height = float(data["floor_height"])
+            self.default_zone = str(data["default_zone"]).lower()
+            zones = {
+                name.lower(): {key: float(value) for key, value in limits.items()}
+                for name, limits in data["zones"].items()
+            }
+            self._definitions = [_parse_rule(rule) for rule in data["rules"]]
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            raise RuleSetError(f"Archivo de reglas inválido: {str(e)}")
+        if self.default_zone not in zones:
+            raise RuleSetError(f"La zona por defecto '{self.default_zone}' no está definida")
+
+        self.source = source
+        self.loaded_at = time.time()
+        self._restrictions: Dict[str, Dict[str, float]] = {}
+        self._rules: Dict[str, Tuple[CompiledRule, ...]] = {}
+        self._local_rules: Dict[Tuple, Tuple[CompiledRule, ...]] = {}
+        for name, limits in zones.items():
+            if "max_occupation" in limits:
+                # Ocupación máxima también como porcentaje, tal como se compara
+                limits.setdefault("max_occupation_percentage", limits["max_occupation"] * 100)
+            self._restrictions[name] = limits
+            self._rules[name] = self._compile(name, limits)
+
+    def _compile(self, name: str, limits: Mapping[str, float]) -> Tuple[CompiledRule, ...]:
+        try:
+            return tuple(definition.compile(limits) for definition in self._definitions)
+        except KeyError as e:
+            raise RuleSetError(f"La zona '{name}' no define el límite {str(e)}")
+
+    @property
+    def parameters(self) -> FrozenSet[str]:
+        """Parámetros de OGUCParameters que usan las reglas de este conjunto"""
+        return frozenset(definition.parameter for definition in self._definitions)
+
+    @property
+    def zones(self) -> List[str]:
+        return list(self._restrictions)
+
+    def zone_key(self, zone_type: str) -> str:
+        zone = zone_type.lower()
+        return zone if zone in self._rules else self.default_zone
+
+    def rules_for(self, zone_type: str) -> Tuple[CompiledRule, ...]:
+        return self._rules[self.zone_key(zone_type)]
+
+    def local_rules(self, zone_type: str, key: Tuple, limits: Mapping[str, float]) -> Tuple[CompiledRule, ...]:
+        """Reglas de ``zone_type`` con límites locales (Plan Regulador) sobre los de la zona.
+
+        Los límites locales reemplazan a los de la zona y además quedan como
+        ``local_<nombre>``, que usan las reglas opcionales del archivo. Se
+        compilan una vez por ``key``.
+        """
+        cache_key = (self.zone_key(zone_type), key)
+        rules = self._local_rules.get(cache_key)
+        if rules is None:
+            merged = dict(self._restrictions[cache_key[0]])
+            for name, value in limits.items():
+                merged[name] = value
+                merged[f"local_{name}"] = value
+            if "max_occupation" in limits:
+                merged["max_occupation_percentage"] = limits["max_occupation"] * 100
+            rules = self._local_rules[cache_key] = self._compile(str(key), merged)
+        return rules
+
+    def zone_limit(self, zone_type: str, name: str) -> float:
+        """Límite de la zona (o de la zona por defecto si no se conoce)"""
+        return self._restrictions[self.zone_key(zone_type)][name]
+
+    def zone_restrictions(self, zone_type: str) -> Dict[str, float]:
+        """Restricciones publicadas de la zona (copia)"""
+        limits = self._restrictions[self.zone_key(zone_type)]
+        return {name: limits[name] for name in ("max_height", "max_constructibility", "max_occupation") if name in limits}
+
+    def bounds(
+        self,
+        parameter: str,
+        zone_type: str,
+        rules: Optional[Tuple[CompiledRule, ...]] = None,
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Cota inferior (inclusive) y superior más estrictas de un parámetro en la zona.
+
+        Una cota ``greater_than`` es exclusiva y no se incluye en la inferior.
+        ``rules`` reemplaza a las de ``zone_type`` (p. ej. las de ``local_rules``).
+        """
+        lower: Optional[float] = None
+        upper: Optional[float] = None
+        for rule in rules if rules is not None else self.rules_for(zone_type):
+            if rule.parameter != parameter:
+                continue
+            if rule.min is not None:
+                lower = rule.min if lower is None else max(lower, rule.min)
+            if rule.max is not None:
+                upper = rule.max if upper is None else min(upper, rule.max)
+        return lower, upper
+
+    def rejection_reasons(
+        self,
+        values: Mapping[str, float],
+        zone_type: str,
+        rules: Optional[Tuple[CompiledRule, ...]] = None,
+    ) -> List[str]:
+        """Mensajes de las reglas que incumplen ``values``, en el orden del archivo.
+
+        ``rules`` reemplaza a las de ``zone_type`` (p. ej. las de ``local_rules``).
+        """
+        reasons = []
+        for rule in rules if rules is not None else self.rules_for(zone_type):
+            message = rule.violation(values[rule.parameter], zone_type)
+            if message is not None:
+                reasons.append(message)
+        return reasons
+
+    def violations_mask(
+        self,
+        columns: Mapping[str, np.ndarray],
+        zones: np.ndarray,
+        rules: Optional[Mapping[str, Tuple[CompiledRule, ...]]] = None,
+    ) -> np.ndarray:
+        """Versión vectorizada: True en las filas que incumplen alguna regla.
+
+        Los límites por zona se arman con una búsqueda por zona distinta.
+        ``rules`` asigna reglas propias a algunos valores de ``zones`` (p. ej.
+        las de ``local_rules``); los demás usan las de su tipo de zona.
+        """
+        rules = rules or {}
+        unique_zones, zone_index = np.unique(zones, return_inverse=True)
+        zone_rules = [rules[zone] if zone in rules else self.rules_for(zone) for zone in unique_zones.tolist()]
+        violated = np.zeros(len(zones), dtype=bool)
+        for position in range(len(zone_rules[0]) if zone_rules else 0):
+            position_rules = [rules_by_zone[position] for rules_by_zone in zone_rules]
+            values = columns[position_rules[0].parameter]
+            for attribute, compare in (("min", np.less), ("greater_than", np.less_equal), ("max", np.greater)):
+                limits = [getattr(rule, attribute) for rule in position_rules]
+                if all(limit is None for limit in limits):
+                    continue
+                limit_column = np.array(
+                    [np.nan if limit is None else limit for limit in limits], dtype=np.float64
+                )[zone_index]
+                # Comparar con NaN es siempre falso: zonas sin ese límite no incumplen
+                violated |= compare(values, limit_column)
+        return violated
+
+
+def _parse_rule(rule: Mapping) -> _RuleDefinition:
+    if rule["parameter"] not in RULE_PARAMETERS:
+        raise ValueError(f"Parámetro desconocido en la regla {rule['id']}: {rule['parameter']}")
+    if not any(key in rule for key in ("min", "greater_than", "max")):
+        raise ValueError(f"La regla {rule['id']} no define límites")
+    return _RuleDefinition(
+        id=rule["id"],
+        parameter=rule["parameter"],
+        message=rule["message"],
+        min=_parse_limit(rule.get("min")),
+        greater_than=_parse_limit(rule.get("greater_than")),
+        max=_parse_limit(rule.get("max")),
+        optional=bool(rule.get("optional", False)),
+    )
+
+
+def _parse_limit(limit) -> Optional[Limit]:
+    if limit is None:
+        return None
+    if isinstance(limit, str):
+        if not limit.startswith(_ZONE_REFERENCE):
+            raise ValueError(f"Límite inválido: {limit}")
+        return limit
+    return float(limit)
+
+
+def _resolve(limit: Optional[Limit], zone: Mapping[str, float], optional: bool = False) -> Optional[float]:
+    if isinstance(limit, str):
+        name = limit[len(_ZONE_REFERENCE):]
+        return zone.get(name) if optional else zone[name]
+    return limit
+
+
+def load_rule_set(path: str) -> RuleSet:
+    """Lee y compila un archivo de reglas"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuleSetError(f"Error leyendo reglas {path}: {str(e)}")
+    return RuleSet(data, source=path)
+
+
+class RuleRegistry:
+    """Reglas vigentes, recargables sin reiniciar el servidor.
+
+    ``current()`` revisa la fecha de modificación del archivo a lo más cada
+    ``check_interval`` segundos y recompila si cambió. Si la nueva versión
+    no es válida se mantiene la anterior.
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rule_set: Optional[RuleSet] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def current(self) -> RuleSet:
+        rule_set = self._rule_set
+        if rule_set is None:
+            return self.reload()
+        if self.check_interval > 0 and time.monotonic() - self._checked_at >= self.check_interval:
+            self._check_for_changes()
+        return self._rule_set
+
+    def reload(self) -> RuleSet:
+        """Recompila el archivo ahora; lanza RuleSetError si no es válido"""
+        with self._lock:
+            mtime = _mtime(self.path)
+            rule_set = load_rule_set(self.path)
+            self._rule_set, self._mtime = rule_set, mtime
+            self._checked_at = time.monotonic()
+            logger.info("Reglas OGUC versión %s cargadas desde %s", rule_set.version, self.path)
+            return rule_set
+
+    def _check_for_changes(self) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if _mtime(self.path) == self._mtime:
+                return
+        try:
+            self.reload()
+        except RuleSetError:
+            logger.exception("No se pudieron recargar las reglas OGUC; se mantiene la versión %s", self._rule_set.version)
+            with self._lock:
+                # No reintentar hasta que el archivo vuelva a cambiar
+                self._mtime = _mtime(self.path)
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+rule_registry = RuleRegistry(
+    settings.oguc_rules_path or DEFAULT_RULES_PATH,
+    check_interval=settings.oguc_rules_check_interval,
+)
+
+
+def get_rule_set() -> RuleSet:
+    """Reglas OGUC vigentes"""
+    return rule_registry.current()
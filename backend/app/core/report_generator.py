@@ -6,7 +6,10 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from datetime import datetime
 import io
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from app.core.config import settings
+from app.core.worker_pool import WorkerPool
 
 class ReportGenerator:
     def __init__(self):
@@ -271,3 +274,45 @@ class ReportGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer.getvalue()
+
+
+# Generador reutilizable de cada worker del pool de informes (estilos creados una vez)
+_worker_generator: Optional[ReportGenerator] = None
+
+
+def get_worker_generator() -> ReportGenerator:
+    """Retorna el ReportGenerator reutilizable del proceso actual"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = ReportGenerator()
+    return _worker_generator
+
+
+def init_report_worker() -> None:
+    """Inicializa un worker del pool de informes: crea los estilos una vez.
+
+    Vive en este módulo para que los workers solo importen ReportLab.
+    """
+    get_worker_generator()
+
+
+def render_cabida_report_job(certificate_data: Dict[str, Any],
+                             calculation_result: Dict[str, Any],
+                             parameters: Dict[str, Any]) -> bytes:
+    """Tarea ejecutable en el pool de informes: genera el PDF de cálculo de cabidas"""
+    return get_worker_generator().generate_cabida_report(certificate_data, calculation_result, parameters)
+
+
+def render_summary_report_job(results: List[Dict[str, Any]]) -> bytes:
+    """Tarea ejecutable en el pool de informes: genera el PDF resumen"""
+    return get_worker_generator().generate_summary_report(results)
+
+
+# Pool de generación de PDF: ReportLab fuera del event loop, con concurrencia acotada
+report_pool = WorkerPool(
+    name="reports",
+    mode=settings.report_mode,
+    workers=settings.report_workers,
+    initializer=init_report_worker,
+    start_method=settings.worker_start_method,
+)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class UploadTooLargeError(ValueError):
+    """El archivo subido excede el tamaño máximo permitido"""
+
+
+def too_large_message(max_size: int) -> str:
+    return f"Archivo demasiado grande. Tamaño máximo: {max_size / (1024*1024):.1f}MB"
+
+
+@dataclass
+class SpooledUpload:
+    """Archivo subido volcado a disco, con su tamaño y hash SHA-256"""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+    def cleanup(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+async def spool_upload(upload: UploadFile, max_size: int, directory: Optional[str] = None) -> SpooledUpload:
+    """Copia un UploadFile a un archivo temporal por bloques.
+
+    El tamaño se controla de forma incremental: se aborta en cuanto se
+    supera ``max_size``, sin cargar nunca el archivo completo en memoria.
+    El hash se calcula en el mismo recorrido (clave del cache de extracciones).
+    El archivo se crea en ``directory`` (por defecto ``upload_tmp_dir``).
+    El llamador es responsable de invocar ``cleanup()``.
+    """
+    suffix = os.path.splitext(upload.filename or "")[1].lower()
+    tmp = tempfile.NamedTemporaryFile(
+        prefix="upload-", suffix=suffix, dir=directory or settings.upload_tmp_dir, delete=False
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with tmp:
+            while True:
+                chunk = await upload.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(too_large_message(max_size))
+                digest.update(chunk)
+                await run_in_threadpool(tmp.write, chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+
+    return SpooledUpload(path=tmp.name, filename=upload.filename or "", size=size, sha256=digest.hexdigest())
+
+
+class UploadSizeLimitMiddleware:
+    """Rechaza cuerpos de subida demasiado grandes antes de leerlos completos.
+
+    - Si ``Content-Length`` ya excede el límite, responde de inmediato sin
+      leer el cuerpo.
+    - Si no hay ``Content-Length`` (transferencia por bloques), cuenta los
+      bytes recibidos y corta la lectura en cuanto se supera el límite.
+
+    El límite es ``max_size()`` (por defecto ``max_file_size``) más un
+    margen para los campos y delimitadores del formulario multipart.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_size: Optional[Callable[[], int]] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_size = max_size or (lambda: settings.max_file_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        max_size = self.max_size()
+        max_body_size = max_size + settings.upload_form_overhead
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body_size:
+            await _send_too_large(send, max_size)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # Simular desconexión: la aplicación deja de leer el cuerpo
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                # Reemplazar la respuesta de error genérica de la aplicación
+                if not response_started:
+                    response_started = True
+                    await _send_too_large(send, max_size)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+
+async def _send_too_large(send, max_size: int) -> None:
+    body = json.dumps({"detail": too_large_message(max_size)}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 400,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from app.core.oguc_calculator import CabidaCalculation, OGUCCalculator, OGUCParameters
+from app.core.regulation_rules import get_rule_set
+
+# Parámetros que se pueden modificar durante una sesión (comuna y zona vienen del certificado)
+SESSION_PARAMETERS = (
+    "surface_area",
+    "floors",
+    "max_height",
+    "constructibility_coef",
+    "occupation_percentage",
+    "zone_type",
+    "min_dwelling_area",
+)
+
+# Parámetros y campos del resultado que usan las recomendaciones y advertencias (cabida_advice)
+ADVICE_INPUTS = frozenset({
+    "floors",
+    "constructibility_coef",
+    "min_dwelling_area",
+    "allowed_floors",
+    "constructibility_utilization",
+    "dwelling_units_max",
+    "compliance_status",
+    "rejection_reasons",
+})
+
+# Listas derivadas del resultado, por nombre ("recommendations", "warnings")
+AdviceFunction = Callable[[CabidaCalculation, OGUCParameters], Dict[str, List[Any]]]
+
+
+class WhatIfSession:
+    """Cálculo de cabida interactivo: parámetros y último resultado en el servidor.
+
+    ``apply`` recibe solo los parámetros que cambiaron, recalcula los campos
+    que dependen de ellos (``OGUCCalculator.recalculate``) y las
+    recomendaciones y advertencias solo si cambió alguna de sus entradas, y
+    retorna la diferencia con el resultado anterior. Si las reglas OGUC se
+    recargaron, se recalcula todo.
+    """
+
+    def __init__(self, params: OGUCParameters, advice: AdviceFunction, calculator: Optional[OGUCCalculator] = None):
+        self.calculator = calculator or OGUCCalculator()
+        self._advice_function = advice
+        self.params = params
+        self.result = self.calculator.calculate_cabida(params)
+        self.advice = advice(self.result, params)
+        self.revision = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado completo de la sesión"""
+        return {
+            "revision": self.revision,
+            "parameters": self.params._asdict(),
+            "result": self.result._asdict(),
+            **self.advice,
+        }
+
+    def apply(self, delta: Mapping[str, Any]) -> Dict[str, Any]:
+        """Aplica cambios de parámetros y retorna solo los campos que cambiaron.
+
+        La respuesta incluye ``changed`` (campos del resultado con su nuevo
+        valor) y ``recommendations`` o ``warnings`` solo si esa lista cambió.
+        """
+        unknown = set(delta) - set(SESSION_PARAMETERS)
+        if unknown:
+            raise ValueError(f"Parámetros no modificables: {', '.join(sorted(unknown))}")
+        changed = {name for name, value in delta.items() if getattr(self.params, name) != value}
+        params = self.params._replace(**{name: delta[name] for name in changed})
+
+        if self.calculator.rules is not get_rule_set():
+            # Reglas recargadas: el resultado anterior ya no sirve de base
+            self.calculator = OGUCCalculator()
+            result = self.calculator.calculate_cabida(params)
+            advice_affected = True
+        else:
+            result = self.calculator.recalculate(self.result, params, changed)
+            advice_affected = False
+
+        diff = {
+            name: value for name, value in result._asdict().items()
+            if getattr(self.result, name) != value
+        }
+        response: Dict[str, Any] = {"changed": diff}
+        if advice_affected or ADVICE_INPUTS & (changed | set(diff)):
+            advice = self._advice_function(result, params)
+            response.update((name, items) for name, items in advice.items() if items != self.advice.get(name))
+            self.advice = advice
+
+        self.params, self.result = params, result
+        if changed or diff:
+            self.revision += 1
+        response["revision"] = self.revision
+        return response
@@ -0,0 +1,172 @@
+import asyncio
+import multiprocessing
+import queue
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from app.core.config import settings
+
+EXECUTION_MODES = ("process", "thread", "inline")
+
+
+class WorkerPool:
+    """Ejecuta trabajo CPU-bound (PyMuPDF, OCR) fuera del event loop.
+
+    Modos soportados:
+    - ``process``: pool de procesos, escala con los núcleos disponibles.
+    - ``thread``: pool de hilos, útil en desarrollo o cuando el trabajo
+      libera el GIL (subprocesos de Tesseract).
+    - ``inline``: ejecuta en el mismo hilo (solo para depuración).
+
+    ``initargs`` puede ser una función: se evalúa al arrancar el pool, de
+    modo que importar este módulo (p. ej. en un worker) no crea recursos.
+
+    Una tarea puede informar su avance por una cola de ``progress_queue()``
+    recibida como argumento.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str,
+        workers: int,
+        initializer: Optional[Callable[..., None]] = None,
+        start_method: Optional[str] = None,
+        initargs: Union[Tuple, Callable[[], Tuple]] = (),
+    ):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Modo de ejecución no soportado: {mode}")
+
+        self.name = name
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.start_method = start_method
+        self._executor: Optional[Executor] = None
+        self._manager = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None or self.mode == "inline"
+
+    def start(self, warm: bool = True) -> None:
+        """Crea el executor y, opcionalmente, precalienta los workers"""
+        if self.started:
+            return
+
+        initargs = self.initargs() if callable(self.initargs) else self.initargs
+        if self.mode == "process":
+            mp_context = multiprocessing.get_context(self.start_method) if self.start_method else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp_context,
+                initializer=self.initializer,
+                initargs=initargs,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=self.name,
+                initializer=self.initializer,
+                initargs=initargs,
+            )
+
+        if warm:
+            # Forzar el arranque de todos los workers (e imports pesados del
+            # initializer) antes de recibir la primera solicitud real.
+            futures = [self._executor.submit(_noop) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Detiene el executor liberando sus workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def progress_queue(self):
+        """Cola por la que una tarea del pool envía eventos al proceso principal.
+
+        En modo ``process`` es una cola de un ``Manager`` (se puede pasar
+        como argumento a los workers); en los demás modos, una cola local.
+        """
+        if self.mode != "process":
+            return queue.Queue()
+        if self._manager is None:
+            mp_context = multiprocessing.get_context(self.start_method) if self.start_method else multiprocessing
+            self._manager = mp_context.Manager()
+        return self._manager.Queue()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta ``fn(*args)`` en el pool sin bloquear el event loop"""
+        if not self.started:
+            # Arranque perezoso (p. ej. sin lifespan): no bloquear esperando el warm-up
+            self.start(warm=False)
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        try:
+            if self.mode == "inline":
+                result = fn(*args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas básicas de uso del pool"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "started": self.started,
+            "pending": self._pending,
+            # Tareas esperando un worker libre (las demás pendientes se están ejecutando)
+            "queued": max(0, self._pending - self.workers) if self.mode != "inline" else 0,
+            "peak_pending": self._peak_pending,
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+
+
+def _noop() -> None:
+    return None
+
+
+def _init_extraction_worker(ocr_metrics=None) -> None:
+    """Inicializa un worker de extracción: imports pesados y motores OCR precalentados"""
+    from app.core import pdf_processor
+
+    pdf_processor.init_ocr_worker(ocr_metrics)
+    pdf_processor.get_worker_processor()
+
+
+def _extraction_initargs() -> Tuple:
+    from app.core.pdf_processor import ocr_metrics
+
+    # Los workers heredan los contadores de OCR del proceso principal
+    return (ocr_metrics,)
+
+
+extraction_pool = WorkerPool(
+    name="extraction",
+    mode=settings.extraction_mode,
+    workers=settings.extraction_workers,
+    initializer=_init_extraction_worker,
+    start_method=settings.worker_start_method,
+    initargs=_extraction_initargs,
+)
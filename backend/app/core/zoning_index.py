@@ -0,0 +1,295 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.regulation_dataset import LIMIT_COLUMNS, get_regulation_dataset, normalize_zone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ZONING_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "zonificacion.geojson")
+
+# Coordenada del certificado en grados, minutos y segundos ("33°26'15S")
+_DMS = re.compile(r'(\d+)°\s*(\d+)\'\s*(\d+(?:[.,]\d+)?)"?\s*([NSEWO])', re.IGNORECASE)
+
+# Anillo de un polígono: vértices (lon, lat) como arreglo (n, 2)
+Ring = np.ndarray
+
+
+class ZoningError(ValueError):
+    """El archivo de zonificación no existe o no es válido"""
+
+
+class ZoningFeature(NamedTuple):
+    """Zona de un polígono de zonificación y sus límites (los que defina el archivo)"""
+    zona: str
+    comuna: Optional[str]
+    limits: Dict[str, float]
+    area: float  # grados², para preferir la zona más específica si hay superposición
+
+
+def parse_dms(text: str) -> float:
+    """Grados decimales de una coordenada DMS; sur y oeste son negativos"""
+    match = _DMS.fullmatch(text.strip())
+    if match is None:
+        raise ValueError(f"Coordenada no reconocida: {text}")
+    degrees, minutes, seconds, hemisphere = match.groups()
+    value = int(degrees) + int(minutes) / 60 + float(seconds.replace(',', '.')) / 3600
+    return -value if hemisphere.upper() in "SWO" else value
+
+
+def parse_coordinates(text: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(latitud, longitud) de las coordenadas del certificado ("33°26'15S 70°39'02W"), o None"""
+    if not text:
+        return None
+    parts = _DMS.findall(text)
+    if len(parts) != 2:
+        return None
+    values = {}
+    for degrees, minutes, seconds, hemisphere in parts:
+        axis = "lat" if hemisphere.upper() in "NS" else "lon"
+        values[axis] = parse_dms(f"{degrees}°{minutes}'{seconds}{hemisphere}")
+    if len(values) != 2:
+        return None
+    return values["lat"], values["lon"]
+
+
+def _str_order(boxes: np.ndarray, capacity: int) -> np.ndarray:
+    """Orden Sort-Tile-Recursive: franjas verticales por x y, dentro de cada una, por y"""
+    count = len(boxes)
+    slices = max(1, math.ceil(math.sqrt(math.ceil(count / capacity))))
+    center_x = boxes[:, 0] + boxes[:, 2]
+    center_y = boxes[:, 1] + boxes[:, 3]
+    rank = np.empty(count, dtype=np.int64)
+    rank[np.argsort(center_x, kind="stable")] = np.arange(count)
+    return np.lexsort((center_y, rank // (slices * capacity)))
+
+
+def _ring_contains(ring: Ring, x: float, y: float) -> bool:
+    """Punto en polígono por cruce de rayo, vectorizado sobre las aristas"""
+    xi, yi = ring[:-1, 0], ring[:-1, 1]
+    xj, yj = ring[1:, 0], ring[1:, 1]
+    crosses = (yi > y) != (yj > y)
+    if not crosses.any():
+        return False
+    xi, yi, xj, yj = xi[crosses], yi[crosses], xj[crosses], yj[crosses]
+    x_cross = xi + (y - yi) * (xj - xi) / (yj - yi)
+    return bool(np.count_nonzero(x < x_cross) % 2)
+
+
+def _polygon_contains(polygon: Sequence[Ring], x: float, y: float) -> bool:
+    exterior, holes = polygon[0], polygon[1:]
+    return _ring_contains(exterior, x, y) and not any(_ring_contains(hole, x, y) for hole in holes)
+
+
+def _ring_area(ring: Ring) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return abs(float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))) / 2
+
+
+class ZoningIndex:
+    """Índice espacial de polígonos de zonificación.
+
+    Un R-tree empaquetado con STR (Sort-Tile-Recursive) sobre los
+    rectángulos envolventes filtra los candidatos de un punto recorriendo
+    unos pocos nodos por nivel; luego se confirma con punto en polígono. Cada
+    nivel guarda sus rectángulos en un arreglo NumPy y el rango contiguo de
+    sus hijos en el nivel inferior. El índice es de solo lectura una vez
+    construido.
+    """
+
+    def __init__(self, polygons: Sequence[Sequence[Sequence[Ring]]], features: Sequence[ZoningFeature], node_capacity: int = 16):
+        if len(polygons) != len(features):
+            raise ValueError("Se requiere un conjunto de polígonos por zona")
+        self.features = list(features)
+        self.node_capacity = max(2, node_capacity)
+        self._polygons = [[[np.asarray(ring, dtype=np.float64) for ring in polygon] for polygon in parts] for parts in polygons]
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._matches = 0
+        self._lookup_seconds = 0.0
+
+        boxes = np.array([self._bounds(parts) for parts in self._polygons], dtype=np.float64).reshape(-1, 4)
+        order = _str_order(boxes, self.node_capacity) if len(boxes) else np.arange(0)
+        self._items = order
+        # Niveles de hojas a raíz: rectángulos y (inicio, cantidad) de hijos en el nivel inferior
+        self._levels: List[Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]] = [(boxes[order], None, None)]
+        level_boxes = boxes[order]
+        while len(level_boxes) > self.node_capacity:
+            starts = np.arange(0, len(level_boxes), self.node_capacity)
+            counts = np.minimum(self.node_capacity, len(level_boxes) - starts)
+            parents = np.column_stack([
+                np.minimum.reduceat(level_boxes[:, 0], starts),
+                np.minimum.reduceat(level_boxes[:, 1], starts),
+                np.maximum.reduceat(level_boxes[:, 2], starts),
+                np.maximum.reduceat(level_boxes[:, 3], starts),
+            ])
+            parent_order = _str_order(parents, self.node_capacity)
+            level_boxes = parents[parent_order]
+            self._levels.append((level_boxes, starts[parent_order], counts[parent_order]))
+
+    @staticmethod
+    def _bounds(parts: Sequence[Sequence[Ring]]) -> Tuple[float, float, float, float]:
+        exteriors = np.concatenate([polygon[0] for polygon in parts])
+        return (*exteriors.min(axis=0), *exteriors.max(axis=0))
+
+    @property
+    def depth(self) -> int:
+        return len(self._levels)
+
+    def _candidates(self, x: float, y: float) -> np.ndarray:
+        nodes = None
+        for boxes, starts, counts in reversed(self._levels):
+            if nodes is not None and not len(nodes):
+                break
+            candidate_boxes = boxes if nodes is None else boxes[nodes]
+            hit = (candidate_boxes[:, 0] <= x) & (candidate_boxes[:, 2] >= x) & (candidate_boxes[:, 1] <= y) & (candidate_boxes[:, 3] >= y)
+            hits = np.flatnonzero(hit) if nodes is None else nodes[hit]
+            if starts is None:
+                return self._items[hits]
+            nodes = (
+                np.concatenate([np.arange(start, start + count) for start, count in zip(starts[hits], counts[hits])])
+                if len(hits) else hits
+            )
+        return np.arange(0)
+
+    def lookup(self, lat: float, lon: float) -> Optional[ZoningFeature]:
+        """Zona que contiene el punto; con superposición, la de menor área"""
+        start = time.perf_counter()
+        match = None
+        for item in self._candidates(lon, lat).tolist():
+            feature = self.features[item]
+            if (match is None or feature.area < match.area) and any(
+                _polygon_contains(polygon, lon, lat) for polygon in self._polygons[item]
+            ):
+                match = feature
+        with self._lock:
+            self._lookups += 1
+            self._matches += match is not None
+            self._lookup_seconds += time.perf_counter() - start
+        return match
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "features": len(self.features),
+                "depth": self.depth,
+                "lookups": self._lookups,
+                "matches": self._matches,
+                "avg_lookup_ms": self._lookup_seconds / self._lookups * 1000 if self._lookups else 0.0,
+            }
+
+
+def load_zoning_index(path: str, node_capacity: int = 16) -> ZoningIndex:
+    """Construye el índice a partir de un GeoJSON de polígonos de zonificación.
+
+    Cada feature (Polygon o MultiPolygon) define ``zona`` y opcionalmente
+    ``comuna`` y los límites ``max_height``, ``max_constructibility`` y
+    ``max_occupation`` en sus propiedades.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ZoningError(f"Error leyendo zonificación {path}: {str(e)}")
+
+    polygons, features = [], []
+    for position, feature in enumerate(data.get("features", [])):
+        try:
+            geometry, properties = feature["geometry"], feature.get("properties") or {}
+            if geometry["type"] == "Polygon":
+                parts = [geometry["coordinates"]]
+            elif geometry["type"] == "MultiPolygon":
+                parts = geometry["coordinates"]
+            else:
+                continue
+            rings = [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in parts]
+            features.append(ZoningFeature(
+                zona=str(properties["zona"]),
+                comuna=properties.get("comuna"),
+                limits={name: float(properties[name]) for name in LIMIT_COLUMNS if properties.get(name) is not None},
+                area=sum(_ring_area(polygon[0]) - sum(_ring_area(hole) for hole in polygon[1:]) for polygon in rings),
+            ))
+            polygons.append(rings)
+        except (KeyError, TypeError, ValueError, IndexError) as e:
+            raise ZoningError(f"Feature {position} de {path} inválido: {str(e)}")
+
+    index = ZoningIndex(polygons, features, node_capacity=node_capacity)
+    logger.info("Zonificación cargada: %d polígonos desde %s (profundidad %d)", len(features), path, index.depth)
+    return index
+
+
+def zone_for_coordinates(coordinates: Optional[str], index: Optional["ZoningIndex"] = None) -> Optional[Dict[str, Any]]:
+    """Zona y límites que corresponden a las coordenadas del certificado, o None.
+
+    Si el polígono no trae límites se usan los del Plan Regulador para su
+    comuna y zona.
+    """
+    index = index or get_zoning_index()
+    point = parse_coordinates(coordinates)
+    if index is None or point is None:
+        return None
+    feature = index.lookup(*point)
+    if feature is None:
+        return None
+    limits = dict(feature.limits)
+    if not limits:
+        regulations = get_regulation_dataset()
+        local_zone = regulations.lookup(feature.comuna, feature.zona) if regulations else None
+        limits = local_zone.limits() if local_zone else {}
+    return {
+        "zona": feature.zona,
+        "comuna": feature.comuna,
+        "limits": limits,
+        "latitude": point[0],
+        "longitude": point[1],
+    }
+
+
+def assign_zone(certificate_data):
+    """Copia del certificado con ``zonificacion`` según sus coordenadas.
+
+    La comuna y zona leídas del texto tienen prioridad; solo se completan
+    si faltan, y ``matches_certificate`` indica si la zona coincide.
+    """
+    zoning = zone_for_coordinates(certificate_data.coordenadas)
+    if zoning is None:
+        return certificate_data
+    update = {"zonificacion": zoning}
+    if certificate_data.zona:
+        zoning["matches_certificate"] = normalize_zone(certificate_data.zona) == normalize_zone(zoning["zona"])
+    else:
+        update["zona"] = zoning["zona"]
+    if not certificate_data.comuna and zoning["comuna"]:
+        update["comuna"] = zoning["comuna"]
+    return certificate_data.model_copy(update=update)
+
+
+_index: Optional[ZoningIndex] = None
+_index_lock = threading.Lock()
+_index_failed = False
+
+
+def get_zoning_index() -> Optional[ZoningIndex]:
+    """Índice de zonificación de este proceso (None si está deshabilitado o no se pudo cargar)"""
+    global _index, _index_failed
+    if _index is not None or _index_failed or not settings.zoning_index_enabled:
+        return _index
+    with _index_lock:
+        if _index is None and not _index_failed:
+            try:
+                _index = load_zoning_index(
+                    settings.zoning_geojson_path or DEFAULT_ZONING_PATH,
+                    node_capacity=settings.zoning_node_capacity,
+                )
+            except ZoningError:
+                logger.exception("No se pudo cargar la zonificación; no se asignarán zonas por coordenadas")
+                _index_failed = True
+    return _index
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -30,9 +30,22 @@ class CertificateData(BaseModel):
     altura_maxima: Optional[float] = None
     coeficiente_constructibilidad: Optional[float] = None
     porcentaje_ocupacion: Optional[float] = None
+    coordenadas: Optional[str] = None
+    zonificacion: Optional[dict] = None  # zona y límites según las coordenadas
     raw_text: Optional[str] = None
     additional_data: Optional[dict] = None
 
+class CertificateReference(BaseModel):
+    """Certificado de una solicitud: datos completos o handle de un certificado ya subido"""
+    certificate_data: Optional[CertificateData] = None
+    certificate_handle: Optional[str] = None
+
+    @model_validator(mode="after")
+    def require_certificate(self):
+        if self.certificate_data is None and not self.certificate_handle:
+            raise ValueError("Se requiere certificate_data o certificate_handle")
+        return self
+
 class CalculationResult(BaseModel):
     """Resultado del cálculo de cabidas"""
     total_surface: float
@@ -45,6 +58,8 @@ class CalculationResult(BaseModel):
     compliance_status: str
     rejection_reasons: List[str] = []
     recommendations: List[str] = []
+    rules_version: Optional[str] = None
+    regulation_zone: Optional[str] = None  # Zona del Plan Regulador aplicada
 
 class ValidationError(BaseModel):
     """Modelo para errores de validación"""
@@ -0,0 +1,87 @@
+"""Benchmark: costo por llamada de calculate_cabida con tuplas internas vs. modelos pydantic.
+
+Compara el camino actual (tuplas con nombre y una sola conversión a
+CalculationResult en el router) con el anterior, donde parámetros y
+resultado eran modelos pydantic y el router volvía a copiarlos.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_calculation_overhead [llamadas]
+"""
+import sys
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from app.models.certificate import CalculationResult
+
+
+class _ParametersModel(BaseModel):
+    surface_area: float
+    floors: int
+    max_height: float
+    constructibility_coef: float
+    occupation_percentage: float
+    zone_type: str
+    min_dwelling_area: float = 40.0
+
+
+class _CalculationModel(BaseModel):
+    total_surface: float
+    max_building_surface: float
+    max_occupation_surface: float
+    allowed_floors: int
+    max_height: float
+    constructibility_utilization: float
+    dwelling_units_max: int
+    compliance_status: str
+    rejection_reasons: List[str] = []
+    rules_version: Optional[str] = None
+
+
+PARAMETERS = dict(
+    surface_area=500.0,
+    floors=3,
+    max_height=23.0,
+    constructibility_coef=1.2,
+    occupation_percentage=60.0,
+    zone_type="residencial",
+)
+
+
+def _timed(n: int, call) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        call()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    calculator = OGUCCalculator()
+
+    def internal():
+        return calculator.calculate_cabida(OGUCParameters(**PARAMETERS))
+
+    def internal_with_edge():
+        return CalculationResult(**internal()._asdict(), recommendations=[])
+
+    def pydantic_path():
+        # Validación de parámetros, resultado pydantic y copia campo a campo en el router
+        params = _ParametersModel(**PARAMETERS)
+        result = _CalculationModel(**calculator.calculate_cabida(OGUCParameters(**params.model_dump()))._asdict())
+        return CalculationResult(**result.model_dump(), recommendations=[])
+
+    internal_us = _timed(n, internal)
+    edge_us = _timed(n, internal_with_edge)
+    pydantic_us = _timed(n, pydantic_path)
+
+    print(f"{n} llamadas (µs por llamada)")
+    print(f"  cálculo interno: {internal_us:.2f}")
+    print(f"  interno + CalculationResult: {edge_us:.2f}")
+    print(f"  modelos pydantic en cada etapa: {pydantic_us:.2f} | ahorro {pydantic_us - edge_us:.2f} µs ({pydantic_us / edge_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark: cálculo de cabida terreno a terreno vs. cálculo vectorizado por lote.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_calculator_batch [cantidad_de_terrenos]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+
+
+def synthetic_lots(n: int) -> dict:
+    rng = np.random.default_rng(0)
+    return {
+        "surface_area": np.round(rng.uniform(30, 3000, n), 1),
+        "floors": rng.integers(1, 15, n),
+        "max_height": np.round(rng.uniform(7, 60, n), 1),
+        "constructibility_coef": np.round(rng.uniform(0.2, 3.5, n), 2),
+        "occupation_percentage": np.round(rng.uniform(20, 90, n), 1),
+        "zone_type": rng.choice(["residencial", "comercial", "industrial", "mixto"], n),
+        "min_dwelling_area": 40.0,
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lots = synthetic_lots(n)
+    calculator = OGUCCalculator()
+
+    start = time.perf_counter()
+    rows = {name: column.tolist() for name, column in lots.items() if isinstance(column, np.ndarray)}
+    for i in range(n):
+        calculator.calculate_cabida(OGUCParameters(**{name: column[i] for name, column in rows.items()}))
+    scalar_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    batch = calculator.calculate_cabida_batch(**lots)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{n} terrenos ({int(batch.approved.sum())} aprobados)")
+    print(f"  terreno a terreno: {scalar_ms:.1f} ms | lote: {batch_ms:.1f} ms | factor {scalar_ms / batch_ms:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
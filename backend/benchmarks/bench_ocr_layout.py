@@ -0,0 +1,86 @@
+"""Benchmark: OCR de la hoja completa frente a OCR por regiones del formato.
+
+Genera una hoja sintética con el formulario tipo de CIP (encabezado,
+antecedentes del predio, normas urbanísticas y el resto de la hoja con
+texto de relleno) y compara los píxeles y la latencia de Tesseract al
+procesar la hoja entera y al procesar solo las regiones del formato.
+Si Tesseract no está instalado solo se reportan los píxeles.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_ocr_layout
+"""
+import time
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+from app.core.image_preprocessing import target_long_side
+from app.core.layout_templates import DEFAULT_TEMPLATES, crop_box
+from app.core.pdf_processor import configure_tesseract
+
+SECTIONS = (
+    (0.03, "MUNICIPALIDAD DE SANTIAGO\nCERTIFICADO DE INFORMACIONES PREVIAS N° 1234/2024"),
+    (0.17, "Rol: 123-45\nDirección: Av. Libertador 1234\nComuna: Santiago\nSuperficie terreno: 500,5 m²"),
+    (0.37, "Zona: ZH-4\nAltura máxima: 14 m\nCoeficiente de constructibilidad: 1,2\nPorcentaje de ocupación: 60%"),
+    (0.60, "Observaciones: el predio se encuentra afecto a las disposiciones del plan regulador.\n" * 8),
+)
+
+
+def synthetic_page() -> Image.Image:
+    """Hoja A4 en grises a la resolución de OCR con la disposición del formulario tipo"""
+    height = target_long_side()
+    width = round(height / 1.414)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", height // 90)
+    except OSError:
+        font = ImageFont.load_default()
+    for top, text in SECTIONS:
+        y = round(top * height)
+        for line in text.splitlines():
+            draw.text((round(0.06 * width), y), line, fill=0, font=font)
+            y += height // 60
+    return image
+
+
+def tesseract_available() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def timed_ocr(images) -> float:
+    start = time.perf_counter()
+    for image in images:
+        pytesseract.image_to_string(image, lang="spa")
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    configure_tesseract()
+    page = synthetic_page()
+    template = DEFAULT_TEMPLATES[0]
+    crops = [crop_box(page, template.header)] + [crop_box(page, region.box) for region in template.regions]
+
+    full_pixels = page.width * page.height
+    roi_pixels = sum(crop.width * crop.height for crop in crops)
+    print(f"Formato {template.name}: cobertura nominal {100 * template.coverage():.0f}% de la hoja")
+    print(
+        f"  píxeles: hoja {full_pixels:,} | regiones {roi_pixels:,} ({100 * roi_pixels / full_pixels:.1f}% de la hoja)"
+        f" | factor {full_pixels / roi_pixels:.1f}x"
+    )
+
+    if not tesseract_available():
+        print("Tesseract no disponible: se reportan solo los píxeles")
+        return
+
+    full_ms = timed_ocr([page])
+    roi_ms = timed_ocr(crops)
+    print(f"  OCR (ms): hoja {full_ms:.0f} | regiones {roi_ms:.0f} | factor {full_ms / roi_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
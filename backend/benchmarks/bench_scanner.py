@@ -0,0 +1,72 @@
+"""Benchmark: scanner de una pasada vs. búsquedas regex por campo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_scanner
+"""
+import re
+import timeit
+
+from app.core.pdf_processor import PDFProcessor
+
+HEADER = (
+    "MUNICIPALIDAD DE SANTIAGO\n"
+    "CERTIFICADO DE INFORMACIONES PREVIAS N° 1234/2024\n"
+    "Santiago, 15 de marzo de 2024\n"
+    "Rol: 123-45\n"
+    "Dirección: Av. Libertador Bernardo O'Higgins 1234\n"
+    "Comuna: Santiago\n"
+    "Propietario: Inmobiliaria Ejemplo SpA\n"
+    "Superficie terreno: 500,5 m²\n"
+    "Uso de suelo: Residencial\n"
+    "Zona: ZH-4\n"
+    "Altura máxima: 14 m\n"
+    "Coeficiente de constructibilidad: 1,2\n"
+    "Porcentaje de ocupación: 60%\n"
+    "33°26'15S 70°39'02W\n"
+)
+
+ANNEX_PAGE = (
+    "ANEXO: Normas urbanísticas complementarias. Las disposiciones del plan "
+    "regulador aplican a los predios indicados en el plano adjunto, con "
+    "antejardines, rasantes y distanciamientos según la ordenanza local.\n"
+) * 40
+
+
+def legacy_process(processor: PDFProcessor, text: str):
+    """Implementación previa: una búsqueda por campo más validación y datos adicionales"""
+    data = {}
+    for name, pattern in processor.patterns.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            data[name] = match.group(1).strip()
+
+    keywords = ['certificado de informaciones previas', 'municipalidad', 'rol', 'superficie']
+    text_lower = text.lower()
+    valid = 'certificado de informaciones previas' in text_lower and sum(k in text_lower for k in keywords) >= 3
+
+    re.search(r'(\d+°\d+\'\d+[NS])\s*(\d+°\d+\'\d+[WE])', text)
+    re.search(
+        r'(\d{1,2})\s*de\s*(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre)\s*de\s*(\d{4})',
+        text, re.IGNORECASE
+    )
+    re.search(r'N[°o]\s*(\d+/\d{4})', text)
+    return data, valid
+
+
+def main():
+    processor = PDFProcessor()
+    print(f"{'páginas':>8} {'datos':>8} {'legado (ms)':>12} {'scanner (ms)':>13} {'speedup':>8}")
+    for pages in (1, 5, 20, 50):
+        # Datos en la primera página (caso típico) y en la última (sin salida temprana)
+        for position, text in (
+            ("inicio", HEADER + ANNEX_PAGE * (pages - 1)),
+            ("final", ANNEX_PAGE * (pages - 1) + HEADER),
+        ):
+            runs = 200
+            legacy = min(timeit.repeat(lambda: legacy_process(processor, text), number=runs, repeat=3)) / runs
+            scanner = min(timeit.repeat(lambda: processor.scan_text(text), number=runs, repeat=3)) / runs
+            print(f"{pages:>8} {position:>8} {legacy * 1000:>12.3f} {scanner * 1000:>13.3f} {legacy / scanner:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
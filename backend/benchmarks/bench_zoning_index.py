@@ -0,0 +1,55 @@
+"""Benchmark: búsqueda de zona por coordenadas en el R-tree STR vs. recorrer todos los polígonos.
+
+Genera una zonificación sintética de escala ciudad (polígonos irregulares
+sobre una grilla) y mide el tiempo por consulta.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_zoning_index [polígonos_por_lado]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.core.zoning_index import ZoningFeature, ZoningIndex, _polygon_contains
+
+
+def synthetic_zoning(side: int, vertices: int = 24):
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    polygons, features = [], []
+    for i in range(side):
+        for j in range(side):
+            radius = 0.5 * rng.uniform(0.8, 1.0, vertices)
+            ring = np.column_stack([i + 0.5 + radius * np.cos(angles), j + 0.5 + radius * np.sin(angles)])
+            polygons.append([[np.vstack([ring, ring[:1]])]])
+            features.append(ZoningFeature(zona=f"Z{i}-{j}", comuna=None, limits={}, area=1.0))
+    return polygons, features
+
+
+def main():
+    side = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    polygons, features = synthetic_zoning(side)
+
+    start = time.perf_counter()
+    index = ZoningIndex(polygons, features)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    points = np.random.default_rng(1).uniform(0, side, size=(5000, 2)).tolist()
+    start = time.perf_counter()
+    matched = sum(index.lookup(lat=y, lon=x) is not None for x, y in points)
+    rtree_ms = (time.perf_counter() - start) * 1000 / len(points)
+
+    sample = points[:50]
+    start = time.perf_counter()
+    for x, y in sample:
+        next((f for f, parts in zip(features, polygons) if _polygon_contains(parts[0], x, y)), None)
+    scan_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+    print(f"{len(features)} polígonos, profundidad {index.depth}, construcción {build_ms:.0f} ms")
+    print(f"  R-tree: {rtree_ms * 1000:.1f} µs/consulta ({matched} de {len(points)} con zona)")
+    print(f"  recorrido completo: {scan_ms:.1f} ms/consulta | factor {scan_ms / rtree_ms:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
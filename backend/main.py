@@ -1,14 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
-from app.api import upload, calculate, validate, reports
+from app.api import upload, calculate, validate, reports, jobs, evaluate
+from app.core.calculation_cache import calculation_cache
+from app.core.certificate_store import certificate_store
 from app.core.config import settings
+from app.core.extraction_cache import extraction_cache
+from app.core.job_queue import job_workers
+from app.core.pdf_processor import ocr_stats
+from app.core.regulation_dataset import get_regulation_dataset
+from app.core.report_generator import report_pool
+from app.core.uploads import UploadSizeLimitMiddleware
+from app.core.worker_pool import extraction_pool
+from app.core.zoning_index import get_zoning_index
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arrancar y precalentar workers de extracción antes de aceptar tráfico
+    extraction_pool.start()
+    report_pool.start()
+    job_workers.start()
+    # Compilar/abrir el Plan Regulador y la zonificación antes de la primera solicitud
+    get_regulation_dataset()
+    get_zoning_index()
+    yield
+    job_workers.shutdown()
+    report_pool.shutdown()
+    extraction_pool.shutdown()
 
 app = FastAPI(
     title="Arquitect Assistant API",
     description="Sistema automatizado de cálculo de cabidas OGUC",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -20,11 +46,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Limitar el tamaño de las subidas antes de leer el cuerpo completo
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=[
+        "/api/v1/upload/certificate",
+        "/api/v1/upload/certificate/stream",
+        "/api/v1/upload/validate-format",
+        "/api/v1/jobs/certificate",
+    ],
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/api/v1/upload/batch"],
+    max_size=lambda: settings.batch_max_size,
+)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/api/v1/validate/portfolio"],
+    max_size=lambda: settings.portfolio_max_size,
+)
+
 # Incluir routers
 app.include_router(upload.router, prefix="/api/v1/upload", tags=["upload"])
 app.include_router(calculate.router, prefix="/api/v1/calculate", tags=["calculate"])
 app.include_router(validate.router, prefix="/api/v1/validate", tags=["validate"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["reports"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+app.include_router(evaluate.router, prefix="/api/v1/evaluate", tags=["evaluate"])
 
 @app.get("/")
 async def root():
@@ -34,6 +83,22 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/metrics")
+async def metrics():
+    regulation_dataset = get_regulation_dataset()
+    zoning_index = get_zoning_index()
+    return {
+        "extraction_pool": extraction_pool.stats(),
+        "report_pool": report_pool.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "calculation_cache": calculation_cache.stats(),
+        "ocr_engines": ocr_stats(),
+        "certificate_store": certificate_store.stats(),
+        "job_workers": job_workers.stats(),
+        "regulation_dataset": regulation_dataset.stats() if regulation_dataset else None,
+        "zoning_index": zoning_index.stats() if zoning_index else None
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,21 @@
+import pytest
+
+from app.core import job_queue
+from app.core.certificate_store import certificate_store
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    """Base de datos temporal por test para el almacén de certificados y la cola de trabajos"""
+    default_url = settings.database_url
+    database_url = f"sqlite:///{tmp_path / 'arquitect_assistant.db'}"
+    monkeypatch.setattr(settings, "database_url", database_url)
+    monkeypatch.setattr(job_queue, "_job_queue", None)
+    certificate_store.reset(database_url)
+
+    yield database_url
+
+    if job_queue._job_queue is not None:
+        job_queue._job_queue.engine.dispose()
+    certificate_store.reset(default_url)
@@ -50,6 +50,36 @@ async def test_calculate_optimization_recommendation_uses_requested_floors(async
     assert any("en lugar de los 5 solicitados" in item for item in recommendations)
 
 
+@pytest.mark.asyncio
+async def test_calculate_batch_returns_columns_in_input_order(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/batch",
+        json={
+            "surface_area": [500.0, 35.0, 1000.0],
+            "floors": [3, 2, 5],
+            "constructibility_coef": [1.2, 1.0, 2.5],
+            "occupation_percentage": [60.0, 60.0, 75.0],
+            "zone_type": ["residencial", "residencial", "comercial"],
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3 and body["approved"] == 2 and body["rejected"] == 1
+    assert body["results"]["max_building_surface"] == [600.0, 35.0, 2500.0]
+    assert body["results"]["compliance_status"] == ["APROBADO", "RECHAZADO", "APROBADO"]
+
+
+@pytest.mark.asyncio
+async def test_calculate_batch_rejects_columns_of_different_length(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/batch",
+        json={"surface_area": [500.0, 600.0], "floors": [3, 3, 3]},
+    )
+
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_validate_compliance_returns_200_with_default_constructibility_warning(async_client):
     response = await async_client.post(
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import zipfile
+
+import fitz
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.api import upload
+from app.core.config import settings
+from app.core.worker_pool import WorkerPool
+from main import app
+
+CERTIFICATE_TEXT = (
+    "MUNICIPALIDAD DE SANTIAGO\n"
+    "CERTIFICADO DE INFORMACIONES PREVIAS\n"
+    "Rol: {rol}\n"
+    "Superficie terreno: 500 m2\n"
+)
+
+
+def _pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((50, 72), text, fontsize=9)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def inline_batch(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload, "extraction_pool", WorkerPool(name="test", mode="inline", workers=1))
+    monkeypatch.setattr(settings, "upload_tmp_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_one_line_per_file_and_isolates_errors(async_client, inline_batch):
+    files = [
+        ("files", ("a.pdf", _pdf(CERTIFICATE_TEXT.format(rol="1-1")), "application/pdf")),
+        ("files", ("roto.pdf", b"no es un pdf", "application/pdf")),
+        ("files", ("notas.txt", b"texto", "text/plain")),
+        ("files", ("b.pdf", _pdf(CERTIFICATE_TEXT.format(rol="2-2")), "application/pdf")),
+    ]
+
+    response = await async_client.post("/api/v1/upload/batch", files=files)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(response)
+    results = {line["filename"]: line for line in lines if line["type"] == "result"}
+    assert results["a.pdf"]["certificate_data"]["rol"] == "1-1"
+    assert results["b.pdf"]["certificate_data"]["rol"] == "2-2"
+    assert not results["roto.pdf"]["success"] and results["roto.pdf"]["error"]
+    assert "no permitido" in results["notas.txt"]["error"]
+    assert all("processing_time" in line for line in lines)
+    assert lines[-1] == {**lines[-1], "type": "summary", "total": 4, "succeeded": 2, "failed": 2}
+    # Los temporales del lote se eliminan al terminar
+    assert os.listdir(inline_batch) == []
+
+
+@pytest.mark.asyncio
+async def test_batch_accepts_zip_archive(async_client, inline_batch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("lote/uno.pdf", _pdf(CERTIFICATE_TEXT.format(rol="10-1")))
+        zf.writestr("lote/dos.pdf", _pdf(CERTIFICATE_TEXT.format(rol="10-2")))
+        zf.writestr("__MACOSX/lote/._uno.pdf", b"metadatos")
+
+    response = await async_client.post(
+        "/api/v1/upload/batch",
+        files={"files": ("lote.zip", archive.getvalue(), "application/zip")},
+    )
+
+    lines = _lines(response)
+    roles = sorted(line["certificate_data"]["rol"] for line in lines if line["type"] == "result")
+    assert roles == ["10-1", "10-2"]
+    assert lines[-1]["succeeded"] == 2
+    assert os.listdir(inline_batch) == []
+
+
+@pytest.mark.asyncio
+async def test_zip_entries_over_the_size_limit_fail_individually(async_client, monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size", 2048)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("grande.pdf", b"0" * 100_000)
+        zf.writestr("chico.pdf", b"%PDF")
+
+    response = await async_client.post(
+        "/api/v1/upload/batch",
+        files={"files": ("lote.zip", archive.getvalue(), "application/zip")},
+    )
+
+    results = {line["filename"]: line for line in _lines(response) if line["type"] == "result"}
+    assert "demasiado grande" in results["grande.pdf"]["error"].lower()
+    assert "demasiado grande" not in (results["chico.pdf"]["error"] or "").lower()
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_too_many_files(async_client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_files", 1)
+    files = [("files", (f"{i}.pdf", b"%PDF", "application/pdf")) for i in range(2)]
+
+    response = await async_client.post("/api/v1/upload/batch", files=files)
+
+    assert response.status_code == 400
+    assert "demasiados archivos" in response.json()["detail"].lower()
@@ -0,0 +1,81 @@
+from app.api.calculate import calculation_result
+from app.api.validate import generate_warnings
+from app.core.cabida_advice import assess_cabida, recommendations, warnings
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+
+
+def _params(**overrides) -> OGUCParameters:
+    values = dict(
+        surface_area=500.0,
+        floors=5,
+        max_height=7.0,
+        constructibility_coef=1.0,
+        occupation_percentage=60.0,
+        zone_type="residencial",
+    )
+    values.update(overrides)
+    return OGUCParameters(**values)
+
+
+def test_each_finding_drives_both_warning_and_recommendation():
+    params = _params()
+    result = OGUCCalculator().calculate_cabida(params)
+
+    findings = assess_cabida(result, params)
+    height = next(finding for finding in findings if finding.field == "height")
+
+    assert height in warnings(findings)
+    assert height.recommendation in recommendations(findings)
+    assert height.recommendation in calculation_result(result, params).recommendations
+    assert height.message in [warning.message for warning in generate_warnings(result, params)]
+
+
+def test_moderate_utilization_is_a_recommendation_but_not_a_warning():
+    params = _params(floors=1, max_height=23.0, constructibility_coef=1.5)
+    result = OGUCCalculator().calculate_cabida(params)._replace(constructibility_utilization=60.0)
+
+    findings = assess_cabida(result, params)
+    utilization = next(finding for finding in findings if finding.field == "optimization")
+
+    assert utilization.severity is None
+    assert utilization.recommendation in recommendations(findings)
+    assert utilization not in warnings(findings)
+
+
+def test_rejection_reasons_map_to_recommendations():
+    params = _params(surface_area=30.0)
+    result = OGUCCalculator().calculate_cabida(params)
+
+    advice = recommendations(assess_cabida(result, params))
+
+    assert any("superficie del terreno" in item for item in advice)
+
+
+def test_optimization_recommendations_require_approval():
+    """Test sin APROBADO se conservan las advertencias pero no las recomendaciones de optimización"""
+    params = _params(occupation_percentage=75.0)
+    rejected = OGUCCalculator().calculate_cabida(params)._replace(constructibility_utilization=45.0)
+    approved = rejected._replace(compliance_status="APROBADO", rejection_reasons=())
+
+    approved_findings = assess_cabida(approved, params)
+    rejected_findings = assess_cabida(rejected, params)
+
+    assert rejected.compliance_status == "RECHAZADO"
+    assert {f.field for f in warnings(approved_findings)} == {f.field for f in warnings(rejected_findings)}
+    assert {"height", "optimization"} <= {f.field for f in warnings(rejected_findings)}
+    assert any("en lugar de los 5 solicitados" in item for item in recommendations(approved_findings))
+    assert any("45.0% del coeficiente" in item for item in recommendations(approved_findings))
+
+    advice = recommendations(rejected_findings)
+    assert not any("en lugar de los" in item or "del coeficiente de constructibilidad." in item for item in advice)
+    assert any("porcentaje de ocupación" in item for item in advice)
+
+
+def test_moderate_utilization_is_omitted_when_rejected():
+    params = _params(floors=1, max_height=23.0, constructibility_coef=1.5, occupation_percentage=75.0)
+    result = OGUCCalculator().calculate_cabida(params)._replace(constructibility_utilization=60.0)
+
+    findings = assess_cabida(result, params)
+
+    assert result.compliance_status == "RECHAZADO"
+    assert all(finding.field != "optimization" for finding in findings)
@@ -0,0 +1,182 @@
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.core.cabida_optimizer import optimize_cabida
+from app.core.cabida_sweep import sweep_cabida, sweep_values
+from app.core.oguc_calculator import OGUCCalculator
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+class TestCabidaOptimizer:
+
+    def setup_method(self):
+        self.calculator = OGUCCalculator()
+
+    @pytest.mark.parametrize("goal,field", [
+        ("dwelling_units", "dwelling_units_max"),
+        ("built_surface", "max_building_surface"),
+        ("floors", "allowed_floors"),
+    ])
+    def test_optimum_is_not_beaten_by_any_compliant_grid_point(self, goal, field):
+        """Test el óptimo cerrado domina a la búsqueda exhaustiva sobre una grilla"""
+        optimization = optimize_cabida(
+            self.calculator, surface_area=820.0, max_height=60.0, constructibility_coef=3.4,
+            occupation_percentage=75.0, zone_types=["residencial"], goal=goal,
+        )
+
+        # Grilla bajo los máximos del certificado
+        sweep = sweep_cabida(self.calculator, 820.0, "residencial", 40.0, {
+            "floors": sweep_values((1, 30, 30), integer=True),
+            "constructibility_coef": sweep_values((0.1, 3.4, 34)),
+            "occupation_percentage": sweep_values((10.0, 75.0, 14)),
+            "max_height": sweep_values((5.0, 60.0, 12)),
+        })
+
+        assert optimization.feasible
+        assert optimization.result.compliance_status == "APROBADO"
+        assert optimization.objective == getattr(optimization.result, field)
+        assert optimization.objective >= np.max(sweep.surfaces[field][sweep.approved])
+
+    def test_certificate_values_above_rules_are_capped(self):
+        """Test coeficiente, altura y ocupación se ajustan a los máximos admisibles"""
+        optimization = optimize_cabida(
+            self.calculator, surface_area=500.0, max_height=60.0, constructibility_coef=4.0,
+            occupation_percentage=85.0, zone_types=["residencial"], goal="built_surface",
+        )
+
+        assert optimization.parameters.constructibility_coef == 3.0
+        assert optimization.parameters.max_height == 50.0
+        assert optimization.parameters.occupation_percentage == 60.0
+        assert optimization.result.max_building_surface == 1500.0
+        assert len(optimization.adjustments) == 3
+        assert [c.name for c in optimization.binding] == ["surface_area", "constructibility_coef"]
+        assert optimization.binding[1].detail == "máximo OGUC"
+
+    def test_zone_admitting_more_occupation_is_chosen(self):
+        """Test entre zonas admisibles se elige la que permite la ocupación del certificado"""
+        optimization = optimize_cabida(
+            self.calculator, surface_area=500.0, max_height=20.0, constructibility_coef=1.0,
+            occupation_percentage=75.0, zone_types=["residencial", "comercial"],
+        )
+
+        assert optimization.parameters.zone_type == "comercial"
+        assert optimization.parameters.occupation_percentage == 75.0
+
+    def test_floors_bound_by_height_or_requested_maximum(self):
+        """Test la altura fija los pisos, salvo que se pida un máximo menor"""
+        by_height = optimize_cabida(
+            self.calculator, 500.0, 14.0, 1.2, 60.0, ["residencial"], goal="floors",
+        )
+        by_request = optimize_cabida(
+            self.calculator, 500.0, 14.0, 1.2, 60.0, ["residencial"], goal="floors", max_floors=3,
+        )
+
+        assert by_height.objective == 5  # 14m / 2.6m
+        assert by_height.binding[0].name == "max_height"
+        assert by_request.objective == 3
+        assert by_request.binding[0].name == "max_floors"
+
+    def test_plan_regulador_limits_cap_the_configuration(self):
+        """Test con comuna y zona del Plan Regulador las cotas son las locales"""
+        optimization = optimize_cabida(
+            self.calculator, surface_area=500.0, max_height=23.0, constructibility_coef=2.0,
+            occupation_percentage=60.0, zone_types=["residencial"], goal="floors",
+            comuna="Providencia", zona="E-Am1",
+        )
+
+        assert optimization.feasible
+        assert optimization.parameters.max_height == 14.0
+        assert optimization.parameters.constructibility_coef == 1.6
+        assert optimization.parameters.occupation_percentage == 50.0
+        assert optimization.result.regulation_zone == "E-Am1 (Providencia)"
+        assert optimization.result == self.calculator.calculate_cabida(optimization.parameters)
+        assert all("Plan Regulador" in adjustment for adjustment in optimization.adjustments)
+        assert optimization.binding[0].detail.startswith("máximo del Plan Regulador")
+
+    def test_small_lot_is_infeasible(self):
+        """Test terreno bajo el mínimo legal: ningún ajuste permite cumplir"""
+        optimization = optimize_cabida(self.calculator, 35.0, 23.0, 1.0, 60.0, ["residencial"])
+
+        assert not optimization.feasible
+        assert optimization.result is None
+        assert "Superficie del terreno" in optimization.infeasible_reasons[0]
+
+    def test_unknown_goal_is_rejected(self):
+        with pytest.raises(ValueError):
+            optimize_cabida(self.calculator, 500.0, 23.0, 1.0, 60.0, ["residencial"], goal="rentabilidad")
+
+
+@pytest.mark.asyncio
+async def test_optimize_endpoint_returns_configuration_and_binding_constraints(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/optimize",
+        json={
+            "certificate_data": {
+                "superficie_terreno": 500.0,
+                "altura_maxima": 14.0,
+                "coeficiente_constructibilidad": 1.2,
+                "porcentaje_ocupacion": 60.0,
+            },
+            "goal": "dwelling_units",
+            "min_dwelling_area": 50.0,
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["feasible"] and body["objective"] == 12  # 600m² / 50m²
+    assert body["parameters"]["floors"] == 5
+    assert {c["constraint"] for c in body["binding_constraints"]} == {
+        "surface_area", "constructibility_coef", "min_dwelling_area",
+    }
+
+
+@pytest.mark.asyncio
+async def test_optimize_endpoint_uses_certificate_comuna_and_zone(async_client):
+    certificate_data = {
+        "comuna": "Providencia",
+        "zona": "E-Am1",
+        "superficie_terreno": 500.0,
+        "altura_maxima": 23.0,
+        "coeficiente_constructibilidad": 2.0,
+        "porcentaje_ocupacion": 50.0,
+    }
+    optimized = (await async_client.post(
+        "/api/v1/calculate/optimize", json={"certificate_data": certificate_data, "goal": "floors"},
+    )).json()
+
+    # El diseño propuesto es el que /cabida aprueba
+    checked = (await async_client.post("/api/v1/calculate/cabida", json={
+        "certificate_data": {
+            **certificate_data,
+            "altura_maxima": optimized["parameters"]["max_height"],
+            "coeficiente_constructibilidad": optimized["parameters"]["constructibility_coef"],
+        },
+        "floors": optimized["parameters"]["floors"],
+        "zone_type": optimized["parameters"]["zone_type"],
+    })).json()
+
+    assert optimized["feasible"]
+    assert optimized["parameters"]["max_height"] == 14.0
+    assert optimized["parameters"]["constructibility_coef"] == 1.6
+    assert checked["compliance_status"] == "APROBADO"
+    assert checked["regulation_zone"] == "E-Am1 (Providencia)"
+
+
+@pytest.mark.asyncio
+async def test_optimize_endpoint_rejects_unknown_goal(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/optimize",
+        json={"certificate_data": {"superficie_terreno": 500.0}, "goal": "rentabilidad"},
+    )
+
+    assert response.status_code == 400
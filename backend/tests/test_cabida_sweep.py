@@ -0,0 +1,127 @@
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.core.cabida_sweep import sweep_cabida, sweep_values
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from main import app
+
+
+def _values(**overrides):
+    values = {
+        "floors": sweep_values(3, integer=True),
+        "constructibility_coef": sweep_values(1.2),
+        "occupation_percentage": sweep_values(60.0),
+        "max_height": sweep_values(23.0),
+    }
+    values.update(overrides)
+    return values
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def test_sweep_values_from_range_list_and_scalar():
+    assert sweep_values((1.0, 2.0, 5)).tolist() == [1.0, 1.25, 1.5, 1.75, 2.0]
+    assert sweep_values([0.5, 1.0]).tolist() == [0.5, 1.0]
+    assert sweep_values(23.0).tolist() == [23.0]
+    # Pisos: enteros distintos
+    assert sweep_values((1, 4, 7), integer=True).tolist() == [1, 2, 3, 4]
+
+
+def test_grid_matches_scalar_calculation():
+    calculator = OGUCCalculator()
+    values = _values(
+        constructibility_coef=sweep_values((0.5, 3.5, 7)),
+        occupation_percentage=sweep_values((40.0, 80.0, 5)),
+    )
+
+    sweep = sweep_cabida(calculator, 500.0, "residencial", 40.0, values)
+
+    assert list(sweep.axes) == ["constructibility_coef", "occupation_percentage"]
+    assert sweep.fixed == {"floors": 3, "max_height": 23.0}
+    assert sweep.shape == (7, 5)
+    for i, coef in enumerate(values["constructibility_coef"].tolist()):
+        for j, occupation in enumerate(values["occupation_percentage"].tolist()):
+            result = calculator.calculate_cabida(OGUCParameters(
+                surface_area=500.0, floors=3, max_height=23.0, constructibility_coef=coef,
+                occupation_percentage=occupation, zone_type="residencial",
+            ))
+            assert sweep.approved[i, j] == (result.compliance_status == "APROBADO")
+            assert sweep.surfaces["max_building_surface"][i, j] == result.max_building_surface
+            assert sweep.surfaces["dwelling_units_max"][i, j] == result.dwelling_units_max
+
+
+def test_boundary_is_last_approved_value_before_rejection():
+    values = _values(occupation_percentage=sweep_values((50.0, 70.0, 5)))
+
+    sweep = sweep_cabida(OGUCCalculator(), 500.0, "residencial", 40.0, values)
+
+    # Residencial admite hasta 60% de ocupación
+    assert sweep.approved.tolist() == [True, True, True, False, False]
+    assert sweep.boundary() == [{"occupation_percentage": 60.0}]
+
+
+def test_boundary_in_two_dimensions():
+    sweep = sweep_cabida(OGUCCalculator(), 500.0, "residencial", 40.0, _values(
+        constructibility_coef=sweep_values([2.0, 3.0, 4.0]),
+        max_height=sweep_values([40.0, 50.0, 60.0]),
+    ))
+
+    expected = np.array([[True, True, False], [True, True, False], [False, False, False]])
+    assert (sweep.approved == expected).all()
+    assert sweep.boundary_mask().sum() == 3  # el 2.0/40.0 no toca celdas rechazadas
+
+
+def test_sweep_applies_plan_regulador_limits():
+    values = _values(
+        max_height=sweep_values([10.5, 14.0, 17.5]),
+        occupation_percentage=sweep_values(50.0),
+    )
+
+    sweep = sweep_cabida(OGUCCalculator(), 500.0, "residencial", 40.0, values, "Providencia", "E-Am1")
+
+    # Providencia E-Am1 admite hasta 14m (la zona residencial, 23m)
+    assert sweep.approved.tolist() == [True, True, False]
+    assert sweep.boundary() == [{"max_height": 14.0}]
+    assert sweep.regulation_zone == "E-Am1 (Providencia)"
+
+
+@pytest.mark.asyncio
+async def test_sweep_endpoint_returns_grid_and_boundary(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/sweep",
+        json={
+            "surface_area": 500.0,
+            "floors": {"start": 1, "stop": 10, "steps": 10},
+            "constructibility_coef": {"start": 0.5, "stop": 3.5, "steps": 100},
+            "occupation_percentage": 60.0,
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["axes"]) == ["floors", "constructibility_coef"]
+    assert body["points"] == 1000
+    assert len(body["compliance"]) == 10 and len(body["compliance"][0]) == 100
+    assert {point["constructibility_coef"] for point in body["boundary"]} == {
+        max(c for c in body["axes"]["constructibility_coef"] if c <= 3.0)
+    }
+
+
+@pytest.mark.asyncio
+async def test_sweep_endpoint_limits_grid_size(async_client, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "calculation_batch_max_rows", 100)
+
+    response = await async_client.post(
+        "/api/v1/calculate/sweep",
+        json={"surface_area": 500.0, "floors": [1, 2], "max_height": {"start": 5, "stop": 50, "steps": 51}},
+    )
+
+    assert response.status_code == 400
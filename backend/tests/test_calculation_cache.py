@@ -0,0 +1,115 @@
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.calculation_cache import CalculationCache, calculation_cache
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from app.core.regulation_rules import DEFAULT_RULES_PATH, RuleSet
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def _params(surface_area: float = 500.0, **overrides) -> OGUCParameters:
+    values = dict(
+        surface_area=surface_area,
+        floors=5,
+        max_height=15.0,
+        constructibility_coef=1.5,
+        occupation_percentage=60.0,
+        zone_type="residencial",
+    )
+    values.update(overrides)
+    return OGUCParameters(**values)
+
+
+def test_repeated_parameters_hit_the_cache():
+    cache = CalculationCache(max_entries=10)
+
+    first = cache.calculate(_params())
+    second = cache.calculate(_params(surface_area=500))  # int y float normalizan igual
+
+    assert second is first
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_cached_result_matches_direct_calculation():
+    cache = CalculationCache(max_entries=10)
+    params = _params(surface_area=30.0)
+
+    cache.calculate(params)
+    cached = cache.calculate(params)
+
+    assert cached == OGUCCalculator().calculate_cabida(params)
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = CalculationCache(max_entries=2)
+    a = cache.calculate(_params(100.0))
+    cache.calculate(_params(200.0))
+    cache.calculate(_params(100.0))
+    cache.calculate(_params(300.0))
+
+    assert cache.calculate(_params(100.0)) is a
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_zero_size_disables_cache():
+    cache = CalculationCache(max_entries=0)
+    cache.calculate(_params())
+    cache.calculate(_params())
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["hits"] == 0
+
+
+def test_new_rules_version_is_not_served_from_cache():
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    data["version"] = "prueba"
+    cache = CalculationCache(max_entries=10)
+
+    current = cache.calculate(_params())
+    updated = cache.calculate(_params(), OGUCCalculator(rules=RuleSet(data)))
+
+    assert updated is not current
+    assert updated.rules_version == "prueba"
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_validate_reuses_calculation_from_calculate_endpoint(async_client):
+    certificate = {
+        "superficie_terreno": 731.0,
+        "altura_maxima": 14.0,
+        "coeficiente_constructibilidad": 1.3,
+        "porcentaje_ocupacion": 55.0,
+    }
+    before = calculation_cache.stats()
+
+    calculated = await async_client.post(
+        "/api/v1/calculate/cabida", json={"certificate_data": certificate, "floors": 4, "zone_type": "residencial"}
+    )
+    validated = await async_client.post(
+        "/api/v1/validate/compliance", json={"certificate_data": certificate, "floors": 4, "zone_type": "residencial"}
+    )
+
+    assert calculated.status_code == 200
+    assert validated.status_code == 200
+    after = calculation_cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+
+    metrics = (await async_client.get("/metrics")).json()
+    assert metrics["calculation_cache"]["hits"] >= 1
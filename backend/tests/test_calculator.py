@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
 
@@ -155,3 +156,91 @@ class TestOGUCCalculator:
         
         assert result.compliance_status == "RECHAZADO"
         assert result.max_building_surface == 0.0
+    
+    def test_results_are_immutable(self):
+        """Test parámetros y resultados son tuplas inmutables (se comparten vía cache)"""
+        params = OGUCParameters(
+            surface_area=35.0,
+            floors=3,
+            max_height=23.0,
+            constructibility_coef=1.2,
+            occupation_percentage=60.0,
+            zone_type="residencial"
+        )
+        
+        result = self.calculator.calculate_cabida(params)
+        
+        assert params.min_dwelling_area == 40.0
+        assert isinstance(result.rejection_reasons, tuple)
+        with pytest.raises(AttributeError):
+            result.compliance_status = "APROBADO"
+        assert result._asdict()["total_surface"] == 35.0
+    
+    def test_batch_matches_scalar_calculation(self):
+        """Test paridad del cálculo por lote con calculate_cabida, terreno a terreno"""
+        rng = np.random.default_rng(7)
+        n = 500
+        lots = {
+            "surface_area": np.round(rng.uniform(0, 3000, n), 1),
+            "floors": rng.integers(1, 20, n),
+            "max_height": np.round(rng.uniform(3, 70, n), 1),
+            "constructibility_coef": np.round(rng.uniform(-0.5, 4.0, n), 2),
+            "occupation_percentage": np.round(rng.uniform(10, 95, n), 1),
+            "zone_type": rng.choice(["residencial", "Comercial", "industrial", "mixto", "rural"], n),
+            "min_dwelling_area": rng.choice([35.0, 40.0, 55.5], n),
+        }
+        
+        batch = self.calculator.calculate_cabida_batch(**lots)
+        
+        assert len(batch) == n
+        assert 0 < int(batch.approved.sum()) < n
+        for i in range(n):
+            params = OGUCParameters(**{name: column[i].item() for name, column in lots.items()})
+            assert batch.row(i) == self.calculator.calculate_cabida(params)
+    
+    def test_batch_broadcasts_scalar_columns(self):
+        """Test columnas escalares comunes a todo el lote"""
+        batch = self.calculator.calculate_cabida_batch(
+            surface_area=[500.0, 35.0, 0.0],
+            floors=3,
+            max_height=23.0,
+            constructibility_coef=1.2,
+            occupation_percentage=60.0,
+            zone_type="residencial",
+        )
+        
+        columns = batch.to_columns()
+        assert columns["max_building_surface"] == [600.0, 42.0, 0.0]
+        assert columns["dwelling_units_max"] == [15, 1, 0]
+        assert columns["constructibility_utilization"] == [100.0, 100.0, 0.0]
+        assert columns["compliance_status"] == ["APROBADO", "RECHAZADO", "RECHAZADO"]
+        assert columns["rejection_reasons"][0] == []
+        assert "Superficie del terreno (35.0m²)" in columns["rejection_reasons"][1][0]
+    
+    def test_batch_applies_plan_regulador_like_scalar(self):
+        """Test límites del Plan Regulador por terreno en el lote, con paridad con calculate_cabida"""
+        lots = {
+            "surface_area": [500.0, 500.0, 500.0, 500.0, 35.0],
+            "floors": [5, 5, 5, 3, 3],
+            "max_height": [23.0, 12.0, 23.0, 10.0, 12.0],
+            "constructibility_coef": [2.0, 1.2, 2.0, 1.0, 1.0],
+            "occupation_percentage": [50.0, 50.0, 50.0, 60.0, 50.0],
+            "zone_type": ["residencial", "residencial", "residencial", "comercial", "residencial"],
+            "comuna": ["Providencia", "Providencia", None, "Ñuñoa", "Temuco"],
+            "zona": ["E-Am1", "E-Am1", None, "Z-1", "Z-1"],
+        }
+        
+        batch = self.calculator.calculate_cabida_batch(**lots)
+        
+        assert batch.compliance_status == ["RECHAZADO", "APROBADO", "APROBADO", "APROBADO", "RECHAZADO"]
+        assert batch.to_columns()["regulation_zone"] == [
+            "E-Am1 (Providencia)", "E-Am1 (Providencia)", None, "Z-1 (Ñuñoa)", None,
+        ]
+        for i in range(len(batch)):
+            params = OGUCParameters(**{name: column[i] for name, column in lots.items()})
+            assert batch.row(i) == self.calculator.calculate_cabida(params)
+    
+    def test_batch_rejects_zero_dwelling_area(self):
+        """Test superficie mínima por vivienda nula en el lote"""
+        with pytest.raises(ValueError):
+            self.calculator.calculate_cabida_batch(500.0, 3, 23.0, 1.2, 60.0, "residencial", [40.0, 0.0])
@@ -0,0 +1,183 @@
+from types import SimpleNamespace
+
+import fitz
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.api import upload
+from app.core import certificate_store as store_module
+from app.core.certificate_store import CertificateHandleError, CertificateStore
+from app.core.worker_pool import WorkerPool
+from app.models.certificate import CertificateData
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(store_module, "time", SimpleNamespace(time=fake))
+    return fake
+
+
+def _store(tmp_path, ttl_seconds=60, max_entries=10):
+    return CertificateStore(f"sqlite:///{tmp_path / 'certificates.db'}", ttl_seconds, max_entries)
+
+
+def test_handles_expire_after_ttl_without_use(clock, tmp_path):
+    store = _store(tmp_path)
+    handle = store.put(CertificateData(rol="1-1"))
+
+    clock.now += 50
+    assert store.get(handle).rol == "1-1"
+    # Cada lectura renueva el plazo
+    clock.now += 50
+    assert store.get(handle) is not None
+
+    clock.now += 61
+    assert store.get(handle) is None
+    assert store.stats()["expired"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(clock, tmp_path):
+    store = _store(tmp_path, max_entries=2)
+    first = store.put(CertificateData(rol="1-1"))
+    second = store.put(CertificateData(rol="2-2"))
+    clock.now += 10
+    store.get(first)
+
+    store.put(CertificateData(rol="3-3"))
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_entries_are_counted_without_querying_the_database(tmp_path, monkeypatch):
+    store = _store(tmp_path, max_entries=10)
+    store.stats()
+    counts = []
+    count = store_module._count
+    monkeypatch.setattr(store_module, "_count", lambda conn: counts.append(1) or count(conn))
+
+    for index in range(10):
+        store.put(CertificateData(rol=f"{index}-1"))
+        assert store.stats()["entries"] == index + 1
+    assert counts == []
+
+    # Al superar el máximo se cuenta una vez y se libera un 10% de holgura
+    store.put(CertificateData(rol="11-1"))
+    assert counts == [1]
+    assert store.stats()["entries"] == 9
+    assert store.stats()["evictions"] == 2
+
+    store.put(CertificateData(rol="12-1"))
+    assert counts == [1]
+
+
+def test_handles_are_shared_between_processes(tmp_path):
+    """Test un handle emitido por un worker de uvicorn se resuelve en otro (misma base)"""
+    handle = _store(tmp_path).put(CertificateData(rol="4-4", superficie_terreno=500.0))
+
+    other_process = _store(tmp_path)
+
+    assert other_process.get(handle) == CertificateData(rol="4-4", superficie_terreno=500.0)
+    assert other_process.stats()["entries"] == 1
+
+
+def test_resolve_prefers_inline_data_and_rejects_unknown_handles(tmp_path):
+    store = _store(tmp_path)
+    inline = CertificateData(rol="9-9")
+
+    assert store.resolve(inline, "desconocido") is inline
+    with pytest.raises(CertificateHandleError):
+        store.resolve(None, "desconocido")
+
+
+def _certificate_pdf():
+    doc = fitz.open()
+    doc.new_page().insert_text(
+        (50, 72),
+        "MUNICIPALIDAD DE SANTIAGO\nCERTIFICADO DE INFORMACIONES PREVIAS\n"
+        "Rol: 123-45\nSuperficie terreno: 500 m2\nAltura máxima: 14 m\n"
+        "Coeficiente de constructibilidad: 1,2\nPorcentaje de ocupación: 60%\n",
+        fontsize=9,
+    )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.mark.asyncio
+async def test_upload_handle_replaces_certificate_payload(async_client, monkeypatch):
+    monkeypatch.setattr(upload, "extraction_pool", WorkerPool(name="test", mode="inline", workers=1))
+
+    uploaded = await async_client.post(
+        "/api/v1/upload/certificate",
+        files={"file": ("cert.pdf", _certificate_pdf(), "application/pdf")},
+        data={"floors": "3", "zone_type": "residencial"},
+    )
+    handle = uploaded.json()["certificate_handle"]
+    # Solo los campos encontrados: el certificado completo queda en el servidor
+    summary = uploaded.json()["certificate_data"]
+    assert summary["rol"] == "123-45"
+    assert "raw_text" not in summary and "nombre_propietario" not in summary
+    parameters = {"floors": 3, "zone_type": "residencial"}
+
+    calculated = await async_client.post(
+        "/api/v1/calculate/cabida", json={"certificate_handle": handle, **parameters}
+    )
+    assert calculated.status_code == 200
+    assert calculated.json()["max_building_surface"] == pytest.approx(600.0)
+
+    validated = await async_client.post(
+        "/api/v1/validate/compliance", json={"certificate_handle": handle, **parameters}
+    )
+    assert validated.status_code == 200
+
+    preview = await async_client.post(
+        "/api/v1/reports/preview-report",
+        json={
+            "certificate_handle": handle,
+            "calculation_result": calculated.json(),
+            "parameters": parameters,
+        },
+    )
+    assert preview.json()["preview"]["certificate_info"]["rol"] == "123-45"
+
+
+@pytest.mark.asyncio
+async def test_unknown_handle_returns_404(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/cabida",
+        json={"certificate_handle": "no-existe", "floors": 3, "zone_type": "residencial"},
+    )
+
+    assert response.status_code == 404
+    assert "expirado" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_request_without_certificate_is_rejected(async_client):
+    response = await async_client.post(
+        "/api/v1/validate/compliance",
+        json={"floors": 3, "zone_type": "residencial"},
+    )
+
+    assert response.status_code == 422
+
@@ -0,0 +1,72 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.calculation_cache import calculation_cache
+from app.core.oguc_calculator import OGUCCalculator
+from main import app
+
+CERTIFICATE = {
+    "rol": "123-45",
+    "comuna": "Providencia",
+    "superficie_terreno": 500.0,
+    "altura_maxima": 14.0,
+    "coeficiente_constructibilidad": 1.2,
+    "porcentaje_ocupacion": 60.0,
+}
+PARAMETERS = {"floors": 4, "zone_type": "residencial", "min_dwelling_area": 40.0}
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    calculation_cache.clear()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def calculations(monkeypatch):
+    calls = []
+    calculate_cabida = OGUCCalculator.calculate_cabida
+
+    def counting(self, params):
+        calls.append(params)
+        return calculate_cabida(self, params)
+
+    monkeypatch.setattr(OGUCCalculator, "calculate_cabida", counting)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_evaluate_matches_separate_endpoints(async_client):
+    request = {"certificate_data": CERTIFICATE, **PARAMETERS}
+
+    evaluated = await async_client.post("/api/v1/evaluate", json=request)
+    calculated = await async_client.post("/api/v1/calculate/cabida", json=request)
+    validated = await async_client.post("/api/v1/validate/compliance", json=request)
+    preview = await async_client.post(
+        "/api/v1/reports/preview-report",
+        json={"certificate_data": CERTIFICATE, "calculation_result": calculated.json(), "parameters": PARAMETERS},
+    )
+
+    assert evaluated.status_code == 200
+    body = evaluated.json()
+    assert body["calculation"] == calculated.json()
+    assert body["validation"] == validated.json()
+    assert body["preview"] == preview.json()["preview"]
+
+
+@pytest.mark.asyncio
+async def test_evaluate_calculates_once(async_client, calculations):
+    response = await async_client.post("/api/v1/evaluate", json={"certificate_data": CERTIFICATE, **PARAMETERS})
+
+    assert response.status_code == 200
+    assert len(calculations) == 1
+
+
+@pytest.mark.asyncio
+async def test_evaluate_requires_surface(async_client):
+    response = await async_client.post("/api/v1/evaluate", json={"certificate_data": {}, **PARAMETERS})
+
+    assert response.status_code == 400
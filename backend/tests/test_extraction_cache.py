@@ -0,0 +1,65 @@
+from app.core.extraction_cache import ExtractionCache, compute_cache_key
+from app.core.pdf_processor import CertificateData
+
+
+def _certificate(rol: str) -> CertificateData:
+    return CertificateData(rol=rol, superficie_terreno=500.0, raw_text="x" * 100)
+
+
+def test_cache_key_depends_on_content_and_file_type():
+    key = compute_cache_key(b"contenido", "cert.pdf")
+
+    assert key == compute_cache_key(b"contenido", "otro_nombre.PDF")
+    assert key != compute_cache_key(b"contenido", "cert.png")
+    assert key != compute_cache_key(b"otro contenido", "cert.pdf")
+
+
+def test_memory_tier_hits_and_misses_are_counted():
+    cache = ExtractionCache(max_entries=10, max_bytes=1024 * 1024)
+
+    assert cache.get("a") is None
+    cache.put("a", _certificate("1-1"))
+    assert cache.get("a").rol == "1-1"
+
+    stats = cache.stats()
+    assert stats["hits_memory"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = ExtractionCache(max_entries=2, max_bytes=1024 * 1024)
+    cache.put("a", _certificate("1-1"))
+    cache.put("b", _certificate("2-2"))
+    cache.get("a")
+    cache.put("c", _certificate("3-3"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    entry_size = len(_certificate("1-1").model_dump_json())
+    cache = ExtractionCache(max_entries=100, max_bytes=entry_size * 2)
+
+    for i in range(5):
+        cache.put(str(i), _certificate("1-1"))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= entry_size * 2
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    first = ExtractionCache(max_entries=10, max_bytes=1024 * 1024, disk_dir=str(tmp_path))
+    first.put("clave", _certificate("123-45"))
+
+    second = ExtractionCache(max_entries=10, max_bytes=1024 * 1024, disk_dir=str(tmp_path))
+    restored = second.get("clave")
+
+    assert restored.rol == "123-45"
+    assert second.stats()["hits_disk"] == 1
+    # El acierto en disco se promueve a memoria
+    assert second.get("clave") is not None
+    assert second.stats()["hits_memory"] == 1
@@ -0,0 +1,86 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.core.config import settings
+from app.core.image_preprocessing import estimate_skew, otsu_threshold, preprocess_image
+
+
+def _page(size=(1200, 1600), color="white", ink="black"):
+    """Hoja sintética con renglones de "texto" (bloques) separados por interlineado"""
+    image = Image.new("RGB", size, color)
+    draw = ImageDraw.Draw(image)
+    for y in range(100, size[1] - 100, 60):
+        for x in range(100, size[0] - 200, 90):
+            draw.rectangle((x, y, x + 70, y + 22), fill=ink)
+    return image
+
+
+def _jpeg(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+@pytest.fixture
+def small_target(monkeypatch):
+    # Lado mayor objetivo: 100 DPI * 8 pulgadas = 800 px
+    monkeypatch.setattr(settings, "ocr_image_dpi", 100)
+    monkeypatch.setattr(settings, "ocr_page_long_side_in", 8.0)
+
+
+def test_large_photo_is_downscaled_to_target_dpi(small_target):
+    prepared = preprocess_image(_jpeg(_page(size=(3000, 4000))))
+
+    assert prepared.original_size == (3000, 4000)
+    assert max(prepared.image.size) <= 800 + 2  # el enderezado puede expandir el lienzo
+    assert prepared.image.mode == "L"
+    assert set(prepared.timings) == {"decode", "grayscale", "downscale", "binarize", "deskew"}
+
+
+def test_jpeg_is_decoded_at_reduced_scale(small_target, monkeypatch):
+    monkeypatch.setattr(settings, "ocr_deskew", False)
+    image = _jpeg(_page(size=(3200, 4000)))
+
+    prepared = preprocess_image(image)
+
+    # 4000 -> draft a 1/4 (1000 px, aún >= 800) y luego reducción exacta
+    assert prepared.image.size == (640, 800)
+
+
+def test_binarization_leaves_only_black_and_white(small_target):
+    prepared = preprocess_image(_jpeg(_page(color=(230, 225, 200), ink=(40, 40, 90))))
+
+    assert set(prepared.image.getdata()) <= {0, 255}
+
+
+def test_otsu_threshold_splits_two_levels():
+    image = Image.new("L", (100, 100), 200)
+    image.paste(30, (0, 0, 100, 40))
+
+    assert 30 <= otsu_threshold(image) < 200
+
+
+@pytest.mark.parametrize("angle", [-3.0, 2.0])
+def test_skew_is_estimated_and_corrected(angle):
+    skewed = _page().convert("L").rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    assert estimate_skew(skewed, max_angle=5.0) == pytest.approx(-angle, abs=0.3)
+
+
+def test_steps_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "ocr_binarize", False)
+    monkeypatch.setattr(settings, "ocr_deskew", False)
+
+    prepared = preprocess_image(Image.open(io.BytesIO(_png_bytes(_page(size=(200, 300))))))
+
+    assert set(prepared.timings) == {"decode", "grayscale", "downscale"}
+    assert prepared.image.size == (200, 300)
+
+
+def _png_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
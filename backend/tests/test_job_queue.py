@@ -0,0 +1,283 @@
+import threading
+import time
+
+import fitz
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+
+from app.api import jobs
+from app.core.config import settings
+from app.core import extraction_cache as extraction_cache_module
+from app.core import worker_pool
+from app.core.extraction_cache import ExtractionCache, cache_key_for_digest
+from app.core.job_queue import (
+    FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobWorkers, job_worker_main, jobs_table,
+    lease_heartbeat, run_job,
+)
+from main import app
+
+
+def _certificate_pdf(rol="123-45"):
+    doc = fitz.open()
+    doc.new_page().insert_text(
+        (50, 72),
+        "MUNICIPALIDAD DE SANTIAGO\nCERTIFICADO DE INFORMACIONES PREVIAS\n"
+        f"Rol: {rol}\nSuperficie terreno: 500 m2\n",
+        fontsize=9,
+    )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ExtractionCache(max_entries=16, max_bytes=1024 * 1024)
+    monkeypatch.setattr(extraction_cache_module, "extraction_cache", cache)
+    monkeypatch.setattr(jobs, "extraction_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch, cache):
+    monkeypatch.setattr(settings, "job_files_dir", str(tmp_path / "files"))
+    monkeypatch.setattr(settings, "job_retry_backoff", 30.0)
+    return JobQueue(f"sqlite:///{tmp_path / 'jobs.db'}")
+
+
+def _submit(queue, tmp_path, content=b"%PDF", name="cert.pdf"):
+    path = tmp_path / f"{time.perf_counter_ns()}-{name}"
+    path.write_bytes(content)
+    return queue.submit(str(path), name, "0" * 64)
+
+
+def test_jobs_are_claimed_in_order_and_completed(queue, tmp_path):
+    first = _submit(queue, tmp_path)
+    second = _submit(queue, tmp_path)
+
+    claimed = queue.claim("w1")
+    other = queue.claim("w2")
+
+    assert (claimed.id, other.id) == (first.id, second.id)
+    assert queue.claim("w3") is None
+
+    queue.complete(claimed, '{"rol": "1-1"}')
+    job = queue.get(first.id)
+    assert job.status == SUCCEEDED
+    assert job.result_data() == {"rol": "1-1"}
+    assert queue.stats() == {QUEUED: 0, RUNNING: 1, SUCCEEDED: 1, FAILED: 0}
+
+
+def test_transient_errors_are_retried_with_backoff(queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_max_attempts", 2)
+    submitted = _submit(queue, tmp_path)
+
+    assert queue.fail(queue.claim("w1"), "falla temporal", retry=True) == QUEUED
+    # Aún en espera del reintento
+    assert queue.claim("w1") is None
+    assert queue.get(submitted.id).available_at > time.time() + 20
+
+    with queue.engine.begin() as conn:
+        conn.execute(update(jobs_table).where(jobs_table.c.id == submitted.id).values(available_at=0))
+    assert queue.fail(queue.claim("w1"), "falla temporal", retry=True) == FAILED
+
+    job = queue.get(submitted.id)
+    assert job.attempts == 2
+    assert job.error == "falla temporal"
+
+
+def test_expired_lease_returns_job_to_the_queue(queue, tmp_path, monkeypatch):
+    submitted = _submit(queue, tmp_path)
+    monkeypatch.setattr(settings, "job_lease_seconds", -1)
+    crashed = queue.claim("w1")
+
+    reclaimed = queue.claim("w2")
+
+    assert reclaimed.id == submitted.id
+    assert reclaimed.attempts == 2
+    # El worker original ya no puede cerrar el trabajo
+    queue.complete(crashed, "{}")
+    assert queue.get(submitted.id).status == RUNNING
+
+
+def test_heartbeat_renews_the_lease_while_processing(queue, tmp_path):
+    submitted = _submit(queue, tmp_path)
+    job = queue.claim("w1")
+    claimed_until = job.lease_expires_at
+
+    with lease_heartbeat(queue, job, interval=0.05):
+        time.sleep(0.3)
+
+    assert queue.get(submitted.id).lease_expires_at > claimed_until
+    # Un worker que perdió el trabajo no puede renovarlo
+    job.worker_id = "otro"
+    assert queue.renew_lease(job) is False
+
+
+def test_purge_removes_only_old_finished_jobs(queue, tmp_path):
+    _submit(queue, tmp_path)
+    done = queue.claim("w1")
+    queue.complete(done, "{}")
+    pending = _submit(queue, tmp_path)
+
+    assert queue.purge_finished(time.time() - 60) == 0
+    assert queue.purge_finished(time.time() + 1) == 1
+
+    assert queue.get(done.id) is None
+    assert queue.get(pending.id).status == QUEUED
+
+
+def test_worker_loop_survives_queue_errors(queue, monkeypatch):
+    monkeypatch.setattr(settings, "database_url", str(queue.engine.url))
+    monkeypatch.setattr(settings, "job_error_backoff", 0.01)
+    monkeypatch.setattr(worker_pool, "_init_extraction_worker", lambda metrics=None: None)
+    stop = threading.Event()
+    calls = []
+
+    def claim(self, worker_id):
+        calls.append(worker_id)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        stop.set()
+        return None
+
+    monkeypatch.setattr(JobQueue, "claim", claim)
+    job_worker_main("w1", stop)
+
+    assert calls == ["w1", "w1"]
+
+
+class _Process:
+    def __init__(self, alive):
+        self.alive = alive
+        self.name = "job-worker-0"
+        self.exitcode = None if alive else -9
+
+    def is_alive(self):
+        return self.alive
+
+
+def test_dead_worker_processes_are_restarted(monkeypatch):
+    workers = JobWorkers(2)
+    workers._stop_event = threading.Event()
+    workers._processes = [_Process(alive=True), _Process(alive=False)]
+    monkeypatch.setattr(workers, "_spawn", lambda index: _Process(alive=True))
+
+    assert workers.restart_dead() == 1
+    assert workers.stats() == {"workers": 2, "alive": 2, "restarts": 1}
+
+    # Después de la detención no se reinician
+    workers._stop_event.set()
+    workers._processes[0].alive = False
+    assert workers.restart_dead() == 0
+
+
+def test_invalid_documents_fail_without_retry(queue, tmp_path):
+    submitted = _submit(queue, tmp_path, content=b"no es un pdf")
+
+    assert run_job(queue, queue.claim("w1")) == FAILED
+
+    job = queue.get(submitted.id)
+    assert job.attempts == 1
+    assert "Error procesando PDF" in job.error
+    assert not (tmp_path / "files").exists() or not any((tmp_path / "files").iterdir())
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_poll_returns_certificate(async_client, queue, monkeypatch):
+    monkeypatch.setattr(jobs, "get_job_queue", lambda: queue)
+
+    submitted = await async_client.post(
+        "/api/v1/jobs/certificate",
+        files={"file": ("cert.pdf", _certificate_pdf("77-1"), "application/pdf")},
+    )
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    assert (await async_client.get(f"/api/v1/jobs/{job_id}")).json()["status"] == QUEUED
+
+    run_job(queue, queue.claim("w1"))
+
+    polled = (await async_client.get(f"/api/v1/jobs/{job_id}")).json()
+    assert polled["status"] == SUCCEEDED
+    assert polled["certificate_data"]["rol"] == "77-1"
+    assert polled["certificate_handle"]
+    # El handle se conserva entre consultas
+    assert (await async_client.get(f"/api/v1/jobs/{job_id}")).json()["certificate_handle"] == polled["certificate_handle"]
+
+
+def test_finished_jobs_are_stored_in_the_extraction_cache(queue, cache, tmp_path):
+    path = tmp_path / "cert.pdf"
+    path.write_bytes(_certificate_pdf("8-8"))
+    submitted = queue.submit(str(path), "cert.pdf", "a" * 64, include_raw_text=True)
+
+    assert run_job(queue, queue.claim("w1")) == SUCCEEDED
+
+    assert cache.get(cache_key_for_digest("a" * 64, "cert.pdf", True)).rol == "8-8"
+    assert cache.get(cache_key_for_digest("a" * 64, "cert.pdf")) is None
+    assert queue.get(submitted.id).include_raw_text
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_keeps_raw_text_when_requested(async_client, queue, cache, monkeypatch):
+    monkeypatch.setattr(jobs, "get_job_queue", lambda: queue)
+    content = _certificate_pdf("9-9")
+    for include_raw_text in (True, False):
+        first = await async_client.post(
+            "/api/v1/jobs/certificate",
+            files={"file": ("cert.pdf", content, "application/pdf")},
+            data={"include_raw_text": str(include_raw_text).lower()},
+        )
+        run_job(queue, queue.claim("w1"))
+        assert (await async_client.get(f"/api/v1/jobs/{first.json()['job_id']}")).json()["status"] == SUCCEEDED
+
+    # Ambas variantes ya están en el cache: los reenvíos nacen terminados
+    for include_raw_text in (True, False):
+        submitted = await async_client.post(
+            "/api/v1/jobs/certificate",
+            files={"file": ("cert.pdf", content, "application/pdf")},
+            data={"include_raw_text": str(include_raw_text).lower()},
+        )
+        assert submitted.json()["status"] == SUCCEEDED
+        job = queue.get(submitted.json()["job_id"])
+        assert job.include_raw_text is include_raw_text
+
+        polled = (await async_client.get(f"/api/v1/jobs/{job.id}")).json()
+        assert ("raw_text" in polled["certificate_data"]) is include_raw_text
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_returns_404(async_client, queue, monkeypatch):
+    monkeypatch.setattr(jobs, "get_job_queue", lambda: queue)
+
+    response = await async_client.get("/api/v1/jobs/no-existe")
+
+    assert response.status_code == 404
+
+
+def test_worker_processes_consume_the_queue(queue, tmp_path, monkeypatch):
+    # Los procesos hijos leen la configuración del entorno
+    monkeypatch.setenv("DATABASE_URL", str(queue.engine.url))
+    monkeypatch.setenv("JOB_POLL_INTERVAL", "0.05")
+    submitted = _submit(queue, tmp_path, content=_certificate_pdf("5-5"))
+
+    workers = JobWorkers(1, "spawn")
+    workers.start()
+    try:
+        deadline = time.time() + 30
+        while queue.get(submitted.id).status != SUCCEEDED and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        workers.shutdown()
+
+    job = queue.get(submitted.id)
+    assert job.status == SUCCEEDED
+    assert job.result_data()["rol"] == "5-5"
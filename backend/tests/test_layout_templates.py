@@ -0,0 +1,148 @@
+import json
+from dataclasses import replace
+
+import pytest
+from PIL import Image
+
+from app.core import pdf_processor
+from app.core.config import settings
+from app.core.layout_templates import DEFAULT_TEMPLATES, Region, crop_box, load_templates, parse_templates
+from app.core.pdf_processor import PDFProcessor
+
+HEADER = "MUNICIPALIDAD DE SANTIAGO\nCERTIFICADO DE INFORMACIONES PREVIAS N° 1234/2024\n"
+PREDIO = "Rol: 123-45\nComuna: Santiago\nSuperficie terreno: 500,5 m²\n"
+NORMAS = (
+    "Zona: ZH-4\n"
+    "Altura máxima: 14 m\n"
+    "Coeficiente de constructibilidad: 1,2\n"
+    "Porcentaje de ocupación: 60%\n"
+)
+TEMPLATE_JSON = [{
+    "name": "cip_vertical",
+    "signature": ["Dirección de Obras", "CIP"],
+    "header": [0, 0, 1, 0.1],
+    "regions": [{"name": "datos", "box": [0.5, 0.1, 1, 0.5], "fields": ["rol"]}],
+}]
+
+
+class FakeOCR:
+    """OCR simulado: responde en orden y registra el tamaño de cada imagen"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sizes = []
+
+    def __call__(self, image):
+        self.sizes.append(image.size)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(settings, "ocr_layout_templates", True)
+    monkeypatch.setattr(settings, "ocr_layout_templates_path", None)
+    return PDFProcessor()
+
+
+def test_crop_box_is_relative_to_image_size():
+    image = Image.new("L", (1000, 2000))
+
+    assert crop_box(image, (0.0, 0.14, 0.75, 0.36)).size == (750, 440)
+    assert crop_box(image, (0.5, 0.9, 1.0, 1.0)).size == (500, 200)
+
+
+def test_header_match_tolerates_ocr_line_breaks():
+    template = DEFAULT_TEMPLATES[0]
+
+    assert template.matches("MUNICIPALIDAD\nCERTIFICADO  DE\nInformaciones Previas")
+    assert not template.matches("Un documento cualquiera")
+
+
+def test_only_template_regions_are_ocrd(processor, monkeypatch):
+    fake = FakeOCR(HEADER, PREDIO, NORMAS)
+    monkeypatch.setattr(processor, "ocr_image", fake)
+    page = Image.new("L", (1000, 1400), 255)
+
+    text = processor.ocr_page_image(page)
+
+    data = processor.extract_certificate_data(None, processor.scan_text(text))
+    assert data.rol == "123-45" and data.porcentaje_ocupacion == 60.0
+    assert (1000, 1400) not in fake.sizes
+    assert sum(w * h for w, h in fake.sizes) < 0.25 * 1000 * 1400
+
+
+def test_default_template_ocrs_a_fifth_of_the_page(processor, monkeypatch):
+    """Test fracción de píxeles procesados con OCR por el formulario tipo"""
+    fake = FakeOCR(HEADER, PREDIO, NORMAS)
+    monkeypatch.setattr(processor, "ocr_image", fake)
+    width, height = 2480, 3508  # A4 a 300 dpi
+
+    processor.ocr_page_image(Image.new("L", (width, height), 255))
+
+    fraction = sum(w * h for w, h in fake.sizes) / (width * height)
+    assert fraction == pytest.approx(DEFAULT_TEMPLATES[0].coverage(), abs=0.005)
+    assert fraction < 0.25
+
+
+def test_full_page_ocr_when_no_template_matches(processor, monkeypatch):
+    fake = FakeOCR("Boleta de honorarios", "texto completo")
+    monkeypatch.setattr(processor, "ocr_image", fake)
+    page = Image.new("L", (1000, 1400), 255)
+
+    assert processor.ocr_page_image(page) == "texto completo"
+    assert fake.sizes[-1] == (1000, 1400)
+
+
+def test_full_page_ocr_when_regions_miss_declared_fields(processor, monkeypatch):
+    # El encabezado coincide pero las normas no están donde el formato espera
+    fake = FakeOCR(HEADER, PREDIO, "Sin datos", HEADER + PREDIO + NORMAS)
+    monkeypatch.setattr(processor, "ocr_image", fake)
+    page = Image.new("L", (1000, 1400), 255)
+
+    text = processor.ocr_page_image(page)
+
+    assert processor.scan_text(text).fields["zona"] == "ZH-4"
+    assert fake.sizes[-1] == (1000, 1400)
+
+
+def test_regions_with_required_fields_skip_full_page_ocr(processor, monkeypatch):
+    # El formato declara un campo que no está en REQUIRED_FIELDS y no se encontró
+    template = DEFAULT_TEMPLATES[0]
+    extended = replace(template, regions=template.regions + (Region("firma", (0.5, 0.9, 1.0, 1.0), ("fecha",)),))
+    monkeypatch.setattr(pdf_processor, "load_templates", lambda path: (extended,))
+    fake = FakeOCR(HEADER, PREDIO, NORMAS, "Sin datos")
+    monkeypatch.setattr(processor, "ocr_image", fake)
+    page = Image.new("L", (1000, 1400), 255)
+
+    text = processor.ocr_page_image(page)
+
+    assert processor.scan_text(text).fields["zona"] == "ZH-4"
+    assert (1000, 1400) not in fake.sizes
+
+
+def test_layout_templates_can_be_disabled(processor, monkeypatch):
+    monkeypatch.setattr(settings, "ocr_layout_templates", False)
+    fake = FakeOCR("texto completo")
+    monkeypatch.setattr(processor, "ocr_image", fake)
+
+    processor.ocr_page_image(Image.new("L", (100, 140)))
+
+    assert fake.sizes == [(100, 140)]
+
+
+def test_templates_from_file_are_tried_first(tmp_path):
+    path = tmp_path / "layouts.json"
+    path.write_text(json.dumps(TEMPLATE_JSON), encoding="utf-8")
+
+    templates = load_templates(str(path))
+
+    assert [t.name for t in templates] == ["cip_vertical", "cip_formulario"]
+    assert templates[0].signature == ("dirección de obras", "cip")
+    assert templates[0].fields == ("rol",)
+
+
+def test_invalid_box_is_rejected():
+    data = [dict(TEMPLATE_JSON[0], header=[0, 0.5, 1, 0.2])]
+
+    with pytest.raises(ValueError, match="Caja inválida"):
+        parse_templates(data)
@@ -0,0 +1,291 @@
+import sys
+import threading
+import time
+
+import fitz
+import pytest
+from PIL import Image
+
+from app.core import pdf_processor
+from app.core.config import settings
+from app.core.pdf_processor import OCREngine, OCREnginePool, OCRMetrics, PDFProcessor
+from app.core.worker_pool import WorkerPool, _init_extraction_worker
+
+SAMPLE_TEXT = (
+    "MUNICIPALIDAD DE SANTIAGO\n"
+    "CERTIFICADO DE INFORMACIONES PREVIAS N° 1234/2024\n"
+    "Santiago, 15 de marzo de 2024\n"
+    "Rol: 123-45\n"
+    "Dirección: Av. Libertador 1234\n"
+    "Comuna: Santiago\n"
+    "Superficie terreno: 500,5 m²\n"
+    "Zona: ZH-4  Altura máxima: 14 m\n"
+    "Coeficiente de constructibilidad: 1,2\n"
+    "Porcentaje de ocupación: 60%\n"
+    "33°26'15S 70°39'02W\n"
+)
+
+
+class TestPDFProcessor:
+
+    def setup_method(self):
+        self.processor = PDFProcessor()
+
+    def test_extract_certificate_data_fields(self):
+        """Test extracción de campos con coma decimal"""
+        data = self.processor.extract_certificate_data(SAMPLE_TEXT)
+
+        assert data.rol == "123-45"
+        assert data.comuna == "Santiago"
+        assert data.superficie_terreno == 500.5
+        assert data.coeficiente_constructibilidad == 1.2
+        assert data.porcentaje_ocupacion == 60.0
+        assert data.coordenadas == "33°26'15S 70°39'02W"
+        assert data.raw_text == SAMPLE_TEXT
+
+    def test_labels_sharing_a_line_are_all_found(self):
+        """Test etiquetas en la misma línea (Zona y Altura máxima)"""
+        data = self.processor.extract_certificate_data(SAMPLE_TEXT)
+
+        assert data.zona == "ZH-4  Altura máxima: 14 m"
+        assert data.altura_maxima == 14.0
+
+    def test_first_occurrence_wins_even_if_not_numeric(self):
+        """Test semántica de primera aparición por campo"""
+        data = self.processor.extract_certificate_data(
+            "Superficie terreno: 1.2.3 m2\nSuperficie terreno: 500 m2\nRol: 1-1\nRol: 2-2\n"
+        )
+
+        assert data.superficie_terreno is None
+        assert data.rol == "1-1"
+
+    def test_validate_certificate_format(self):
+        """Test validación por palabras clave"""
+        assert self.processor.validate_certificate_format(SAMPLE_TEXT)
+        assert not self.processor.validate_certificate_format("Municipalidad, rol y superficie")
+        assert not self.processor.validate_certificate_format(
+            "Certificado de Informaciones Previas sin otros indicadores"
+        )
+
+    def test_extract_additional_data(self):
+        """Test coordenadas, fecha y número de certificado"""
+        additional = self.processor.extract_additional_data(SAMPLE_TEXT)
+
+        assert additional == {
+            "coordinates": "33°26'15S 70°39'02W",
+            "certificate_date": "15 marzo 2024",
+            "certificate_number": "1234/2024",
+        }
+
+    def test_process_file_rejects_non_certificate_text(self):
+        """Test rechazo de documentos que no son CIP"""
+        with pytest.raises(ValueError):
+            self.processor.process_file(b"no es un pdf", "archivo.txt")
+
+
+def _pdf_with_pages(page_texts):
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        if text:
+            page.insert_text((50, 72), text, fontsize=9)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+class TestHybridPDFExtraction:
+
+    def setup_method(self):
+        self.processor = PDFProcessor()
+
+    def test_only_pages_without_text_layer_are_ocrd_in_order(self, monkeypatch):
+        """Test OCR solo de páginas escaneadas, unidas en orden"""
+        calls = []
+
+        def fake_ocr(image):
+            calls.append(image.size)
+            return f"OCR {len(calls)}\n"
+
+        monkeypatch.setattr(self.processor, "ocr_image", fake_ocr)
+        content = _pdf_with_pages([SAMPLE_TEXT, "", "Anexo con texto suficiente en la capa PDF"])
+
+        text = self.processor.extract_text_from_pdf(content)
+
+        assert len(calls) == 1
+        assert text.index("Rol: 123-45") < text.index("OCR 1") < text.index("Anexo con texto")
+
+    def test_scanned_pages_are_ocrd_in_parallel(self, monkeypatch):
+        """Test paralelismo por página: el tiempo total ≈ la página más lenta"""
+        monkeypatch.setattr(settings, "ocr_render_dpi", 36)
+
+        def slow_ocr(image):
+            time.sleep(0.3)
+            return "pagina\n"
+
+        monkeypatch.setattr(self.processor, "ocr_image", slow_ocr)
+        content = _pdf_with_pages(["", "", "", ""])
+
+        start = time.perf_counter()
+        text = self.processor.extract_text_from_pdf(content)
+        elapsed = time.perf_counter() - start
+
+        assert text == "pagina\n" * 4
+        assert elapsed < 0.3 * 4 * 0.75
+
+    def test_hybrid_mode_can_be_disabled(self, monkeypatch):
+        """Test modo solo capa de texto"""
+        monkeypatch.setattr(settings, "pdf_hybrid_ocr", False)
+        monkeypatch.setattr(self.processor, "ocr_image", lambda image: pytest.fail("no debe usar OCR"))
+
+        assert self.processor.extract_text_from_pdf(_pdf_with_pages([""])) == ""
+
+
+class TestIncrementalPDFExtraction:
+
+    def setup_method(self):
+        self.processor = PDFProcessor()
+        self.content = _pdf_with_pages([SAMPLE_TEXT] + ["Anexo: planos y antecedentes"] * 29)
+
+    def _count_pages(self, monkeypatch):
+        read = []
+        original = self.processor.iter_pdf_pages
+
+        def spy(pdf_content):
+            for page in original(pdf_content):
+                read.append(page.index)
+                yield page
+
+        monkeypatch.setattr(self.processor, "iter_pdf_pages", spy)
+        return read
+
+    def test_stops_reading_once_required_data_is_found(self, monkeypatch):
+        """Test salida temprana: un CIP de 30 páginas con los datos en la primera"""
+        read = self._count_pages(monkeypatch)
+
+        data = self.processor.process_file(self.content, "cert.pdf")
+
+        assert read == [0]
+        assert data.rol == "123-45"
+        assert data.porcentaje_ocupacion == 60.0
+        assert data.raw_text is None
+
+    def test_keep_raw_text_reads_every_page(self, monkeypatch):
+        """Test texto completo solo cuando se pide"""
+        read = self._count_pages(monkeypatch)
+
+        data = self.processor.process_file(self.content, "cert.pdf", keep_raw_text=True)
+
+        assert len(read) == 30
+        assert data.raw_text.count("Anexo") == 29
+        assert data.rol == "123-45"
+
+    def test_fields_spread_across_pages_are_accumulated(self):
+        """Test datos repartidos en varias páginas"""
+        first, second = SAMPLE_TEXT.split("Zona:")
+        content = _pdf_with_pages([first, "Zona:" + second, "Anexo"])
+
+        data = self.processor.process_file(content, "cert.pdf")
+
+        assert data.zona.startswith("ZH-4")
+        assert data.altura_maxima == 14.0
+
+
+class FakeEngine(OCREngine):
+    name = "fake"
+    instances = []
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.closed = False
+        FakeEngine.instances.append(self)
+
+    def image_to_string(self, image):
+        if self.fail:
+            raise RuntimeError("motor dañado")
+        time.sleep(0.01)
+        return f"motor {id(self)}"
+
+    def close(self):
+        self.closed = True
+
+
+def test_incomplete_engine_fails_on_instantiation():
+    class IncompleteEngine(OCREngine):
+        name = "incompleto"
+
+    with pytest.raises(TypeError):
+        IncompleteEngine()
+
+
+class TestOCREnginePool:
+
+    def setup_method(self):
+        FakeEngine.instances = []
+        self.metrics = OCRMetrics()
+
+    def test_engines_are_reused_and_recycled_after_max_jobs(self):
+        """Test reutilización de motores y reciclaje tras N imágenes"""
+        pool = OCREnginePool(FakeEngine, size=1, max_jobs=3, metrics=self.metrics)
+        image = Image.new("L", (10, 10))
+
+        outputs = [pool.run(image) for _ in range(7)]
+
+        assert len(set(outputs[:3])) == 1 and outputs[3] != outputs[0]
+        assert len(FakeEngine.instances) == 3
+        assert [engine.closed for engine in FakeEngine.instances] == [True, True, False]
+        stats = self.metrics.snapshot()
+        assert stats["jobs"] == 7
+        assert stats["engines_created"] == 3
+        assert stats["engines_recycled"] == 2
+        assert stats["in_use"] == 0
+
+    def test_concurrency_is_bounded_by_pool_size(self):
+        """Test a lo más ``size`` motores en uso; el resto espera"""
+        pool = OCREnginePool(FakeEngine, size=2, max_jobs=0, metrics=self.metrics)
+        pool.warm()
+        image = Image.new("L", (10, 10))
+
+        threads = [threading.Thread(target=pool.run, args=(image,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(FakeEngine.instances) == 2
+        stats = self.metrics.snapshot()
+        assert stats["jobs"] == 8
+        assert stats["waits"] > 0
+
+    def test_failing_engine_is_discarded(self):
+        """Test un motor que falla no vuelve al pool"""
+        pool = OCREnginePool(lambda: FakeEngine(fail=not FakeEngine.instances), size=1, max_jobs=0, metrics=self.metrics)
+        image = Image.new("L", (10, 10))
+
+        with pytest.raises(RuntimeError):
+            pool.run(image)
+        assert pool.run(image).startswith("motor")
+
+        assert FakeEngine.instances[0].closed
+        assert self.metrics.snapshot()["failures"] == 1
+
+    def test_auto_backend_falls_back_to_pytesseract(self, monkeypatch):
+        """Test respaldo a pytesseract cuando tesserocr no está disponible"""
+        monkeypatch.setattr(settings, "ocr_backend", "auto")
+        monkeypatch.setitem(sys.modules, "tesserocr", None)
+
+        assert pdf_processor.resolve_ocr_backend() == "pytesseract"
+
+    def test_worker_processes_share_metrics_with_parent(self):
+        """Test los workers precalientan motores y reportan en métricas compartidas"""
+        metrics = OCRMetrics("spawn")
+        pool = WorkerPool(
+            name="test", mode="process", workers=1, start_method="spawn",
+            initializer=_init_extraction_worker, initargs=(metrics,),
+        )
+        pool.start()
+        try:
+            assert metrics.snapshot()["engines_created"] == settings.ocr_engine_pool_size
+        finally:
+            pool.shutdown()
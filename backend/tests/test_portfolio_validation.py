@@ -0,0 +1,103 @@
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.core.portfolio_stats import PortfolioStats, normalize_reason
+from main import app
+
+APPROVED = {
+    "superficie_terreno": 500.0,
+    "altura_maxima": 14.0,
+    "coeficiente_constructibilidad": 1.2,
+    "porcentaje_ocupacion": 60.0,
+    "rol": "1-1",
+    "comuna": "Providencia",
+}
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def _lot(lot_id, **certificate):
+    return json.dumps({
+        "lot_id": lot_id,
+        "certificate_data": {**APPROVED, **certificate},
+        "floors": 4,
+        "zone_type": "residencial",
+    })
+
+
+def test_normalize_reason_drops_lot_values():
+    assert normalize_reason("Altura máxima (60m) excede límites razonables (50m)") == (
+        "Altura máxima excede límites razonables"
+    )
+
+
+def test_stats_aggregate_counts_scores_and_reasons():
+    stats = PortfolioStats(top_reasons=1)
+    stats.add(True, 100, [])
+    stats.add(False, 0, ["Altura máxima (60m) excede límites razonables (50m)"])
+    stats.add(False, 0, ["Altura máxima (70m) excede límites razonables (50m)"])
+    stats.add_failure()
+
+    snapshot = stats.snapshot()
+
+    assert (snapshot["total"], snapshot["valid"], snapshot["invalid"], snapshot["failed"]) == (4, 1, 2, 1)
+    assert snapshot["score"]["mean"] == pytest.approx(100 / 3)
+    assert snapshot["score"]["distribution"]["0-10"] == 2
+    assert snapshot["score"]["distribution"]["90-100"] == 1
+    assert snapshot["top_rejection_reasons"] == [{"reason": "Altura máxima excede límites razonables", "count": 2}]
+    assert snapshot["rejection_reasons_approximate"] is False
+
+
+def test_stats_memory_is_bounded_by_reason_capacity():
+    stats = PortfolioStats(reason_capacity=4)
+    for _ in range(50):
+        stats.add(False, 0, ["frecuente"])
+    for index in range(20):
+        stats.add(False, 0, [f"raro {index}"])
+
+    snapshot = stats.snapshot()
+
+    assert len(stats._reasons) == 4
+    assert snapshot["top_rejection_reasons"][0] == {"reason": "frecuente", "count": 50}
+    assert snapshot["rejection_reasons_approximate"] is True
+
+
+@pytest.mark.asyncio
+async def test_portfolio_streams_results_stats_and_summary(async_client, monkeypatch):
+    monkeypatch.setattr(settings, "portfolio_chunk_size", 2)
+    monkeypatch.setattr(settings, "portfolio_stats_interval", 2)
+    lots = "\n".join([
+        _lot("a"),
+        _lot("b", altura_maxima=60.0),
+        "",
+        "{no es json",
+        _lot("c"),
+    ])
+
+    response = await async_client.post(
+        "/api/v1/validate/portfolio",
+        files={"file": ("cartera.ndjson", lots.encode("utf-8"), "application/x-ndjson")},
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = [line for line in lines if line["type"] == "result"]
+    assert [line["index"] for line in results] == [0, 1, 2, 3]
+    assert [line["lot_id"] for line in results] == ["a", "b", None, "c"]
+    assert [line["success"] for line in results] == [True, True, False, True]
+    assert results[1]["validation"]["is_valid"] is False
+    assert [line["total"] for line in lines if line["type"] == "stats"] == [2, 4]
+
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert (summary["total"], summary["valid"], summary["invalid"], summary["failed"]) == (4, 2, 1, 1)
+    assert summary["top_rejection_reasons"][0]["reason"] == "Altura máxima excede límites razonables"
@@ -0,0 +1,126 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from app.core.regulation_dataset import (
+    RegulationDatasetError,
+    build_regulation_db,
+    normalize_zone,
+    open_regulation_dataset,
+)
+from main import app
+
+CSV = (
+    "comuna,zona,max_height,max_constructibility,max_occupation,descripcion\n"
+    "Ñuñoa,Z-1,10.5,1.2,0.4,Residencial baja\n"
+    "Providencia,E-Am1,14.0,,0.5,\n"
+)
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    source = tmp_path / "prc.csv"
+    source.write_text(CSV, encoding="utf-8")
+    return open_regulation_dataset(str(source), str(tmp_path / "prc.sqlite"))
+
+
+def _params(**overrides) -> OGUCParameters:
+    values = dict(
+        surface_area=500.0,
+        floors=4,
+        max_height=12.0,
+        constructibility_coef=1.0,
+        occupation_percentage=50.0,
+        zone_type="residencial",
+    )
+    values.update(overrides)
+    return OGUCParameters(**values)
+
+
+class TestRegulationDataset:
+
+    def test_lookup_tolerates_accents_case_and_zone_prefix(self, dataset):
+        zone = dataset.lookup("NUNOA ", "Zona z-1")
+
+        assert zone.comuna == "Ñuñoa"
+        assert zone.limits() == {"max_height": 10.5, "max_constructibility": 1.2, "max_occupation": 0.4}
+        assert normalize_zone("ZONA  E-Am1") == "e-am1"
+
+    def test_missing_values_and_unknown_zones(self, dataset):
+        assert dataset.lookup("Providencia", "E-Am1").limits() == {"max_height": 14.0, "max_occupation": 0.5}
+        assert dataset.lookup("Providencia", "E-Aa") is None
+        assert dataset.lookup(None, "Z-1") is None
+        assert dataset.stats()["matches"] == 1
+
+    def test_database_is_rebuilt_when_csv_changes(self, tmp_path, dataset):
+        source = tmp_path / "prc.csv"
+        source.write_text(CSV + "Santiago,A,38.0,3.0,0.8,\n", encoding="utf-8")
+
+        updated = open_regulation_dataset(str(source), str(tmp_path / "prc.sqlite"))
+
+        assert updated.version != dataset.version
+        assert updated.lookup("Santiago", "A") is not None
+
+    def test_duplicate_zones_are_rejected(self, tmp_path):
+        source = tmp_path / "prc.csv"
+        source.write_text(CSV + "nunoa,zona Z-1,9.0,1.0,0.4,\n", encoding="utf-8")
+
+        with pytest.raises(RegulationDatasetError):
+            build_regulation_db(str(source), str(tmp_path / "prc.sqlite"))
+
+
+class TestCalculatorWithRegulationDataset:
+
+    def test_matching_comuna_and_zone_apply_local_limits(self, dataset):
+        calculator = OGUCCalculator(regulations=dataset)
+
+        result = calculator.calculate_cabida(_params(
+            comuna="Ñuñoa", zona="Z-1", max_height=12.0, constructibility_coef=1.5,
+        ))
+
+        assert result.compliance_status == "RECHAZADO"
+        assert result.regulation_zone == "Z-1 (Ñuñoa)"
+        assert len(result.rejection_reasons) == 3  # altura, coeficiente y ocupación 50% > 40%
+        assert any("Plan Regulador" in reason and "10.5m" in reason for reason in result.rejection_reasons)
+
+    def test_without_match_generic_zone_rules_apply(self, dataset):
+        calculator = OGUCCalculator(regulations=dataset)
+
+        local = calculator.calculate_cabida(_params(comuna="Temuco", zona="Z-1", max_height=12.0))
+
+        assert local.compliance_status == "APROBADO"
+        assert local.regulation_zone is None
+        assert local == calculator.calculate_cabida(_params(max_height=12.0))
+
+
+@pytest.mark.asyncio
+async def test_calculate_endpoint_uses_certificate_comuna_and_zone(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/cabida",
+        json={
+            "certificate_data": {
+                "comuna": "Providencia",
+                "zona": "E-Am1",
+                "superficie_terreno": 500.0,
+                "altura_maxima": 20.0,
+                "coeficiente_constructibilidad": 1.2,
+                "porcentaje_ocupacion": 50.0,
+            },
+            "floors": 5,
+            "zone_type": "residencial",
+        },
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["regulation_zone"] == "E-Am1 (Providencia)"
+    assert body["compliance_status"] == "RECHAZADO"
+    assert any("Plan Regulador" in reason for reason in body["rejection_reasons"])
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from app.core.regulation_rules import (
+    DEFAULT_RULES_PATH,
+    RuleRegistry,
+    RuleSet,
+    RuleSetError,
+    load_rule_set,
+)
+from main import app
+
+
+def _rules_data(**overrides):
+    with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    data.update(overrides)
+    return data
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    # Asegurar una fecha de modificación distinta aunque el sistema tenga baja resolución
+    stamp = time.time() + len(data["version"])
+    os.utime(path, (stamp, stamp))
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+class TestRuleSet:
+
+    def setup_method(self):
+        self.rules = load_rule_set(DEFAULT_RULES_PATH)
+
+    def test_bundled_rules_are_versioned(self):
+        assert self.rules.version
+        assert set(self.rules.zones) == {"residencial", "comercial", "industrial", "mixto"}
+
+    def test_zone_limits_are_precompiled(self):
+        (occupation_rule,) = [rule for rule in self.rules.rules_for("comercial") if rule.parameter == "occupation_percentage"]
+
+        assert occupation_rule.max == 80.0
+        assert self.rules.bounds("constructibility_coef", "comercial") == (None, 3.0)
+        # Zona desconocida: límites de la zona por defecto
+        assert self.rules.rules_for("rural") is self.rules.rules_for("residencial")
+        assert self.rules.zone_restrictions("rural") == self.rules.zone_restrictions("residencial")
+
+    def test_rejection_messages_name_value_and_limit(self):
+        reasons = self.rules.rejection_reasons({
+            "surface_area": 35.0, "floors": 2, "max_height": 60.0,
+            "constructibility_coef": 0.0, "occupation_percentage": 85.0,
+        }, "Mixto")
+
+        assert reasons == [
+            "Superficie del terreno (35.0m²) inferior al mínimo legal (40.0m²)",
+            "Coeficiente de constructibilidad (0.0) fuera de rango válido (0.1 - 3.0)",
+            "Altura máxima (60.0m) excede límites razonables (50m)",
+            "Porcentaje de ocupación (85.0%) excede máximo para zona Mixto (70.0%)",
+        ]
+
+    def test_vectorized_mask_matches_scalar_rules(self):
+        rng = np.random.default_rng(3)
+        n = 300
+        columns = {
+            "surface_area": rng.uniform(0, 100, n),
+            "floors": rng.integers(1, 10, n),
+            "max_height": rng.uniform(20, 60, n),
+            "constructibility_coef": rng.uniform(-1, 4, n),
+            "occupation_percentage": rng.uniform(40, 90, n),
+        }
+        zones = rng.choice(["residencial", "Comercial", "industrial", "rural"], n)
+
+        mask = self.rules.violations_mask(columns, zones)
+
+        for i in range(n):
+            values = {name: column[i].item() for name, column in columns.items()}
+            assert mask[i] == bool(self.rules.rejection_reasons(values, str(zones[i])))
+
+    def test_invalid_rule_sets_are_rejected(self):
+        with pytest.raises(RuleSetError):
+            RuleSet(_rules_data(default_zone="rural"))
+        with pytest.raises(RuleSetError):
+            RuleSet(_rules_data(rules=[{"id": "x", "parameter": "pisos", "max": 3, "message": ""}]))
+        with pytest.raises(RuleSetError):
+            RuleSet(_rules_data(rules=[{"id": "x", "parameter": "max_height", "max": "zone.inexistente", "message": ""}]))
+
+    def test_results_carry_rules_version(self):
+        calculator = OGUCCalculator(self.rules)
+        params = OGUCParameters(
+            surface_area=500.0, floors=3, max_height=23.0, constructibility_coef=1.2,
+            occupation_percentage=60.0, zone_type="residencial",
+        )
+
+        assert calculator.calculate_cabida(params).rules_version == self.rules.version
+        assert calculator.calculate_cabida_batch(500.0, 3, 23.0, 1.2, 60.0, "residencial").rules_version == self.rules.version
+
+
+class TestRuleRegistry:
+
+    def test_changed_file_is_recompiled_without_restart(self, tmp_path):
+        path = tmp_path / "reglas.json"
+        _write(path, _rules_data(version="v1"))
+        registry = RuleRegistry(str(path), check_interval=0.001)
+        assert registry.current().version == "v1"
+
+        zones = _rules_data()["zones"]
+        zones["residencial"]["max_occupation"] = 0.5
+        _write(path, _rules_data(version="v2-reducida", zones=zones))
+        time.sleep(0.01)
+
+        rules = registry.current()
+        assert rules.version == "v2-reducida"
+        params = OGUCParameters(
+            surface_area=500.0, floors=3, max_height=23.0, constructibility_coef=1.2,
+            occupation_percentage=55.0, zone_type="residencial",
+        )
+        assert OGUCCalculator(rules).calculate_cabida(params).compliance_status == "RECHAZADO"
+
+    def test_invalid_update_keeps_previous_version(self, tmp_path):
+        path = tmp_path / "reglas.json"
+        _write(path, _rules_data(version="v1"))
+        registry = RuleRegistry(str(path), check_interval=0.001)
+        registry.current()
+
+        path.write_text("{ no es json", encoding="utf-8")
+        os.utime(path, (time.time() + 100, time.time() + 100))
+        time.sleep(0.01)
+
+        assert registry.current().version == "v1"
+        with pytest.raises(RuleSetError):
+            registry.reload()
+
+
+@pytest.mark.asyncio
+async def test_rules_endpoints_report_and_reload_version(async_client):
+    response = await async_client.get("/api/v1/calculate/rules")
+    assert response.status_code == 200
+    version = response.json()["version"]
+    assert response.json()["zones"]["comercial"]["max_occupation"] == 0.8
+
+    response = await async_client.post("/api/v1/calculate/rules/reload")
+    assert response.status_code == 200
+    assert response.json()["version"] == version
+
+    response = await async_client.post(
+        "/api/v1/calculate/quick-calculate",
+        params={"surface_area": 500, "floors": 3},
+    )
+    assert response.json()["result"]["rules_version"] == version
@@ -1,7 +1,13 @@
+import os
+import subprocess
+import sys
+
 import httpx
 import pytest
 import pytest_asyncio
 
+from app.core.report_generator import init_report_worker, render_cabida_report_job
+from app.core.worker_pool import WorkerPool
 from main import app
 
 
@@ -70,3 +76,33 @@ async def test_generate_pdf_returns_pdf_response(async_client):
     assert response.status_code == 200
     assert response.headers["content-type"] == "application/pdf"
     assert response.content.startswith(b"%PDF")
+
+
+@pytest.mark.asyncio
+async def test_cabida_report_renders_in_process_pool():
+    payload = _sample_report_payload()
+    pool = WorkerPool(name="test-reports", mode="process", workers=1, initializer=init_report_worker, start_method="spawn")
+    pool.start()
+    try:
+        pdf_content = await pool.run(
+            render_cabida_report_job,
+            payload["certificate_data"],
+            payload["calculation_result"],
+            payload["parameters"],
+        )
+    finally:
+        pool.shutdown()
+
+    assert pdf_content.startswith(b"%PDF")
+
+
+def test_report_worker_modules_do_not_import_pdf_extraction():
+    # Lo que importa un worker de informes al deserializar sus tareas
+    code = (
+        "import sys, app.core.report_generator, app.core.worker_pool; "
+        "print('app.core.pdf_processor' in sys.modules)"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == "False"
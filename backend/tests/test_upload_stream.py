@@ -0,0 +1,99 @@
+import json
+
+import fitz
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.api import upload
+from app.core.worker_pool import WorkerPool
+from main import app
+
+HEADER = (
+    "MUNICIPALIDAD DE SANTIAGO\n"
+    "CERTIFICADO DE INFORMACIONES PREVIAS\n"
+    "Rol: 321-9\n"
+    "Comuna: Providencia\n"
+    "Superficie terreno: 800 m2\n"
+)
+NORMS = (
+    "Zona: ZR-2\n"
+    "Altura máxima: 21 m\n"
+    "Coeficiente de constructibilidad: 2,0\n"
+    "Porcentaje de ocupación: 50%\n"
+)
+
+
+def _pdf(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((50, 72), text, fontsize=9)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_pages_and_fields_as_they_are_found(async_client):
+    content = _pdf([HEADER, NORMS] + ["Anexo: planos del predio"] * 5)
+
+    response = await async_client.post(
+        "/api/v1/upload/certificate/stream",
+        files={"file": ("cip-stream.pdf", content, "application/pdf")},
+    )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    names = [name for name, _ in events]
+    # Los campos de la primera página llegan antes de leer la segunda
+    assert names == ["received", "page", "fields", "page", "fields", "certificate"]
+    assert events[2][1] == {"rol": "321-9", "comuna": "Providencia", "superficie_terreno": 800.0}
+    assert events[4][1]["altura_maxima"] == 21.0
+
+    final = events[-1][1]
+    assert final["certificate_data"]["zona"] == "ZR-2"
+    assert final["certificate_handle"]
+
+
+@pytest.mark.asyncio
+async def test_stream_extracts_in_the_extraction_pool(async_client, monkeypatch):
+    pool = WorkerPool(name="test", mode="thread", workers=1)
+    monkeypatch.setattr(upload, "extraction_pool", pool)
+    try:
+        response = await async_client.post(
+            "/api/v1/upload/certificate/stream",
+            files={"file": ("cip-pool.pdf", _pdf([HEADER + NORMS]), "application/pdf")},
+        )
+    finally:
+        pool.shutdown()
+
+    names = [name for name, _ in _events(response.text)]
+    assert names == ["received", "page", "fields", "certificate"]
+    assert pool.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_errors_as_events(async_client):
+    response = await async_client.post(
+        "/api/v1/upload/certificate/stream",
+        files={"file": ("otro.pdf", _pdf(["Un documento cualquiera sin datos del CIP"]), "application/pdf")},
+    )
+
+    name, data = _events(response.text)[-1]
+    assert name == "error"
+    assert "Certificado de Informaciones Previas" in data["detail"]
@@ -0,0 +1,94 @@
+import hashlib
+import io
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.uploads import UploadTooLargeError, spool_upload
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def small_uploads(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "max_file_size", 1024)
+    monkeypatch.setattr(settings, "upload_form_overhead", 512)
+    monkeypatch.setattr(settings, "upload_chunk_size", 256)
+    monkeypatch.setattr(settings, "upload_tmp_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_writes_file_with_size_and_hash(small_uploads):
+    content = b"%PDF-1.4 contenido" * 10
+    upload = UploadFile(file=io.BytesIO(content), filename="cert.pdf")
+
+    spooled = await spool_upload(upload, max_size=1024)
+
+    assert spooled.size == len(content)
+    assert spooled.sha256 == hashlib.sha256(content).hexdigest()
+    assert spooled.path.endswith(".pdf")
+    with open(spooled.path, "rb") as f:
+        assert f.read() == content
+
+    spooled.cleanup()
+    assert not os.path.exists(spooled.path)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_aborts_once_limit_is_exceeded(small_uploads):
+    upload = UploadFile(file=io.BytesIO(b"x" * 5000), filename="cert.pdf")
+
+    with pytest.raises(UploadTooLargeError):
+        await spool_upload(upload, max_size=1024)
+
+    # Se detiene en el primer bloque que supera el límite y no deja temporales
+    assert upload.file.tell() <= 1024 + settings.upload_chunk_size
+    assert os.listdir(small_uploads) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_rejected_from_content_length(async_client, small_uploads):
+    response = await async_client.post(
+        "/api/v1/upload/certificate",
+        files={"file": ("cert.pdf", b"x" * 4096, "application/pdf")},
+        data={"floors": "3", "zone_type": "residencial"},
+    )
+
+    assert response.status_code == 400
+    assert "demasiado grande" in response.json()["detail"].lower()
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_is_cut_when_limit_is_exceeded(async_client, small_uploads):
+    sent = []
+
+    async def body():
+        yield (
+            b"--limite\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="cert.pdf"\r\n'
+            b"Content-Type: application/pdf\r\n\r\n"
+        )
+        for _ in range(20):
+            sent.append(1)
+            yield b"x" * 512
+
+    response = await async_client.post(
+        "/api/v1/upload/certificate",
+        content=body(),
+        headers={"content-type": "multipart/form-data; boundary=limite"},
+    )
+
+    assert response.status_code == 400
+    assert "demasiado grande" in response.json()["detail"].lower()
+    assert len(sent) < 20
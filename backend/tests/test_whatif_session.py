@@ -0,0 +1,162 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import calculate
+from app.api.calculate import _session_advice
+from app.core.oguc_calculator import OGUCCalculator, OGUCParameters
+from app.core.regulation_rules import DEFAULT_RULES_PATH, RuleSet
+from app.core.whatif_session import SESSION_PARAMETERS, WhatIfSession
+from main import app
+
+CERTIFICATE = {
+    "superficie_terreno": 500.0,
+    "altura_maxima": 14.0,
+    "coeficiente_constructibilidad": 1.2,
+    "porcentaje_ocupacion": 50.0,
+}
+
+
+def _params(**overrides) -> OGUCParameters:
+    values = dict(
+        surface_area=500.0,
+        floors=3,
+        max_height=14.0,
+        constructibility_coef=1.2,
+        occupation_percentage=50.0,
+        zone_type="residencial",
+    )
+    values.update(overrides)
+    return OGUCParameters(**values)
+
+
+class TestIncrementalRecalculation:
+
+    def setup_method(self):
+        self.calculator = OGUCCalculator()
+
+    def test_recalculate_matches_full_calculation(self):
+        """Test el recálculo incremental coincide con calculate_cabida para deltas aleatorios"""
+        rng = np.random.default_rng(11)
+        candidates = {
+            "surface_area": lambda: float(rng.choice([30.0, 500.0, 1200.5])),
+            "floors": lambda: int(rng.integers(1, 15)),
+            "max_height": lambda: float(rng.choice([10.0, 23.0, 60.0])),
+            "constructibility_coef": lambda: float(rng.choice([0.0, 1.2, 3.5])),
+            "occupation_percentage": lambda: float(rng.choice([40.0, 70.0, 90.0])),
+            "zone_type": lambda: str(rng.choice(["residencial", "comercial"])),
+            "min_dwelling_area": lambda: float(rng.choice([35.0, 55.0])),
+        }
+        params = _params()
+        result = self.calculator.calculate_cabida(params)
+        for _ in range(200):
+            names = rng.choice(list(candidates), size=int(rng.integers(1, 3)), replace=False).tolist()
+            params = params._replace(**{name: candidates[name]() for name in names})
+            result = self.calculator.recalculate(result, params, names)
+            assert result == self.calculator.calculate_cabida(params)
+
+    def test_rules_are_not_evaluated_when_only_floors_change(self, monkeypatch):
+        result = self.calculator.calculate_cabida(_params())
+        calls = []
+        monkeypatch.setattr(self.calculator, "_compliance", lambda params: calls.append(params))
+
+        updated = self.calculator.recalculate(result, _params(floors=4), ["floors"])
+
+        assert calls == []
+        assert updated.allowed_floors == 4
+
+    def test_compliance_depends_on_the_parameters_of_the_loaded_rules(self):
+        """Test una regla sobre floors hace que cambiar los pisos reevalúe el cumplimiento"""
+        with open(DEFAULT_RULES_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        data["rules"].append({"id": "pisos_maximos", "parameter": "floors", "max": 4, "message": "Demasiados pisos"})
+        calculator = OGUCCalculator(rules=RuleSet(data))
+
+        assert "floors" not in self.calculator.dependencies["compliance"]
+        assert "floors" in calculator.dependencies["compliance"]
+
+        result = calculator.calculate_cabida(_params())
+        updated = calculator.recalculate(result, _params(floors=6), ["floors"])
+
+        assert updated.compliance_status == "RECHAZADO"
+        assert updated == calculator.calculate_cabida(_params(floors=6))
+
+
+class TestWhatIfSession:
+
+    def test_apply_returns_only_changed_fields(self):
+        session = WhatIfSession(_params(), _session_advice)
+
+        response = session.apply({"floors": 8})
+
+        # 14m / 2.6m = 5 pisos: aparece la advertencia de altura
+        assert response["changed"] == {"allowed_floors": 5}
+        assert any(w.field == "height" for w in response["warnings"])
+        assert response["revision"] == 1
+
+    def test_unchanged_values_produce_empty_diff(self):
+        session = WhatIfSession(_params(), _session_advice)
+
+        response = session.apply({"floors": 3, "zone_type": "residencial"})
+
+        assert response == {"changed": {}, "revision": 0}
+
+    def test_compliance_changes_are_reported(self):
+        session = WhatIfSession(_params(), _session_advice)
+
+        response = session.apply({"occupation_percentage": 75.0})
+
+        assert response["changed"]["compliance_status"] == "RECHAZADO"
+        assert response["changed"]["max_occupation_surface"] == 375.0
+        assert "Porcentaje de ocupación" in response["changed"]["rejection_reasons"][0]
+        # Las recomendaciones corresponden al nuevo estado, no al anterior
+        assert any("porcentaje de ocupación" in item for item in response["recommendations"])
+
+    def test_unknown_parameters_are_rejected(self):
+        session = WhatIfSession(_params(), _session_advice)
+
+        with pytest.raises(ValueError):
+            session.apply({"comuna": "Providencia"})
+        assert "comuna" not in SESSION_PARAMETERS
+
+
+def test_websocket_session_pushes_compact_diffs():
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/calculate/session") as websocket:
+        websocket.send_json({"type": "start", "certificate_data": CERTIFICATE, "floors": 3})
+        started = websocket.receive_json()
+        assert started["type"] == "result"
+        assert started["result"]["max_building_surface"] == 600.0
+
+        websocket.send_json({"type": "update", "seq": 1, "delta": {"constructibility_coef": 1.5}})
+        diff = websocket.receive_json()
+        assert diff["type"] == "diff" and diff["seq"] == 1
+        assert diff["changed"] == {"max_building_surface": 750.0, "dwelling_units_max": 18}
+        assert diff["server_ms"] < 10
+
+        websocket.send_json({"type": "update", "seq": 2, "delta": {"pisos": 4}})
+        assert websocket.receive_json()["type"] == "error"
+
+
+def test_websocket_update_before_start_is_an_error():
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/calculate/session") as websocket:
+        websocket.send_json({"type": "update", "delta": {"floors": 4}})
+        assert websocket.receive_json()["detail"] == "La sesión no se ha iniciado"
+
+
+def test_websocket_unexpected_errors_are_reported_without_closing(monkeypatch):
+    def broken_start(message):
+        raise RuntimeError("falla inesperada")
+
+    monkeypatch.setattr(calculate, "_start_session", broken_start)
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/calculate/session") as websocket:
+        websocket.send_json({"type": "start", "certificate_data": CERTIFICATE, "floors": 3})
+        error = websocket.receive_json()
+        assert error["type"] == "error" and "falla inesperada" in error["detail"]
+
+        websocket.send_json({"type": "update", "delta": {"floors": 4}})
+        assert websocket.receive_json()["detail"] == "La sesión no se ha iniciado"
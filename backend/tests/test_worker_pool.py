@@ -0,0 +1,82 @@
+import asyncio
+import operator
+import threading
+
+import pytest
+
+from app.core.worker_pool import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_runs_jobs_and_tracks_stats():
+    pool = WorkerPool(name="test", mode="thread", workers=2)
+    try:
+        result = await pool.run(operator.add, 2, 3)
+        assert result == 5
+
+        stats = pool.stats()
+        assert stats["started"] is True
+        assert stats["completed"] == 1
+        assert stats["pending"] == 0
+    finally:
+        pool.shutdown()
+
+    assert pool.stats()["started"] is False
+
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_jobs_off_the_event_loop():
+    pool = WorkerPool(name="test", mode="process", workers=1, start_method="spawn")
+    pool.start()
+    try:
+        assert await pool.run(operator.mul, 6, 7) == 42
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_jobs_report_progress_through_the_pool_queue():
+    pool = WorkerPool(name="test", mode="process", workers=1, start_method="spawn")
+    try:
+        progress = pool.progress_queue()
+        await pool.run(operator.methodcaller("put", ("page", {"index": 0})), progress)
+        assert progress.get(timeout=5) == ("page", {"index": 0})
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_counts_jobs_waiting_for_a_worker():
+    pool = WorkerPool(name="test", mode="thread", workers=1)
+    release = threading.Event()
+    try:
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+
+        stats = pool.stats()
+        assert stats["pending"] == 3
+        assert stats["queued"] == 2
+
+        release.set()
+        await asyncio.gather(*jobs)
+        stats = pool.stats()
+        assert stats["queued"] == 0
+        assert stats["peak_pending"] == 3
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_are_counted_and_reraised():
+    pool = WorkerPool(name="test", mode="inline", workers=1)
+
+    with pytest.raises(ZeroDivisionError):
+        await pool.run(operator.truediv, 1, 0)
+
+    assert pool.stats()["failed"] == 1
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        WorkerPool(name="test", mode="gpu", workers=1)
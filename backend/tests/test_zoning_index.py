@@ -0,0 +1,98 @@
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.core.pdf_processor import CertificateData
+from app.core.zoning_index import (
+    ZoningFeature,
+    ZoningIndex,
+    assign_zone,
+    parse_coordinates,
+    parse_dms,
+)
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def _square(x: float, y: float, size: float):
+    return np.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]])
+
+
+def _grid_index(cells: int, node_capacity: int = 8) -> ZoningIndex:
+    polygons, features = [], []
+    for i in range(cells):
+        for j in range(cells):
+            polygons.append([[_square(i, j, 1.0)]])
+            features.append(ZoningFeature(zona=f"{i}-{j}", comuna=None, limits={}, area=1.0))
+    return ZoningIndex(polygons, features, node_capacity=node_capacity)
+
+
+def test_parse_certificate_coordinates():
+    lat, lon = parse_coordinates("33°26'15S 70°39'02W")
+
+    assert lat == pytest.approx(-33.4375)
+    assert lon == pytest.approx(-70.650556, abs=1e-6)
+    assert parse_dms("70°39'02O") == pytest.approx(lon)
+    assert parse_coordinates("sin coordenadas") is None
+
+
+def test_rtree_lookup_matches_brute_force():
+    index = _grid_index(40)
+    rng = np.random.default_rng(3)
+
+    assert index.depth >= 3
+    for x, y in rng.uniform(-1, 41, size=(500, 2)).tolist():
+        feature = index.lookup(lat=y, lon=x)
+        if 0 < x < 40 and 0 < y < 40:
+            assert feature.zona == f"{int(x)}-{int(y)}"
+        else:
+            assert feature is None
+
+
+def test_holes_and_overlaps():
+    outer = [_square(0, 0, 10), _square(2, 2, 2)[::-1]]  # con un hoyo en (2..4, 2..4)
+    inner = [_square(6, 6, 2)]
+    index = ZoningIndex(
+        [[outer], [inner]],
+        [
+            ZoningFeature("general", None, {}, area=96.0),
+            ZoningFeature("especial", None, {"max_height": 10.5}, area=4.0),
+        ],
+    )
+
+    assert index.lookup(lat=1, lon=1).zona == "general"
+    assert index.lookup(lat=3, lon=3) is None  # dentro del hoyo
+    assert index.lookup(lat=7, lon=7).zona == "especial"  # la zona más específica
+    assert index.stats()["matches"] == 2
+
+
+def test_assign_zone_completes_missing_zone_from_coordinates():
+    certificate = CertificateData(comuna=None, zona=None, coordenadas="33°26'15S 70°39'02W")
+
+    located = assign_zone(certificate)
+
+    assert located.zona == "A"
+    assert located.comuna == "Santiago"
+    assert located.zonificacion["limits"]["max_height"] == 38.0  # del Plan Regulador
+    assert certificate.zona is None
+
+
+@pytest.mark.asyncio
+async def test_zone_lookup_endpoint(async_client):
+    response = await async_client.post(
+        "/api/v1/calculate/zone-lookup",
+        json={"coordinates": ["33°26'15S 70°39'02W", "40°00'00S 70°00'00W", "no válida"]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["matched"] == 1
+    assert body["zones"][0]["zona"] == "A"
+    assert body["zones"][1] is None and body["zones"][2] is None
@@ -35,19 +35,26 @@ const theme = createTheme({
 
 function App() {
   const [certificateData, setCertificateData] = useState(null);
+  const [certificateHandle, setCertificateHandle] = useState(null);
   const [calculationResult, setCalculationResult] = useState(null);
+  const [evaluation, setEvaluation] = useState(null);
   const [parameters, setParameters] = useState({
     floors: 3,
     zone_type: 'residencial',
     min_dwelling_area: 40.0
   });
 
-  const handleCertificateProcessed = (data) => {
+  const handleCertificateProcessed = (data, handle) => {
     setCertificateData(data);
+    setCertificateHandle(handle || null);
   };
 
-  const handleCalculationComplete = (result) => {
+  // ``evaluationData`` es la respuesta completa de /evaluate (validación y vista previa del informe)
+  const handleCalculationComplete = (result, evaluationData) => {
     setCalculationResult(result);
+    if (evaluationData) {
+      setEvaluation(evaluationData);
+    }
   };
 
   const handleParametersChange = (newParams) => {
@@ -82,7 +89,9 @@ function App() {
                     {certificateData && (
                       <Results 
                         certificateData={certificateData}
+                        certificateHandle={certificateHandle}
                         calculationResult={calculationResult}
+                        evaluation={evaluation}
                         parameters={parameters}
                         onCalculationComplete={handleCalculationComplete}
                       />
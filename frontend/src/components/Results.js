@@ -34,16 +34,35 @@ import {
   Height
 } from '@mui/icons-material';
 import axios from 'axios';
+import useWhatIfSession from '../hooks/useWhatIfSession';
 
-const Results = ({ certificateData, calculationResult, parameters, onCalculationComplete }) => {
+const Results = ({ certificateData, certificateHandle, calculationResult, evaluation, parameters, onCalculationComplete }) => {
   const [generatingReport, setGeneratingReport] = useState(false);
   const [reportError, setReportError] = useState(null);
+  const [session, setSession] = useState(null);
+
+  // Con un resultado en pantalla, los cambios de parámetros se recalculan en vivo
+  useWhatIfSession({
+    enabled: Boolean(calculationResult),
+    certificateHandle,
+    certificateData,
+    parameters,
+    onResult: (result, sessionState) => {
+      setSession(sessionState);
+      onCalculationComplete({ ...calculationResult, ...result });
+    },
+  });
 
   if (!calculationResult) {
     return null;
   }
 
   const isApproved = calculationResult.compliance_status === 'APROBADO';
+  // La validación y la vista previa de /evaluate dejan de valer cuando la sesión cambia el resultado
+  const evaluationCurrent = !session || session.revision === 0;
+  const validation = evaluation && evaluationCurrent ? evaluation.validation : null;
+  const preview = evaluation && evaluationCurrent ? evaluation.preview : null;
+  const warnings = session ? session.warnings : (validation ? validation.warnings : []);
   const statusColor = isApproved ? 'success' : 'error';
   const statusIcon = isApproved ? <CheckCircle /> : <Error />;
 
@@ -52,8 +71,11 @@ const Results = ({ certificateData, calculationResult, parameters, onCalculation
     setReportError(null);
 
     try {
+      const certificate = certificateHandle
+        ? { certificate_handle: certificateHandle }
+        : { certificate_data: certificateData };
       const response = await axios.post('/api/v1/reports/generate-pdf', {
-        certificate_data: certificateData,
+        ...certificate,
         calculation_result: calculationResult,
         parameters: parameters
       }, {
@@ -134,15 +156,29 @@ const Results = ({ certificateData, calculationResult, parameters, onCalculation
               color={statusColor}
               sx={{ fontSize: '1.1rem', py: 2, px: 3 }}
             />
+            {validation && (
+              <Chip
+                label={`Puntaje normativo: ${validation.validation_score}/100`}
+                variant="outlined"
+                sx={{ ml: 2 }}
+              />
+            )}
+          </Box>
+          <Box textAlign="right">
+            <Button
+              variant="contained"
+              startIcon={<Download />}
+              onClick={generatePDFReport}
+              disabled={generatingReport}
+            >
+              {generatingReport ? 'Generando...' : 'Descargar Informe PDF'}
+            </Button>
+            {preview && (
+              <Typography variant="caption" display="block" color="text.secondary" sx={{ mt: 1 }}>
+                Informe de {preview.estimated_pages} {preview.estimated_pages === 1 ? 'página' : 'páginas'}
+              </Typography>
+            )}
           </Box>
-          <Button
-            variant="contained"
-            startIcon={<Download />}
-            onClick={generatePDFReport}
-            disabled={generatingReport}
-          >
-            {generatingReport ? 'Generando...' : 'Descargar Informe PDF'}
-          </Button>
         </Box>
         
         {reportError && (
@@ -219,6 +255,25 @@ const Results = ({ certificateData, calculationResult, parameters, onCalculation
         </Paper>
       )}
 
+      {/* Warnings */}
+      {warnings.length > 0 && (
+        <Paper sx={{ p: 3, mb: 3 }}>
+          <Typography variant="h6" gutterBottom>
+            ⚠️ Advertencias
+          </Typography>
+          <List>
+            {warnings.map((warning, index) => (
+              <ListItem key={index}>
+                <ListItemIcon>
+                  {warning.severity === 'warning' ? <Warning color="warning" /> : <Info color="info" />}
+                </ListItemIcon>
+                <ListItemText primary={warning.message} />
+              </ListItem>
+            ))}
+          </List>
+        </Paper>
+      )}
+
       {/* Recommendations */}
       {calculationResult.recommendations && calculationResult.recommendations.length > 0 && (
         <Paper sx={{ p: 3, mb: 3 }}>
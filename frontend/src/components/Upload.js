@@ -26,6 +26,7 @@ const Upload = ({ onCertificateProcessed, onCalculationComplete, parameters, onP
   const [uploading, setUploading] = useState(false);
   const [uploadResult, setUploadResult] = useState(null);
   const [error, setError] = useState(null);
+  const [progress, setProgress] = useState(null);
   const [activeStep, setActiveStep] = useState(0);
 
   const steps = ['Subir Certificado', 'Configurar Parámetros', 'Procesar'];
@@ -36,32 +37,55 @@ const Upload = ({ onCertificateProcessed, onCalculationComplete, parameters, onP
 
     setUploading(true);
     setError(null);
+    setProgress(null);
     setActiveStep(0);
 
     try {
       const formData = new FormData();
       formData.append('file', file);
-      formData.append('floors', parameters.floors);
-      formData.append('zone_type', parameters.zone_type);
-      formData.append('min_dwelling_area', parameters.min_dwelling_area);
 
-      const response = await axios.post('/api/v1/upload/certificate', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
+      // Variante SSE: los campos llegan a medida que se lee cada página
+      const response = await fetch('/api/v1/upload/certificate/stream', {
+        method: 'POST',
+        body: formData,
       });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new window.Error(body.detail || 'Error en la conexión con el servidor');
+      }
 
-      if (response.data.success) {
-        setUploadResult(response.data);
-        setActiveStep(2);
-        onCertificateProcessed(response.data.certificate_data);
-      } else {
-        setError(response.data.message || 'Error procesando el certificado');
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = block.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || '{}');
+
+          if (event === 'page') {
+            setProgress(prev => ({ ...prev, pages: data.index + 1 }));
+          } else if (event === 'fields') {
+            setProgress(prev => ({ ...prev, fields: { ...prev?.fields, ...data } }));
+          } else if (event === 'certificate') {
+            setUploadResult({ success: true, ...data });
+            setActiveStep(2);
+            onCertificateProcessed(data.certificate_data, data.certificate_handle);
+          } else if (event === 'error') {
+            setError(data.detail || 'Error procesando el certificado');
+          }
+        }
       }
     } catch (err) {
-      setError(err.response?.data?.detail || 'Error en la conexión con el servidor');
+      setError(err.message || 'Error en la conexión con el servidor');
     } finally {
       setUploading(false);
+      setProgress(null);
     }
   }, [parameters, onCertificateProcessed]);
 
@@ -91,17 +115,23 @@ const Upload = ({ onCertificateProcessed, onCalculationComplete, parameters, onP
     setError(null);
 
     try {
-      const response = await axios.post('/api/v1/calculate/cabida', {
-        certificate_data: uploadResult.certificate_data,
+      // El handle evita reenviar el certificado completo al servidor
+      const certificate = uploadResult.certificate_handle
+        ? { certificate_handle: uploadResult.certificate_handle }
+        : { certificate_data: uploadResult.certificate_data };
+      // Cálculo, validación y vista previa del informe en una sola solicitud
+      const response = await axios.post('/api/v1/evaluate', {
+        ...certificate,
         floors: parameters.floors,
         zone_type: parameters.zone_type,
         min_dwelling_area: parameters.min_dwelling_area
       });
 
       if (response.data) {
-        setUploadResult(prev => ({ ...prev, calculation_result: response.data }));
+        const { calculation } = response.data;
+        setUploadResult(prev => ({ ...prev, calculation_result: calculation }));
         if (onCalculationComplete) {
-          onCalculationComplete(response.data);
+          onCalculationComplete(calculation, response.data);
         }
         setActiveStep(2);
       }
@@ -168,8 +198,20 @@ const Upload = ({ onCertificateProcessed, onCalculationComplete, parameters, onP
             </Box>
 
             {uploading && (
-              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+              <Box sx={{ display: 'flex', flexDirection: 'column', alignItems: 'center', mt: 2 }}>
                 <CircularProgress />
+                {progress?.pages && (
+                  <Typography variant="caption" color="text.secondary" sx={{ mt: 1 }}>
+                    Páginas leídas: {progress.pages}
+                  </Typography>
+                )}
+                {progress?.fields && (
+                  <Typography variant="body2" sx={{ mt: 1 }}>
+                    {progress.fields.rol && <>Rol: {progress.fields.rol} · </>}
+                    {progress.fields.comuna && <>Comuna: {progress.fields.comuna} · </>}
+                    {progress.fields.superficie_terreno && <>Superficie: {progress.fields.superficie_terreno} m²</>}
+                  </Typography>
+                )}
               </Box>
             )}
 
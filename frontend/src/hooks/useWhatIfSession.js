@@ -0,0 +1,94 @@
+import { useCallback, useEffect, useRef } from 'react';
+
+// Parámetros de la sesión what-if en el formato del backend (se omiten los vacíos)
+const toSessionParameters = (parameters) => {
+  const values = {
+    floors: parseInt(parameters.floors, 10),
+    zone_type: parameters.zone_type,
+    min_dwelling_area: parseFloat(parameters.min_dwelling_area),
+    max_height: parameters.max_height === '' || parameters.max_height == null
+      ? NaN
+      : parseFloat(parameters.max_height),
+  };
+  return Object.fromEntries(
+    Object.entries(values).filter(([, value]) => value !== undefined && !Number.isNaN(value))
+  );
+};
+
+// Sesión what-if por WebSocket: el certificado y el último resultado quedan en el
+// servidor; cada cambio de parámetros envía solo lo modificado y aplica el diff recibido.
+// ``onResult(result, { warnings, revision })`` recibe el resultado con sus recomendaciones
+const useWhatIfSession = ({ enabled, certificateHandle, certificateData, parameters, onResult }) => {
+  const socketRef = useRef(null);
+  const sentRef = useRef(null);
+  const seqRef = useRef(0);
+  const parametersRef = useRef(parameters);
+  const onResultRef = useRef(onResult);
+  parametersRef.current = parameters;
+  onResultRef.current = onResult;
+
+  const sendDelta = useCallback(() => {
+    const socket = socketRef.current;
+    if (!socket || socket.readyState !== WebSocket.OPEN || !sentRef.current) return;
+    const next = toSessionParameters(parametersRef.current);
+    const delta = Object.fromEntries(
+      Object.entries(next).filter(([name, value]) => sentRef.current[name] !== value)
+    );
+    if (Object.keys(delta).length === 0) return;
+    sentRef.current = { ...sentRef.current, ...delta };
+    seqRef.current += 1;
+    socket.send(JSON.stringify({ type: 'update', seq: seqRef.current, delta }));
+  }, []);
+
+  useEffect(() => {
+    if (!enabled) return undefined;
+
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${protocol}://${window.location.host}/api/v1/calculate/session`);
+    socketRef.current = socket;
+    let result = null;
+    let warnings = [];
+
+    socket.onopen = () => {
+      const certificate = certificateHandle
+        ? { certificate_handle: certificateHandle }
+        : { certificate_data: certificateData };
+      const { floors, zone_type, min_dwelling_area } = toSessionParameters(parametersRef.current);
+      sentRef.current = { floors, zone_type, min_dwelling_area };
+      socket.send(JSON.stringify({ type: 'start', ...certificate, floors, zone_type, min_dwelling_area }));
+    };
+
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'result') {
+        result = { ...message.result, recommendations: message.recommendations };
+        warnings = message.warnings;
+        onResultRef.current(result, { warnings, revision: message.revision });
+        // Parámetros que no forman parte del inicio (altura) o que cambiaron mientras tanto
+        sendDelta();
+      } else if (message.type === 'diff' && result) {
+        // Recomendaciones y advertencias solo llegan cuando cambian
+        result = { ...result, ...message.changed };
+        if (message.recommendations) {
+          result.recommendations = message.recommendations;
+        }
+        if (message.warnings) {
+          warnings = message.warnings;
+        }
+        onResultRef.current(result, { warnings, revision: message.revision });
+      }
+    };
+
+    return () => {
+      socket.close();
+      socketRef.current = null;
+      sentRef.current = null;
+    };
+  }, [enabled, certificateHandle, certificateData, sendDelta]);
+
+  useEffect(() => {
+    sendDelta();
+  }, [parameters, sendDelta]);
+};
+
+export default useWhatIfSession;